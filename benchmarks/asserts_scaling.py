@@ -0,0 +1,51 @@
+"""
+Measures how `generate_asserts` scales with the number of recorded calls.
+
+Run from the repository root:
+    python -m benchmarks.asserts_scaling [max_calls]
+
+The mock is called in a loop, the way a mock inside a hot loop of the code
+under test is, with a few methods, a few distinct arguments and a large
+configuration which is passed to many calls. The time per call is expected
+to stay flat as the number of calls grows.
+"""
+import sys
+import time
+from unittest.mock import MagicMock
+
+import mock_autogen
+
+
+def record_calls(calls):
+    mock_obj = MagicMock()
+    config = {f'option{index}': list(range(20)) for index in range(50)}
+    for index in range(calls):
+        mock_obj.read(index % 100, mode='rb')
+        if index % 10 == 0:
+            mock_obj.session().get('/items', params={'page': index % 7})
+            mock_obj.configure(config)
+    return mock_obj
+
+
+def measure(calls):
+    mock_obj = record_calls(calls)
+    started = time.perf_counter()
+    with mock_autogen.suppress_output():
+        generated = mock_autogen.generate_asserts(mock_obj, name='mock_obj')
+    elapsed = time.perf_counter() - started
+    return len(mock_obj.mock_calls), elapsed, len(generated)
+
+
+def main(max_calls=10**6):
+    print(f"python {sys.version.split()[0]}")
+    calls = 10**4
+    while calls <= max_calls:
+        recorded, elapsed, size = measure(calls)
+        print(f"{recorded:>9} calls: {elapsed:8.3f}s "
+              f"({elapsed / recorded * 1e6:6.2f}us per call), "
+              f"{size / 1024 / 1024:7.1f}MB of asserts")
+        calls *= 10
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,67 @@
+"""
+Measures the throughput of mock generation when called from a thread pool.
+
+Run from the repository root:
+    python -m benchmarks.thread_scaling [max_threads] [calls_per_thread]
+
+On a free-threaded CPython build (3.13t and later) the throughput is
+expected to grow with the number of threads, on a regular build the GIL keeps
+it roughly flat. Either way, every thread must produce the same code.
+"""
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import mock_autogen
+from mock_autogen.ast_tree_travel import DependencyLister
+from tests.sample.code.tested_module import base_64_whole_modules, \
+    process_and_zip, FirstClass
+
+
+def _work(calls):
+    results = set()
+    with mock_autogen.suppress_output():
+        for _ in range(calls):
+            results.add(mock_autogen.generate_uut_mocks(base_64_whole_modules))
+            results.add(
+                mock_autogen.generate_uut_mocks(
+                    FirstClass(1).using_not_implemented))
+            DependencyLister(process_and_zip).execute()
+
+            mock_obj = MagicMock()
+            mock_obj.do_something(1, key='value')
+            results.add(
+                mock_autogen.generate_asserts(mock_obj, name='mock_obj'))
+    return results
+
+
+def measure(threads, calls_per_thread):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        outputs = list(executor.map(_work, [calls_per_thread] * threads))
+    elapsed = time.perf_counter() - started
+
+    # all threads must agree on the generated code
+    assert all(output == outputs[0] for output in outputs)
+    return threads * calls_per_thread / elapsed
+
+
+def main(max_threads=8, calls_per_thread=50):
+    # the sample code has unsupported syntax, its warnings are not measured
+    logging.disable(logging.WARNING)
+    gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"python {sys.version.split()[0]}, GIL enabled: {gil_enabled}")
+    baseline = None
+    threads = 1
+    while threads <= max_threads:
+        throughput = measure(threads, calls_per_thread)
+        baseline = baseline or throughput
+        print(f"{threads:>3} threads: {throughput:10.1f} iterations/s "
+              f"(x{throughput / baseline:.2f})")
+        threads *= 2
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -4,6 +4,9 @@ from mock_autogen.generator import generate_asserts, generate_mocks, \
     MockingFramework
 
 from mock_autogen.pytest_mocker import PytestMocker
+from mock_autogen.utils import suppress_output
+
+__version__ = "2.4.0"
 
 # see mock_autogen.generator.generate_mocks for extra parameters and options
 generate_uut_mocks = partial(generate_mocks,
@@ -0,0 +1,136 @@
+import inspect
+import os
+from collections import namedtuple
+from typing import Callable
+
+from mock_autogen.ast_tree_travel import DependencyLister
+from mock_autogen.attribute_types import method_attribute_types
+from mock_autogen.bytecode_travel import BytecodeDependencyLister
+from mock_autogen.cache import FunctionCache, DiskCache
+from mock_autogen.symtable_travel import SymbolTableDependencyLister
+from mock_autogen.utils import source_fingerprint
+
+AnalysisResult = namedtuple('AnalysisResult', 'dependencies, warnings')
+AnalysisResult.__doc__ = """
+The dependencies of a function or a method, as found by `DependencyLister`.
+
+Both fields are tuples, so a result can be safely shared between callers:
+    * dependencies: every item is a tuple of path to object and object name.
+    Like: ('tests.sample.code.tested_module.random', 'randint')
+    * warnings: the warnings collected during the analysis, as strings.
+"""
+
+# the available analysis engines, by name
+engines = {
+    'ast': DependencyLister,
+    'symtable': SymbolTableDependencyLister,
+    'bytecode': BytecodeDependencyLister,
+}
+
+# the results of previous analyses, repeated analysis of the same function
+# with the same options costs a dictionary lookup
+dependency_cache = FunctionCache(maxsize=256)
+
+# the optional persistent cache, shared between runs and parallel workers
+disk_cache = DiskCache(os.environ['MOCK_AUTOGEN_CACHE_DIR']) \
+    if os.environ.get('MOCK_AUTOGEN_CACHE_DIR') else None
+
+
+def enable_disk_cache(directory: str, max_size: int = 64 * 1024 * 1024):
+    """
+    Stores the analysis results on disk, so following runs on unchanged code
+    skip parsing and traversal entirely.
+
+    The entries are keyed by the source of the function, the analysis options
+    and the library version. The cache can also be enabled by setting the
+    `MOCK_AUTOGEN_CACHE_DIR` environment variable to the cache directory.
+
+    Args:
+        directory: the cache directory, can be shared by parallel processes
+        max_size: the maximal total size of the cache, in bytes
+
+    Returns:
+        DiskCache: the enabled cache
+    """
+    global disk_cache
+    disk_cache = DiskCache(directory, max_size=max_size)
+    return disk_cache
+
+
+def disable_disk_cache():
+    """
+    Stops using the on disk cache, the stored entries are kept.
+    """
+    global disk_cache
+    disk_cache = None
+
+
+def list_dependencies(mocked: Callable,
+                      engine: str = 'ast',
+                      use_cache: bool = True) -> AnalysisResult:
+    """
+    Lists the external dependencies of a function or a method.
+
+    The result is memoized in `dependency_cache`, use
+    `dependency_cache.cache_info()` to get the hit and miss counters. If the
+    on disk cache is enabled, it is used when the result is not in memory.
+
+    Args:
+        mocked: a callable method or function
+        engine: the name of the analysis engine, one of `engines`. 'ast'
+            tracks the local names by itself, 'symtable' classifies them with
+            the symbol table of the compiler, 'bytecode' reads the code object
+            and doesn't need the source code
+        use_cache: whether to use the memoized result of a previous analysis
+            of the same function
+
+    Returns:
+        the dependencies and warnings found in the function
+    """
+    if engine not in engines:
+        raise ValueError(f"Unknown engine '{engine}', "
+                         f"expected one of: {', '.join(engines)}")
+    # the types of the attributes, which are assigned in __init__, depend on
+    # the class of the bound instance, not only on the function
+    options = (inspect.ismethod(mocked), engine,
+               tuple(sorted(method_attribute_types(mocked).items())))
+    if use_cache:
+        result = dependency_cache.get(mocked, options)
+        if result is not None:
+            return result
+
+    persistent_cache = disk_cache if use_cache else None
+    if persistent_cache is not None:
+        result = _analyze_with_disk_cache(persistent_cache, mocked, options)
+    else:
+        result = _analyze(mocked, engine)
+
+    if use_cache:
+        dependency_cache.put(mocked, options, result)
+    return result
+
+
+def _analyze(mocked, engine):
+    deps_lister = engines[engine](mocked).execute()
+    return AnalysisResult(
+        tuple(deps_lister.dependencies_found),
+        tuple(str(warning) for warning in deps_lister.warnings))
+
+
+def _analyze_with_disk_cache(persistent_cache, mocked, options):
+    # everything the analysis depends on, other than the library version
+    key = persistent_cache.key(source_fingerprint(mocked),
+                               inspect.getmodule(mocked).__name__,
+                               mocked.__qualname__, options)
+    stored = persistent_cache.get(key)
+    if stored is not None:
+        return AnalysisResult(
+            tuple(tuple(dependency) for dependency in stored['dependencies']),
+            tuple(stored['warnings']))
+
+    result = _analyze(mocked, options[1])
+    persistent_cache.put(key, {
+        'dependencies': result.dependencies,
+        'warnings': result.warnings
+    })
+    return result
@@ -2,11 +2,15 @@ import ast
 import functools
 import inspect
 import logging
+import re
 import sys
 import textwrap
 from collections import OrderedDict
 from typing import Callable
 
+from mock_autogen.attribute_types import method_attribute_types
+from mock_autogen.sources import module_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,10 +19,14 @@ def safe_travels(action: str, call_generic_visit: bool = True):
     Takes care of calling `self.generic_visit(node)` and allows the inner
     method to focus on the logic. Including in the case of exception.
 
-    If an exception does happen, a warning in the form of
+    If an exception does happen, a `TravelWarning` in the form of
     `f"# could not {action} on node: {str(node)}"` would be added to
     self.warnings, and the tree travel would continue to the next node.
 
+    The action and the generic visit flag are kept on the decorated method,
+    so `DependencyLister` can dispatch to the inner method directly, without
+    the overhead of the decorator on every node.
+
     Args:
         action: the name of the action
         call_generic_visit: whether to call generic_visit after the logic
@@ -34,23 +42,196 @@ def safe_travels(action: str, call_generic_visit: bool = True):
             try:
                 method(self, node, *args, **kwargs)
             except Exception as e:
-                node_repr = ast.dump(node)
-                if sys.version_info >= (3, 8) and self.source_code:
-                    node_repr = ast.get_source_segment(self.source_code, node)
-                node_repr = "\n#  ".join(node_repr.split("\n"))
-                warning = f"# could not {action} on node:\n" \
-                          f"#  {node_repr}\n" \
-                          f"#  {str(e)}"
-                logger.warning(warning, exc_info=True)
-                self.warnings.append(warning)
+                _record_travel_failure(self, action, node, e)
             if call_generic_visit:
                 self.generic_visit(node)
 
+        safe_visit.travel_action = action
+        safe_visit.call_generic_visit = call_generic_visit
         return safe_visit
 
     return inner_decorator
 
 
+def _record_travel_failure(visitor, action, node, exception):
+    """
+    Logs and adds a warning to `visitor.warnings` for a node which failed to
+    be visited. Must be called while handling the exception.
+
+    The warning text is rendered only when it's needed. Only the first
+    failure of every kind is logged as a warning, with its traceback, and the
+    repeated ones are logged at debug level, so a pattern which repeats in
+    the code doesn't slow down the analysis.
+    """
+    source_code = getattr(visitor, 'source_code', None)
+    warning = TravelWarning(
+        action, node, str(exception), source_code,
+        _indent(source_code, getattr(visitor, 'tree', None)))
+    traced_failures = getattr(visitor, 'traced_failures', None)
+    failure_kind = (action, type(exception))
+    if traced_failures is None or failure_kind not in traced_failures:
+        logger.warning(warning, exc_info=True)
+        if traced_failures is not None:
+            traced_failures.add(failure_kind)
+    else:
+        logger.debug("%s", warning)
+    visitor.warnings.append(warning)
+
+
+class TravelWarning:
+    """
+    A node which failed to be visited. The text of the warning is rendered
+    on first use, and compares equal to it.
+
+    Args:
+        action: the name of the failed action
+        node: the node which failed to be visited
+        error: the message of the exception
+        source_code: the source code the node was parsed from, if any
+        indent: the indentation of the analyzed function in the source code,
+            removed from the lines of the node, like from a dedented function
+    """
+    __slots__ = ('action', 'node', 'error', 'source_code', 'indent', '_text')
+
+    def __init__(self,
+                 action: str,
+                 node,
+                 error: str,
+                 source_code=None,
+                 indent: int = 0):
+        self.action = action
+        self.node = node
+        self.error = error
+        self.source_code = source_code
+        self.indent = indent
+        self._text = None
+
+    def __str__(self):
+        if self._text is None:
+            node_repr = None
+            if sys.version_info >= (3, 8) and self.source_code:
+                node_repr = _source_segment(self.source_code, self.node,
+                                            self.indent)
+            if node_repr is None:
+                node_repr = ast.dump(self.node)
+            node_repr = "\n#  ".join(node_repr.split("\n"))
+            self._text = f"# could not {self.action} on node:\n" \
+                         f"#  {node_repr}\n" \
+                         f"#  {self.error}"
+            self.node = self.source_code = None  # the text is all we need
+        return self._text
+
+    def __repr__(self):
+        return f"{type(self).__name__}({str(self)!r})"
+
+    def __eq__(self, other):
+        if isinstance(other, (str, TravelWarning)):
+            return str(self) == str(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(str(self))
+
+
+def _source_segment(source_code, node, indent=0):
+    """
+    Returns:
+        str: the source code of the node, like `ast.get_source_segment`, or
+        None if the node has no position. Up to `indent` leading whitespace
+        characters are removed from its lines after the first. Uses the line
+        offsets of the source code, which are computed once.
+    """
+    end_lineno = getattr(node, 'end_lineno', None)
+    end_col_offset = getattr(node, 'end_col_offset', None)
+    if end_lineno is None or end_col_offset is None:
+        return None
+    line_offsets = _line_offsets(source_code)
+    if end_lineno >= len(line_offsets):
+        return None
+
+    first_line = source_code[line_offsets[node.lineno -
+                                          1]:line_offsets[node.lineno]].encode(
+                                          )
+    if node.lineno == end_lineno:
+        return first_line[node.col_offset:end_col_offset].decode()
+    last_line = source_code[line_offsets[end_lineno -
+                                         1]:line_offsets[end_lineno]].encode()
+    segment = first_line[node.col_offset:].decode() + \
+        source_code[line_offsets[node.lineno]:line_offsets[end_lineno - 1]] + \
+        last_line[:end_col_offset].decode()
+    if indent:
+        segment = re.sub(r'(\r\n|\r|\n)[ \t]{0,%d}' % indent, r'\1', segment)
+    return segment
+
+
+def _indent(source_code, tree):
+    """
+    Returns:
+        int: the length of the leading whitespace of the first line of the
+        function or lambda node in the source code, 0 for a whole module,
+        which is parsed from a dedented function.
+    """
+    if not source_code or not isinstance(tree, (ast.stmt, ast.expr)):
+        return 0
+    line_offsets = _line_offsets(source_code)
+    line = source_code[line_offsets[tree.lineno - 1]:line_offsets[tree.lineno]]
+    return len(line) - len(line.lstrip(' \t'))
+
+
+@functools.lru_cache(maxsize=32)
+def _line_offsets(source_code):
+    """
+    Returns:
+        list of int: the offsets where every line of the source code starts,
+        and the length of the source code. Lines end like in
+        `ast.get_source_segment`.
+    """
+    return [0] + [
+        line_end.end() for line_end in _LINE_END.finditer(source_code)
+    ] + [len(source_code)]
+
+
+_LINE_END = re.compile(r'\r\n|\r|\n')
+
+# nodes which never have child nodes, like contexts, operators and constants
+_LEAF_NODE_TYPES = [ast.Constant] + [
+    node_type
+    for node_type in vars(ast).values() if isinstance(node_type, type)
+    and issubclass(node_type, ast.AST) and not node_type._fields
+]
+_LEAF_HANDLER = (None, None, False)
+
+
+def _build_dispatch_table(visitor_class):
+    """
+    Maps every node type to the handler of the visitor class, so dispatching a
+    node costs a single dictionary lookup.
+
+    Returns:
+        dict: keys are node types, values are tuples of
+        (inner method, action, whether to call generic_visit). The action is
+        None for methods which were not decorated with `safe_travels`, which
+        are called as is.
+    """
+    table = dict.fromkeys(_LEAF_NODE_TYPES, _LEAF_HANDLER)
+    for attribute in dir(visitor_class):
+        node_type = getattr(ast, attribute[len('visit_'):], None) \
+            if attribute.startswith('visit_') else None
+        if not isinstance(node_type, type):
+            continue
+        handler = getattr(visitor_class, attribute)
+        if handler is None:
+            continue  # a subclass may remove a handler by setting it to None
+        if handler is getattr(ast.NodeVisitor, attribute, None):
+            continue  # like visit_Constant, only supports deprecated names
+        if hasattr(handler, 'travel_action'):
+            table[node_type] = (handler.__wrapped__, handler.travel_action,
+                                handler.call_generic_visit)
+        else:
+            table[node_type] = (handler, None, False)
+    return table
+
+
 class DependencyLister(ast.NodeVisitor):
     """
     Goes over the ast tree of the mocked method or function, finds any
@@ -65,7 +246,8 @@ class DependencyLister(ast.NodeVisitor):
         Like: ('tests.sample.code.tested_module.random', 'randint')
 
     Any warnings during the ast parsing would be stored in the `warnings`
-    attribute. This list contains every warning as a string item.
+    attribute. This list contains every warning as a `TravelWarning` item,
+    use `str` to get its text.
 
     Args:
         mocked: a callable method or function
@@ -74,22 +256,29 @@ class DependencyLister(ast.NodeVisitor):
     def __init__(self, mocked: Callable):
         self.mocked = mocked
         self.outer_module_name = inspect.getmodule(mocked).__name__
-        self.source_code = textwrap.dedent(inspect.getsource(mocked))
-        self.tree = ast.parse(self.source_code)
+        self.source_code, self.tree = self._parse(mocked)
 
         self.dependencies_found = []  # the external func/obj to be mocked
         self.warnings = []  # alert on all the unsupported syntax
 
+        # the kinds of failures which were logged with their traceback
+        self.traced_failures = set()
+
         # these are the potential calls, some of them won't be mocked
-        # every object is a list of one item: path to object
-        # every func is a list of two items: path to function, function name
-        self.potential_dependencies = []
+        # keys are the dotted paths as found, so every path is kept once
+        # no matter how many times it is referenced, values are interned
+        # tuples: (root identifier,) or (root identifier, rest of the path)
+        self.potential_dependencies = {}
 
         # keys are names while values are true import paths
         # this is used to allow mocking dependencies that were renamed,
         # an example to such rename is an internal import in the UUT function
         self.import_mappings = {}
 
+        # the name of the first parameter of a method, like 'self', calls on
+        # its attributes may be patched on the types of the attributes
+        self.self_variable = None
+
         # ignore all variable function calls:
         #   if they are parameters or assignments it's hard to know their type,
         #       so it's hard to mock the right thing
@@ -98,14 +287,96 @@ class DependencyLister(ast.NodeVisitor):
         #       of that original mock
         self.ignored_variables = set()
 
+    # the nodes scheduled by the running traversal, None between traversals
+    _scheduled = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._dispatch_table = _build_dispatch_table(cls)
+
+    @staticmethod
+    def _parse(mocked):
+        """
+        Returns:
+            tuple: the source code and the ast tree of the mocked function.
+        """
+        # the module file is parsed once for all its functions, fallback to
+        # parsing the function alone for code which is not in a file
+        module_source_and_node = module_cache.function_node(mocked)
+        if module_source_and_node:
+            return module_source_and_node
+        source_code = textwrap.dedent(inspect.getsource(mocked))
+        return source_code, ast.parse(source_code)
+
     def execute(self):
         """
         Goes through the source code and collects any dependencies to mock.
+
+        The source code and the tree are released afterwards, so a finished
+        lister holds only the distinct names it found.
         """
-        super().visit(self.tree)
+        self.visit(self.tree)
         self.dependencies_found = self._prepare_dependencies()
+        self.source_code = None
+        self.tree = None
         return self
 
+    def visit(self, node):
+        """
+        Visits the node and all of its children, using an explicit stack
+        instead of recursion. Deeply nested code is traversed in bounded stack
+        space, without paying for a Python frame per node.
+
+        Handlers are dispatched using the precomputed dispatch table, instead
+        of looking up the `visit_` method by name for every node. Failures of
+        methods decorated with `safe_travels` are turned into warnings,
+        exactly like the decorator does.
+
+        When called by a handler during the traversal, the node is scheduled
+        to be visited right after the handler returns.
+        """
+        if self._scheduled is not None:
+            self._scheduled.append(node)
+        else:
+            self._traverse([node])
+
+    def generic_visit(self, node):
+        if self._scheduled is not None:
+            self._scheduled.extend(ast.iter_child_nodes(node))
+        else:
+            self._traverse(list(ast.iter_child_nodes(node)))
+
+    def _traverse(self, nodes):
+        # the nodes scheduled by the current handler, visited before its
+        # siblings, keeping the same order as a recursive traversal
+        scheduled = self._scheduled = []
+        stack = nodes[::-1]
+        dispatch_table = self._dispatch_table
+        try:
+            while stack:
+                node = stack.pop()
+                handler = dispatch_table.get(node.__class__)
+                if handler is None:
+                    scheduled.extend(ast.iter_child_nodes(node))
+                else:
+                    method, action, call_generic_visit = handler
+                    if action is None:
+                        if method:
+                            method(self, node)
+                    else:
+                        try:
+                            method(self, node)
+                        except Exception as e:
+                            _record_travel_failure(self, action, node, e)
+                        if call_generic_visit:
+                            scheduled.extend(ast.iter_child_nodes(node))
+                if scheduled:
+                    scheduled.reverse()
+                    stack.extend(scheduled)
+                    scheduled.clear()
+        finally:
+            self._scheduled = None
+
     def _prepare_dependencies(self):
         """
         These are the functions and objects which will be mocked.
@@ -119,12 +390,30 @@ class DependencyLister(ast.NodeVisitor):
                 Like: ('tests.sample.code.tested_module.random', 'randint')
         """
         dependencies = OrderedDict()  # no need to mock same object twice
-        for id_and_obj_path in self.potential_dependencies:
-            skip = id_and_obj_path[0] in self.ignored_variables
-            id_and_obj_path[0] = self.import_mappings.get(
-                id_and_obj_path[0],
-                self.outer_module_name + '.' + id_and_obj_path[0])
-            replaced_path = ".".join(id_and_obj_path)
+        resolved_roots = {}  # every root identifier is resolved once
+        attribute_types = None  # indexed only for calls on attributes of self
+        retyped = False
+        for candidate in self.potential_dependencies.values():
+            root = candidate[0]
+            if root in self.ignored_variables:
+                continue
+            resolved_root = resolved_roots.get(root)
+            if resolved_root is None:
+                resolved_root = resolved_roots[root] = \
+                    self.import_mappings.get(
+                        root, self.outer_module_name + '.' + root)
+            replaced_path = resolved_root + '.' + candidate[1] \
+                if len(candidate) > 1 else resolved_root
+
+            # `self.client.get` is patched on the class of the client
+            if root == self.self_variable and len(candidate) > 1:
+                attribute, _, rest = candidate[1].partition('.')
+                if rest:
+                    if attribute_types is None:
+                        attribute_types = method_attribute_types(self.mocked)
+                    if attribute in attribute_types:
+                        replaced_path = attribute_types[attribute] + '.' + rest
+                        retyped = True
             *obj_path, obj_name = replaced_path.rsplit('.', 1)
             obj_path = obj_path[0] if obj_path else None
             obj_qualified_name = (
@@ -132,16 +421,20 @@ class DependencyLister(ast.NodeVisitor):
                 obj_name,
             )
 
-            if not skip and obj_qualified_name not in dependencies:
+            if obj_qualified_name not in dependencies:
                 dependencies[obj_qualified_name] = replaced_path
 
+        if retyped:
+            # the class was a dependency as the root of the calls through self
+            self_path = resolved_roots[self.self_variable].rsplit('.', 1)
+            if tuple(self_path) in dependencies:
+                del dependencies[tuple(self_path)]
         return DependencyLister._filter_root_mocks(dependencies)
 
     @safe_travels("convert a function call into a mock")
     def visit_Call(self, node):
         try:
-            id_and_func_path = _stringify_node_path(node.func).split('.', 1)
-            self.potential_dependencies.append(id_and_func_path)
+            self._add_potential_dependency(_stringify_node_path(node.func))
         except CustomTypeError as complex_node_err:
             # handle cases like: pathlib.Path("input.txt").open("r")
             # we want to mock pathlib.Path and not 'open'
@@ -155,7 +448,7 @@ class DependencyLister(ast.NodeVisitor):
         if isinstance(node.ctx, ast.Store):
             self.ignored_variables.add(_stringify_node_path(node))
         elif isinstance(node.ctx, ast.Load):
-            self.potential_dependencies.append([_stringify_node_path(node)])
+            self._add_potential_dependency(node.id)
 
     @safe_travels("add internal import to known mappings")
     def visit_Import(self, node):
@@ -216,13 +509,18 @@ class DependencyLister(ast.NodeVisitor):
             if arg:
                 # support 'self', 'cls' by pointing it to the Class
                 if 0 == i and inspect.ismethod(self.mocked):
-                    self_var_name = arg.arg
+                    self_var_name = self.self_variable = arg.arg
                     class_name = self.mocked.__qualname__.split('.', 1)[0]
                     self.import_mappings[self_var_name] = \
                         self.outer_module_name + '.' + class_name
                 else:
                     self.ignored_variables.add(arg.arg)
 
+    def _add_potential_dependency(self, path):
+        if path not in self.potential_dependencies:
+            self.potential_dependencies[path] = tuple(
+                sys.intern(part) for part in path.split('.', 1))
+
     def _add_target_variables_to_ignored(self, node):
         inner_variables = DependencyLister._convert_to_list(node.target)
         for inner_variable in inner_variables.elts:
@@ -242,6 +540,11 @@ class DependencyLister(ast.NodeVisitor):
         """
         Avoid mocking the root of called deps, filter them from the list.
 
+        A path is a root if another path continues it with more dotted
+        segments, so `foo.bar` is the root of `foo.bar.baz` but not of
+        `foo.barbaz`. All the roots are collected in a single pass over the
+        segments of the paths, a flattened trie of the paths.
+
         Args:
             dependencies (list of tuple): the original dependencies,
                 without filtering
@@ -254,16 +557,26 @@ class DependencyLister(ast.NodeVisitor):
                 * For functions: path to function, function name.
                 Like: ('tests.sample.code.tested_module.random', 'randint')
         """
+        roots = set()
+        for path in dependencies.values():
+            end = path.rfind('.')
+            while end > 0:
+                root = path[:end]
+                if root in roots:
+                    break  # the shorter roots were added with it
+                roots.add(root)
+                end = path.rfind('.', 0, end)
+
         filtered_deps = OrderedDict()
-        replaced_paths = dependencies.values()
         for k, v in dependencies.items():
-            if not any(
-                    filter(lambda path: path.startswith(v) and path != v,
-                           replaced_paths)):
+            if v not in roots:
                 filtered_deps[k] = v
         return filtered_deps.keys()
 
 
+DependencyLister._dispatch_table = _build_dispatch_table(DependencyLister)
+
+
 def _can_stringify_node_path(node) -> bool:
     """
     Returns:
@@ -278,6 +591,9 @@ def _stringify_node_path(node):
 
     Can return something like: var_name.attr.inner_attr.
 
+    The path is built iteratively, so very long attribute chains don't hit the
+    recursion limit.
+
     Args:
         node (ast.Name, ast.Starred or ast.Attribute):
 
@@ -287,16 +603,17 @@ def _stringify_node_path(node):
     Raises:
         CustomTypeError: if there is a complex node which can't be stringified
     """
-    if isinstance(node, ast.Name):
-        stringify = node.id
-    elif isinstance(node, ast.Starred):
-        stringify = _stringify_node_path(node.value)
-    elif isinstance(node, ast.Attribute):
-        stringify = _stringify_node_path(node.value) + "." + node.attr
-    else:
-        raise CustomTypeError(f"Can't stringify node of type {type(node)}",
-                              node=node)
-    return stringify
+    parts = []
+    while not isinstance(node, ast.Name):
+        if isinstance(node, ast.Attribute):
+            parts.append(node.attr)
+        elif not isinstance(node, ast.Starred):
+            raise CustomTypeError(f"Can't stringify node of type {type(node)}",
+                                  node=node)
+        node = node.value
+    parts.append(node.id)
+    parts.reverse()
+    return ".".join(parts)
 
 
 class CustomTypeError(TypeError):
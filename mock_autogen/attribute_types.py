@@ -0,0 +1,250 @@
+import ast
+import inspect
+import sys
+import textwrap
+import threading
+import weakref
+from typing import Dict, Optional
+
+from mock_autogen.sources import module_cache
+from mock_autogen.utils import resolve_dotted_path
+
+# CPython marks the types which are allocated on the heap, the classes
+# defined in Python code, only those can have their attributes patched
+_HEAP_TYPE_FLAG = 1 << 9
+
+# the names `typing` is imported by, to unwrap `Optional[X]`
+_OPTIONAL_NAMES = {'Optional', 'typing.Optional'}
+_UNION_NAMES = {'Union', 'typing.Union'}
+
+# marks an assignment of `None`, which doesn't change the type
+_NONE = object()
+
+# keys are classes, values are the merged index of the class and its bases
+_index_cache = weakref.WeakKeyDictionary()
+_index_lock = threading.Lock()
+
+
+def instance_attribute_types(cls: type) -> Dict[str, str]:
+    """
+    Indexes the types of the instance attributes of a class, so the calls of
+    a method like `self.client.get()` can be patched on the class of the
+    client, instead of on a chain through the instance.
+
+    The type of an attribute is taken from:
+        * an annotation in the class body, like `client: Client`
+        * an annotated assignment in `__init__`, like `self.client: Client`
+        * an assignment of a constructor in `__init__`, like
+          `self.client = Client()`
+        * an assignment of an annotated parameter of `__init__`, like
+          `self.client = client` for `def __init__(self, client: Client)`
+
+    `Optional[X]` and `X | None` are unwrapped. An attribute which is assigned
+    a value of another or an unknown type, or whose type is not a class which
+    can be patched, is not indexed. The attributes of the bases are included,
+    a subclass overrides the types of its bases.
+
+    The index is computed once per class, the module files are parsed through
+    `mock_autogen.sources.module_cache`.
+
+    Args:
+        cls: the class of the instances
+
+    Returns:
+        the attribute names mapped to the dotted paths of their types, in the
+        module of the class which assigns them.
+    """
+    with _index_lock:
+        index = _index_cache.get(cls)
+    if index is not None:
+        return index
+
+    index = {}
+    for base in reversed(cls.__mro__[:-1]):
+        index.update(_index_class(base))
+
+    with _index_lock:
+        _index_cache[cls] = index
+    return index
+
+
+def method_attribute_types(mocked) -> Dict[str, str]:
+    """
+    Returns:
+        the index of the instance attributes of the instance a method is bound
+        to, or an empty index for functions, class methods and static methods.
+    """
+    owner = getattr(mocked, '__self__', None)
+    if not inspect.ismethod(mocked) or inspect.isclass(owner):
+        return {}
+    return instance_attribute_types(type(owner))
+
+
+def _index_class(cls):
+    node = _class_node(cls)
+    if node is None:
+        return {}
+
+    declared = {}  # annotations, they win over the assigned values
+    assigned = {}  # values are the dotted paths, or None if unknown
+    for statement in node.body:
+        if isinstance(statement, ast.AnnAssign) and \
+                isinstance(statement.target, ast.Name):
+            _add_type(declared, statement.target.id,
+                      _annotation_path(statement.annotation))
+        elif isinstance(statement, ast.FunctionDef) and \
+                statement.name == '__init__':
+            _index_init(statement, declared, assigned)
+
+    types = dict(assigned)
+    types.update(declared)
+    index = {}
+    for attribute, path in types.items():
+        path = _patchable_path(cls, path)
+        if path is not None:
+            index[attribute] = path
+    return index
+
+
+def _index_init(init, declared, assigned):
+    arguments = getattr(init.args, 'posonlyargs', []) + init.args.args
+    if not arguments:
+        return
+    self_name = arguments[0].arg
+    parameters = {
+        argument.arg: argument.annotation
+        for argument in arguments[1:] + init.args.kwonlyargs
+        if argument.annotation is not None
+    }
+
+    for statement in ast.walk(init):
+        if isinstance(statement, ast.AnnAssign):
+            attribute = _self_attribute(statement.target, self_name)
+            if attribute is not None:
+                _add_type(declared, attribute,
+                          _annotation_path(statement.annotation))
+        elif isinstance(statement, ast.Assign):
+            for target in statement.targets:
+                attribute = _self_attribute(target, self_name)
+                if attribute is not None:
+                    _add_type(assigned, attribute,
+                              _value_path(statement.value, parameters))
+
+
+def _add_type(types, attribute, path):
+    if path is _NONE:
+        return  # `None` is a placeholder, not a type
+    if attribute in types and types[attribute] != path:
+        path = None  # conflicting types
+    types[attribute] = path
+
+
+def _self_attribute(target, self_name):
+    if isinstance(target, ast.Attribute) and \
+            isinstance(target.value, ast.Name) and \
+            target.value.id == self_name:
+        return target.attr
+    return None
+
+
+def _value_path(value, parameters):
+    if _is_none(value):
+        return _NONE
+    if isinstance(value, ast.Call):
+        return _dotted_name(value.func)
+    if isinstance(value, ast.Name) and value.id in parameters:
+        return _annotation_path(parameters[value.id])
+    return None
+
+
+def _annotation_path(annotation):
+    """
+    Returns:
+        str: the dotted path of the annotated type, unwrapping string
+        annotations and optional types, or None if it isn't a single type.
+    """
+    text = _string_value(annotation)
+    if text is not None:
+        try:
+            annotation = ast.parse(text, mode='eval').body
+        except SyntaxError:
+            return None
+    if isinstance(annotation, ast.Subscript):
+        wrapper = _dotted_name(annotation.value)
+        inner = annotation.slice
+        inner = getattr(inner, 'value', inner)  # ast.Index before 3.9
+        if wrapper in _OPTIONAL_NAMES:
+            return _annotation_path(inner)
+        if wrapper in _UNION_NAMES and isinstance(inner, ast.Tuple):
+            return _single_type(inner.elts)
+        return None
+    if isinstance(annotation, ast.BinOp) and \
+            isinstance(annotation.op, ast.BitOr):
+        return _single_type([annotation.left, annotation.right])
+    return _dotted_name(annotation)
+
+
+def _single_type(options):
+    types = [option for option in options if not _is_none(option)]
+    return _annotation_path(types[0]) if len(types) == 1 else None
+
+
+def _dotted_name(node):
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return '.'.join(reversed(parts))
+
+
+def _string_value(node):
+    if isinstance(node, ast.Constant):
+        value = node.value
+    elif sys.version_info < (3, 8) and isinstance(node, ast.Str):
+        value = node.s  # strings are parsed as `ast.Str` before Python 3.8
+    else:
+        return None
+    return value if isinstance(value, str) else None
+
+
+def _is_none(node):
+    return type(node).__name__ in ('Constant', 'NameConstant') and \
+        node.value is None
+
+
+def _patchable_path(cls, path):
+    """
+    Returns:
+        str: the path of the type in the module of the class, or None if it
+        isn't a class whose attributes can be patched.
+    """
+    if path is None:
+        return None
+    path = cls.__module__ + '.' + path
+    try:
+        resolved = resolve_dotted_path(path)
+    except (ImportError, AttributeError):
+        return None
+    if not inspect.isclass(resolved) or resolved.__module__ == 'typing' or \
+            not resolved.__flags__ & _HEAP_TYPE_FLAG:
+        return None
+    return path
+
+
+def _class_node(cls) -> Optional[ast.ClassDef]:
+    module = sys.modules.get(cls.__module__)
+    filename = getattr(module, '__file__', None)
+    parsed = module_cache.parse(filename, vars(module)) if filename else None
+    if parsed is not None:
+        node = parsed.class_node(cls.__qualname__)
+        if node is not None:
+            return node
+    try:
+        tree = ast.parse(textwrap.dedent(inspect.getsource(cls)))
+    except (OSError, TypeError, SyntaxError):
+        return None
+    node = tree.body[0] if tree.body else None
+    return node if isinstance(node, ast.ClassDef) else None
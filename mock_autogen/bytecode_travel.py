@@ -0,0 +1,353 @@
+import dis
+import importlib.util
+import inspect
+import sys
+import types
+
+from mock_autogen.ast_tree_travel import DependencyLister
+
+# instructions which push the value of a name, and whether the name is global
+_NAME_LOADS = {
+    'LOAD_GLOBAL': True,
+    'LOAD_NAME': True,
+    'LOAD_FROM_DICT_OR_GLOBALS': True,
+    'LOAD_FAST': False,
+    'LOAD_FAST_CHECK': False,
+    'LOAD_FAST_BORROW': False,
+    'LOAD_DEREF': False,
+    'LOAD_CLASSDEREF': False,
+    'LOAD_FROM_DICT_OR_DEREF': False,
+}
+
+# instructions which push the values of two local names at once
+_DOUBLE_NAME_LOADS = {
+    'LOAD_FAST_LOAD_FAST', 'LOAD_FAST_BORROW_LOAD_FAST_BORROW'
+}
+
+_ATTRIBUTE_LOADS = {'LOAD_ATTR', 'LOAD_METHOD'}
+
+_NAME_STORES = {'STORE_FAST', 'STORE_NAME', 'STORE_GLOBAL', 'STORE_DEREF'}
+
+# instructions which may come between the parts of an import statement
+_IMPORT_STACK_OPS = {'ROT_TWO', 'SWAP', 'COPY', 'POP_TOP'}
+
+# number of items above the called object, for the call instructions which
+# don't have a method marker, before Python 3.11
+_CALL_ARGUMENTS = {
+    'CALL_FUNCTION': lambda arg: arg,
+    'CALL_FUNCTION_KW': lambda arg: arg + 1,
+    'CALL_FUNCTION_EX': lambda arg: 1 + (arg & 1),
+}
+
+_JUMPS = set(dis.hasjrel) | set(dis.hasjabs)
+
+
+class BytecodeDependencyLister(DependencyLister):
+    """
+    A `DependencyLister` which reads the code object of the mocked function
+    with `dis`, instead of parsing its source code. It works for code which
+    is deployed without sources, like `.pyc` only packages and zipapps, and
+    skips the source retrieval and the parsing.
+
+    Names are classified by the instruction which loads them: globals are
+    dependencies, while locals are dependencies only if they were imported
+    inside the function, or are the `self` of a method. Attribute chains are
+    dependencies if they are called. Nested code objects, like lambdas,
+    comprehensions and inner functions, are read at the point they are
+    defined. Decorators are not part of the code object, so unlike the ast
+    engine, they are not dependencies.
+
+    Args:
+        mocked: a callable method or function
+    """
+
+    def __init__(self, mocked):
+        super().__init__(mocked)
+        self.code = inspect.unwrap(getattr(mocked, '__func__',
+                                           mocked)).__code__
+        # the source position of the first load of every dependency, and of
+        # the last instruction which had one
+        self._positions = {}
+        self._position = (0, 0)
+
+    @staticmethod
+    def _parse(mocked):
+        return None, None  # the code object is all there is to read
+
+    def execute(self):
+        """
+        Goes through the code object and collects any dependencies to mock.
+        """
+        # support 'self', 'cls' by pointing it to the Class
+        if inspect.ismethod(self.mocked) and self.code.co_argcount:
+            class_name = self.mocked.__qualname__.split('.', 1)[0]
+            self.self_variable = self.code.co_varnames[0]
+            self.import_mappings[self.self_variable] = \
+                self.outer_module_name + '.' + class_name
+
+        segments = _code_segments(self.code)
+        # imports are mapped first, the code of nested functions is read
+        # before the statements which follow their definition
+        for instructions in segments:
+            self._map_imports(instructions)
+        for instructions in segments:
+            self._find_loads(instructions)
+        if sys.version_info >= (3, 12):
+            self._sort_by_position()
+
+        self.dependencies_found = self._prepare_dependencies()
+        self.code = None
+        return self
+
+    def _map_imports(self, instructions):
+        imported = None  # (module, the names imported from it)
+        imported_name = None  # the full name the next store binds
+        for index, instruction in enumerate(instructions):
+            opname = instruction.opname
+            if opname == 'IMPORT_NAME':
+                module = self._resolve_module(instructions, index)
+                if module is not None:
+                    fromlist = _constant_before(instructions, index, 1)
+                    imported = module, fromlist
+                    imported_name = None if fromlist else \
+                        module.split('.', 1)[0]
+            elif imported is None:
+                if opname in ('STORE_GLOBAL', 'STORE_NAME'):
+                    self.ignored_variables.add(instruction.argval)
+            elif opname == 'IMPORT_FROM':
+                module, fromlist = imported
+                # `import a.b as c` goes down the submodules of the package
+                imported_name = module + '.' + instruction.argval \
+                    if fromlist else module
+            elif opname in _NAME_STORES:
+                if imported_name is not None:
+                    self.import_mappings[instruction.argval] = imported_name
+                imported_name = None
+                if not imported[1]:
+                    imported = None
+            elif opname not in _IMPORT_STACK_OPS:
+                imported = imported_name = None
+
+    def _resolve_module(self, instructions, index):
+        module = instructions[index].argval
+        level = _constant_before(instructions, index, 2)
+        if not level:
+            return module
+        package = getattr(inspect.getmodule(self.mocked), '__package__', None)
+        try:
+            return importlib.util.resolve_name('.' * level + module, package)
+        except (ImportError, ValueError) as e:
+            self.warnings.append(f"# could not resolve relative import of: "
+                                 f"{'.' * level + module}\n#  {e}")
+            return None
+
+    def _find_loads(self, instructions):
+        closure = _closure_loads(instructions)
+        index = 0
+        while index < len(instructions):
+            instruction = instructions[index]
+            opname = instruction.opname
+            index += 1
+            if index - 1 in closure or _is_assertion_error_load(
+                    instructions, index - 1):
+                continue
+            position = _source_position(instruction) or self._position
+            self._position = position
+            if opname in _DOUBLE_NAME_LOADS:
+                # the first is a complete value, the second may have a chain
+                first, name = instruction.argval
+                if self._is_dependency(first, False):
+                    self._add_loaded_dependency(first, position)
+                is_global = False
+            elif opname in _NAME_LOADS:
+                is_global = _NAME_LOADS[opname]
+                name = instruction.argval
+            else:
+                continue
+
+            path = [name]
+            called = _pushes_null_before(instructions, index - 1)
+            while index < len(instructions) and \
+                    instructions[index].opname in _ATTRIBUTE_LOADS:
+                path.append(instructions[index].argval)
+                index += 1
+                if _is_method_load(instructions[index - 1]):
+                    called = True
+                    break
+            if len(path) > 1 and not called:
+                called = _is_called(instructions, index)
+
+            if self._is_dependency(name, is_global):
+                # same order as the ast traversal, the call comes first
+                if called and len(path) > 1:
+                    self._add_loaded_dependency('.'.join(path), position)
+                self._add_loaded_dependency(name, position)
+
+    def _add_loaded_dependency(self, path, position):
+        self._positions.setdefault(path, position)
+        self._add_potential_dependency(path)
+
+    def _sort_by_position(self):
+        """
+        Since Python 3.12 comprehensions are inlined, see PEP 709, so the
+        iterable is loaded before the code of the comprehension. Sorting by
+        the source position, stable, restores the order of the ast traversal.
+        """
+        self.potential_dependencies = dict(
+            sorted(self.potential_dependencies.items(),
+                   key=lambda item: self._positions[item[0]]))
+
+    def _is_dependency(self, name, is_global):
+        """
+        Returns:
+            bool: whether a loaded name is a potential dependency. Local names
+            are, only if they were imported or are the `self` of a method.
+            Names from the closure of the function are, except for the class
+            of `super()`.
+        """
+        if is_global or name in self.import_mappings:
+            return True
+        return name in self.code.co_freevars and name != '__class__'
+
+
+def _code_segments(code):
+    """
+    Splits the instructions of a code object and its nested code objects
+    into segments, in the order the ast traversal would visit them: the code
+    of a lambda, a comprehension or an inner function comes at the point it
+    is defined.
+
+    Uses an explicit stack, so deeply nested code doesn't hit the recursion
+    limit.
+
+    Returns:
+        list of list of dis.Instruction: the segments, a segment never spans
+        a nested code object
+    """
+    segments = []
+    stack = [list(dis.get_instructions(code))[::-1]]
+    while stack:
+        remaining = stack[-1]
+        segment = []
+        while remaining:
+            instruction = remaining.pop()
+            if isinstance(instruction.argval, types.CodeType):
+                stack.append(
+                    list(dis.get_instructions(instruction.argval))[::-1])
+                break
+            segment.append(instruction)
+        else:
+            stack.pop()
+        if segment:
+            segments.append(segment)
+    return segments
+
+
+def _closure_loads(instructions):
+    """
+    Returns:
+        set: the indexes of the loads which build the closure of the nested
+        function defined right after the instructions. These are the cells
+        themselves, not uses of the names, and since Python 3.13 they are
+        regular `LOAD_FAST` instructions.
+    """
+    if not instructions or instructions[-1].opname != 'BUILD_TUPLE':
+        return set()
+    end = len(instructions) - 1
+    start = max(end - instructions[-1].arg, 0)
+    return {
+        index
+        for index in range(start, end)
+        if instructions[index].opname in _NAME_LOADS
+        or instructions[index].opname == 'LOAD_CLOSURE'
+    }
+
+
+def _is_assertion_error_load(instructions, index):
+    """
+    Returns:
+        bool: whether the instruction at the index loads the `AssertionError`
+        of an assert statement, which before Python 3.9 is a global load
+        right after the check of the condition.
+    """
+    instruction = instructions[index]
+    return sys.version_info < (3, 9) and \
+        instruction.opname == 'LOAD_GLOBAL' and \
+        instruction.argval == 'AssertionError' and index > 0 and \
+        instructions[index - 1].opname == 'POP_JUMP_IF_TRUE'
+
+
+def _source_position(instruction):
+    """
+    Returns:
+        tuple: the line and the column of the instruction, or None if it has
+        none, like before Python 3.11.
+    """
+    positions = getattr(instruction, 'positions', None)
+    if positions is None or positions.lineno is None:
+        return None
+    return positions.lineno, positions.col_offset or 0
+
+
+def _constant_before(instructions, index, distance):
+    """
+    Returns:
+        the value of the constant loaded at the distance before the index, like
+        the level and the names of an import, or None if there isn't one.
+    """
+    index -= distance
+    if index < 0 or not instructions[index].opname.startswith('LOAD_'):
+        return None
+    return instructions[index].argval
+
+
+def _pushes_null_before(instructions, index):
+    """
+    Returns:
+        bool: whether the name loaded at the index is the start of a called
+        object, according to the NULL pushed before it. Since Python 3.11 the
+        NULL is pushed below the called object, Python 3.13 pushes it after.
+    """
+    instruction = instructions[index]
+    if sys.version_info < (3, 11):
+        return False
+    if instruction.opname == 'LOAD_GLOBAL' and instruction.arg & 1:
+        return True
+    if sys.version_info < (3, 13):
+        return index > 0 and instructions[index - 1].opname == 'PUSH_NULL'
+    return False
+
+
+def _is_method_load(instruction):
+    if instruction.opname == 'LOAD_METHOD':
+        return True
+    # since Python 3.12 LOAD_ATTR loads methods, marked by the lowest bit
+    return sys.version_info >= (3, 12) and bool(instruction.arg & 1)
+
+
+def _is_called(instructions, index):
+    """
+    Returns:
+        bool: whether the value at the top of the stack, before the
+        instruction at the index, is called.
+    """
+    if index < len(instructions) and \
+            instructions[index].opname == 'PUSH_NULL':
+        return sys.version_info >= (3, 13)
+    if sys.version_info >= (3, 11):
+        return False
+
+    # older versions have no marker, follow the stack until the value is used
+    above = 0  # the number of items pushed above the value
+    for instruction in instructions[index:]:
+        if instruction.opname in _CALL_ARGUMENTS:
+            if above == _CALL_ARGUMENTS[instruction.opname](instruction.arg):
+                return True
+        if instruction.opcode in _JUMPS:
+            return False
+        above += dis.stack_effect(
+            instruction.opcode, instruction.arg
+            if instruction.opcode >= dis.HAVE_ARGUMENT else None)
+        if above < 0:
+            return False
+    return False
@@ -0,0 +1,288 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import weakref
+from collections import namedtuple, OrderedDict
+
+from mock_autogen.utils import remove_quietly
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - windows
+    fcntl = None
+    import msvcrt
+
+CacheInfo = namedtuple('CacheInfo', 'hits, misses, maxsize, currsize')
+
+
+class FunctionCache:
+    """
+    A thread safe LRU cache whose entries belong to a function.
+
+    Every entry is keyed by the function and a hashable tuple of options. The
+    function is held by a weak reference: once it is garbage collected, for
+    example after its module was reloaded, its entries are released. An entry
+    is also ignored if the function's code object was replaced since it was
+    stored.
+
+    Bound methods are keyed by their underlying function, the caller should
+    add anything related to the bound object to the options.
+
+    Args:
+        maxsize: the maximal number of entries, the least recently used entry
+            is evicted when it is exceeded
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+        # keys are (id of function, options), values are
+        # (weak reference to the function, its code object, cached value)
+        self._entries = OrderedDict()
+
+        # keys are ids of functions, values are the keys of their entries
+        self._keys_by_function = {}
+
+        # re-entrant, the weak reference callbacks can run on any allocation
+        self._lock = threading.RLock()
+
+    def get(self, func, options: tuple = (), default=None):
+        """
+        Returns the cached value of the function and options, or `default` if
+        there is no valid entry for them.
+        """
+        func = _underlying_function(func)
+        key = (id(func), options)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0]() is not func or \
+                    entry[1] is not getattr(func, '__code__', None):
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, func, options: tuple, value):
+        """
+        Stores the value of the function and options, evicting the least
+        recently used entries if the cache is full.
+        """
+        func = _underlying_function(func)
+        func_id = id(func)
+        key = (func_id, options)
+        with self._lock:
+            self._remove(key)
+            reference = weakref.ref(func, self._release_function(func_id))
+            self._entries[key] = (reference, getattr(func, '__code__',
+                                                     None), value)
+            self._keys_by_function.setdefault(func_id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        """
+        Removes all the entries and resets the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_function.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Returns:
+            the hits, misses, maximal and current size of the cache, like
+            `functools.lru_cache` does.
+        """
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize,
+                             len(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        if self._entries.pop(key, None) is None:
+            return
+        keys = self._keys_by_function.get(key[0])
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_function[key[0]]
+
+    def _release_function(self, func_id):
+        # the callback must not keep the cache alive
+        cache_reference = weakref.ref(self)
+
+        def release(reference):
+            cache = cache_reference()
+            if cache is None:
+                return
+            with cache._lock:
+                for key in list(cache._keys_by_function.get(func_id, ())):
+                    # the id may already belong to a new function
+                    if cache._entries[key][0] is reference:
+                        cache._remove(key)
+
+        return release
+
+
+def _underlying_function(func):
+    return getattr(func, '__func__', func)
+
+
+class DiskCache:
+    """
+    A persistent, content addressed cache of JSON values, which can be shared
+    by parallel processes.
+
+    Every value is stored in its own file, named by the SHA-256 of its key
+    parts and the library version, so a new version never reads entries of an
+    older one. Reads refresh the modification time of the entry, which is
+    used to evict the least recently used entries once the total size of the
+    cache exceeds `max_size`. Writes and evictions are done under an
+    exclusive file lock, and a value is written to a temporary file before it
+    replaces the entry, so readers never see a partial entry.
+
+    Args:
+        directory: the cache directory, created if it does not exist
+        max_size: the maximal total size of the entries, in bytes
+        version: the version which is part of every key, defaults to the
+            library version
+    """
+
+    def __init__(self,
+                 directory: str,
+                 max_size: int = 64 * 1024 * 1024,
+                 version: str = None):
+        if version is None:
+            from mock_autogen import __version__ as version
+        self.directory = os.path.abspath(directory)
+        self.max_size = max_size
+        self.version = version
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = FileLock(os.path.join(self.directory, '.lock'))
+
+    def key(self, *parts) -> str:
+        """
+        Returns:
+            the hex digest which identifies the entry of the key parts, the
+            parts must be JSON serializable.
+        """
+        content = json.dumps([self.version, parts], sort_keys=True)
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def get(self, key: str, default=None):
+        """
+        Returns the value stored for the key, or `default` if there is no
+        such entry.
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as entry:
+                value = json.load(entry)
+            os.utime(path)
+        except (OSError, ValueError):  # missing, evicted or corrupted
+            return default
+        return value
+
+    def put(self, key: str, value):
+        """
+        Stores the JSON serializable value of the key, then evicts the least
+        recently used entries if the cache is too big.
+        """
+        with self._lock:
+            descriptor, temp_path = tempfile.mkstemp(dir=self.directory,
+                                                     suffix='.tmp')
+            try:
+                with os.fdopen(descriptor, 'w', encoding='utf-8') as entry:
+                    json.dump(value, entry)
+                os.replace(temp_path, self._path(key))
+            except BaseException:
+                os.remove(temp_path)
+                raise
+            self._evict()
+
+    def clear(self):
+        """
+        Removes all the entries.
+        """
+        with self._lock:
+            for entry in self._entries():
+                remove_quietly(entry.path)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def _entries(self):
+        with os.scandir(self.directory) as entries:
+            return [entry for entry in entries if entry.name.endswith('.json')]
+
+    def _evict(self):
+        entries = []
+        total_size = 0
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            remove_quietly(path)
+            total_size -= size
+
+
+class FileLock:
+    """
+    An exclusive lock, held by a single thread of a single process at a time.
+
+    Uses `fcntl.flock` on POSIX systems and `msvcrt.locking` on Windows.
+
+    Args:
+        path: the path of the lock file, created if it does not exist
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            self._file = open(self.path, 'a+b')
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:  # pragma: no cover - windows
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        except BaseException:
+            self._close()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:  # pragma: no cover - windows
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._close()
+
+    def _close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
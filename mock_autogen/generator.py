@@ -1,21 +1,43 @@
 import inspect
 import logging
 import re
+import sys
 import types
 import unittest.mock
-from collections import namedtuple, OrderedDict
 from enum import Enum
 
 import mock as python_mock
 
-from mock_autogen.ast_tree_travel import DependencyLister
+from mock_autogen.analysis import list_dependencies
+from mock_autogen.impact import record_generation
+from mock_autogen.matchers import Digest, matcher_for
+from mock_autogen.profiling import profile_dependencies, \
+    select_dependencies, format_cost
+from mock_autogen.runtime import discover_dependencies
 from mock_autogen.utils import copy_result_to_clipboard, print_result, \
     get_unique_item
 
 logger = logging.getLogger(__name__)
 
 MockingFramework = Enum('MockingFramework', 'PYTEST_MOCK')
-CallParameters = namedtuple('CallParameters', 'args, kwargs')
+
+# the default repr of objects, like `<module.Class object at 0x7f...>`, which
+# can't be part of the generated code
+_DEFAULT_REPR_MARKER = ' object at 0x'
+_DEFAULT_REPR = re.compile(r'\<.*? object at 0x[0-9A-Fa-f]+\>')
+_NON_NAME_CHARACTERS = re.compile('[^0-9a-zA-Z.]+')
+
+# the reprs of the parameters of these types are never cached, or are cached
+# without checking their size
+_SCALAR_TYPES = frozenset((int, float, complex, bool, type(None)))
+_IMMUTABLE_TYPES = frozenset((str, bytes))
+_MOCK_TYPES = (unittest.mock.NonCallableMock, python_mock.NonCallableMock)
+# the types whose reprs are at least as long as the values
+_LENGTH_BOUND_TYPES = frozenset(
+    (str, bytes, bytearray, list, tuple, dict, set, frozenset))
+
+# a suggested maximal length of a rendered argument of `generate_asserts`
+MAX_REPR_SIZE = 4096
 
 
 @copy_result_to_clipboard
@@ -31,7 +53,12 @@ def generate_mocks(framework,
                    mock_classes_static=False,
                    prepare_asserts_calls=True,
                    include_mock_autogen_import=True,
-                   mock_autogen_alias="mock_autogen"):
+                   mock_autogen_alias="mock_autogen",
+                   engine="ast",
+                   sample_call=None,
+                   profile_call=None,
+                   mock_slowest=None,
+                   min_cumulative_time=None):
     """
     Generates the list of mocks in order to mock the dependant modules and the
     functions of a given module, class or object instance.
@@ -74,6 +101,25 @@ def generate_mocks(framework,
         include_mock_autogen_import (bool): whether to include an import to mock_autogen
             in the generated code
         mock_autogen_alias (str): the alias for import / prefix for mock_autogen calls
+        engine (str): the engine which finds the dependencies of a function
+            or a method: 'ast', 'symtable' or 'bytecode', which doesn't need
+            the source code. Relevant only if `mocked` is a function or a
+            method
+        sample_call (callable): a callable without arguments which calls the
+            mocked function or method with sample arguments. If provided, the
+            dependencies are found by running it and recording the calls,
+            instead of analyzing the code. Relevant only if `mocked` is a
+            function or a method
+        profile_call (callable): a callable without arguments which calls the
+            mocked function or method with sample arguments. If provided, it
+            runs once under `cProfile`, the dependencies are ranked by the
+            cumulative time spent in them, and the measured cost is added as
+            a comment. Relevant only if `mocked` is a function or a method
+        mock_slowest (int): mock only this number of the most expensive
+            dependencies. Used only if `profile_call` is provided
+        min_cumulative_time (float): mock only dependencies which took at
+            least this number of seconds. Used only if `profile_call` is
+            provided
 
     Returns:
         str: the initial code to put in your test to mock the desired behaviour
@@ -132,15 +178,28 @@ def generate_mocks(framework,
                 ]))
     # mocking a function or a method
     elif inspect.isfunction(mocked) or inspect.ismethod(mocked):
-        deps_lister = DependencyLister(mocked).execute()
-        if deps_lister.warnings:
-            deps_lister.warnings.insert(0, "# warnings")
-            deps_lister.warnings[-1] = deps_lister.warnings[-1] + "\n"
-
-        return "\n".join(
-            deps_lister.warnings) + _pytest_mock_dependencies_generate(
-                deps_lister.dependencies_found, prepare_asserts_calls,
-                include_mock_autogen_import, mock_autogen_alias)
+        if sample_call is not None:
+            analysis = discover_dependencies(mocked, sample_call)
+        else:
+            analysis = list_dependencies(mocked, engine)
+        warnings = list(analysis.warnings)
+        if warnings:
+            warnings.insert(0, "# warnings")
+            warnings[-1] = warnings[-1] + "\n"
+
+        dependencies = analysis.dependencies
+        record_generation(mocked, dependencies)
+        comments = None
+        if profile_call is not None:
+            costs = select_dependencies(
+                profile_dependencies(dependencies, profile_call), mock_slowest,
+                min_cumulative_time)
+            dependencies = [cost.dependency for cost in costs]
+            comments = {cost.dependency: format_cost(cost) for cost in costs}
+
+        return "\n".join(warnings) + _pytest_mock_dependencies_generate(
+            dependencies, prepare_asserts_calls, include_mock_autogen_import,
+            mock_autogen_alias, comments)
     # we're mocking a regular instance
     else:
         name = name if name else _guess_var_name(name)
@@ -165,9 +224,11 @@ def generate_mocks(framework,
             "You are welcome to add code to support it :)".format(framework))
 
 
-def _pytest_mock_dependencies_generate(dependencies, prepare_asserts_calls,
+def _pytest_mock_dependencies_generate(dependencies,
+                                       prepare_asserts_calls,
                                        include_mock_autogen_import,
-                                       mock_autogen_alias):
+                                       mock_autogen_alias,
+                                       comments=None):
     generated_code = ""
     unique_dependencies = set()
     mock_names = []
@@ -183,6 +244,8 @@ def _pytest_mock_dependencies_generate(dependencies, prepare_asserts_calls,
                                                             obj_name,
                                                             obj_path)
             mock_names.append(generated_mock_name)
+            if comments:
+                generated_code += comments[(obj_path, obj_name)]
             generated_code += generated_mock_code
 
     if prepare_asserts_calls and mock_names:
@@ -297,7 +360,7 @@ def _single_call_to_generate_asserts(mock_name, mock_autogen_alias):
 
 @copy_result_to_clipboard
 @print_result
-def generate_asserts(mock, name=''):
+def generate_asserts(mock, name='', max_repr_size=None):
     """
     Generates the asserts matching to the call list of the sent mock.
 
@@ -309,6 +372,12 @@ def generate_asserts(mock, name=''):
         name (string): the name of the mock parameter, if not provided would be
             guessed to match the argument name sent to the method and defaulted
             to 'arg'
+        max_repr_size (int): the maximal length of the repr of an argument,
+            a longer argument is asserted by its length and digest instead,
+            see `mock_autogen.matchers.Digest` and `MAX_REPR_SIZE`. Unlimited
+            by default. The types with a registered renderer, like NumPy
+            arrays and pandas objects, are always rendered as matchers, see
+            `mock_autogen.matchers.register_renderer`
 
     Returns:
         str: the asserts matching to the call list of the sent mock
@@ -320,44 +389,70 @@ def generate_asserts(mock, name=''):
             f"Unsupported object: {type(mock)}. Please pass a mock which "
             f"has `call_args_list` and `mock_calls` attributes.")
 
-    generated_asserts = ""
-    if mock.call_args_list:
-        generated_asserts += "assert {0} == {1}.call_count\n".format(
-            len(mock.call_args_list), name)
-
-    call_dictionary = OrderedDict()
+    # a single pass over the calls, grouped by the normalized path of the
+    # called method, in the order of their first call. The calls themselves
+    # are kept, unpacked only once their group is rendered
+    groups = {}
+    normalized_methods = {}  # every distinct method path is normalized once
+    for call in mock.mock_calls:
+        method = call[0]
+        func_path = normalized_methods.get(method)
+        if func_path is None:
+            func_path = normalized_methods[method] = \
+                _normalize_method_path(method)
+        calls = groups.get(func_path)
+        if calls is None:
+            groups[func_path] = [call]
+        else:
+            calls.append(call)
 
-    for all_calls in mock.mock_calls:
-        method, args, kwargs = all_calls
-        method = method.replace("()", ".return_value")
-        if method and not method.startswith("."):
-            method = "." + method
-        if method not in call_dictionary:
-            call_dictionary[method] = []
-        call_dictionary[method].append(CallParameters(args, kwargs))
+    parts = []
+    if mock.call_args_list:
+        parts.append(f"assert {len(mock.call_args_list)} == "
+                     f"{name}.call_count\n")
 
+    # the same argument objects are often passed to many calls, they are
+    # rendered once per run
+    render = _ParamRenderer(max_repr_size)
     had_multiple_calls_for_single_method = False
-    for func_path, call_list in call_dictionary.items():
-        if 1 == len(call_list):
-            args, kwargs = call_list[0]
-            generated_asserts += "{0}.assert_called_once_with({1})\n".format(
-                name + func_path, _param_string(args, kwargs))
+    for func_path, calls in groups.items():
+        if 1 == len(calls):
+            _, args, kwargs = calls[0]
+            parts.append(f"{name}{func_path}.assert_called_once_with("
+                         f"{_param_string(args, kwargs, render)})\n")
         else:
             had_multiple_calls_for_single_method = True
-            generated_asserts += "{0}.assert_has_calls(calls=[".format(
-                name + func_path)
-            for call in call_list:
-                args, kwargs = call
-                generated_asserts += "call({0}),".format(
-                    _param_string(args, kwargs))
-            generated_asserts += "])\n"
+            parts.append(f"{name}{func_path}.assert_has_calls(calls=[")
+            parts.extend(f"call({_param_string(args, kwargs, render)}),"
+                         for _, args, kwargs in calls)
+            parts.append("])\n")
 
+    imports = []
     if had_multiple_calls_for_single_method:
-        generated_asserts = "from mock import call\n\n" + generated_asserts
+        imports.append("from mock import call\n")
+    matchers = {}
+    for module, matcher in sorted(render.imports):
+        matchers.setdefault(module, []).append(matcher)
+    imports.extend(f"from {module} import {', '.join(names)}\n"
+                   for module, names in matchers.items())
+    if imports:
+        parts[:0] = imports + ["\n"]
 
-    if not generated_asserts:
-        generated_asserts = "{0}.assert_not_called()".format(name)
-    return generated_asserts
+    if not parts:
+        return "{0}.assert_not_called()".format(name)
+    return "".join(parts)
+
+
+def _normalize_method_path(method):
+    """
+    Returns:
+        str: the path of a called method relative to the mock, like
+        '.return_value.get' for '().get', or '' for the mock itself.
+    """
+    method = method.replace("()", ".return_value")
+    if method and not method.startswith("."):
+        method = "." + method
+    return method
 
 
 def _guess_var_name(var):
@@ -380,16 +475,117 @@ def _guess_var_name(var):
     return 'arg'
 
 
-def _param_string(args, kwargs):
-    params = ""
-    if args:
-        params += ', '.join(['{!r}'.format(v) for v in args])
-    if kwargs:
-        if params:
-            params += ', '
-        params += ', '.join(
-            ['{}={!r}'.format(k, v) for k, v in sorted(kwargs.items())])
-    return re.sub(
-        r'(?P<default_repr>\<.*? object at 0x[0-9A-Fa-f]+\>)',
-        lambda default_repr: re.sub('[^0-9a-zA-Z.]+', '_', default_repr.group(
-        )), params)
+def _param_string(args, kwargs, render=None):
+    """
+    Args:
+        args (tuple): the positional arguments of a call
+        kwargs (dict): the keyword arguments of a call
+        render (callable): renders a single argument, `_param_repr` by
+            default
+
+    Returns:
+        str: the arguments, the way they are passed in the generated code.
+    """
+    render = render or _param_repr
+    params = [render(v) for v in args]
+    params.extend(f'{k}={render(v)}' for k, v in sorted(kwargs.items()))
+    return ', '.join(params)
+
+
+class _ParamRenderer:
+    """
+    Renders the arguments of the calls of a single `generate_asserts` run.
+
+    An argument is rendered once, even if it's passed to many calls. The
+    cache is keyed by the identity of the argument and keeps the argument
+    itself, so the identity can't be reused by another object while the cache
+    lives. The type and the size of the argument are checked as well, so a
+    container which changed since it was rendered is rendered again. The
+    reprs are interned, so the output shares their memory.
+
+    An argument whose type has a registered renderer, like a NumPy array, is
+    rendered as the matcher which the renderer returns, see
+    `mock_autogen.matchers.register_renderer`. Any other argument whose repr
+    is longer than `max_size` is rendered as a
+    `mock_autogen.matchers.Digest`. The classes of the rendered matchers are
+    collected in `imports`.
+
+    Args:
+        max_size (int): the maximal length of a rendered argument, unlimited
+            if None
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.imports = set()  # (module, name) of the rendered matchers
+        self._reprs = {}
+
+    def __call__(self, value):
+        """
+        Returns:
+            str: the code of the argument.
+        """
+        cls = type(value)
+        if cls in _SCALAR_TYPES:  # cheaper to render than to look up
+            return _param_repr(value)
+        size = None if cls in _IMMUTABLE_TYPES else _size(value)
+        cached = self._reprs.get(id(value))
+        if cached is not None and cached[0] is value and \
+                cached[1] is cls and cached[2] == size:
+            return cached[3]
+        text = sys.intern(self._render(value))
+        self._reprs[id(value)] = (value, cls, size, text)
+        return text
+
+    def _render(self, value):
+        matcher = matcher_for(value)
+        if matcher is not None:
+            return self._matcher(matcher)
+        if self.max_size is None:
+            return _param_repr(value)
+        # every item takes at least a character of the repr, so a long value
+        # has a long repr, which isn't built at all
+        if type(value) in _LENGTH_BOUND_TYPES and len(value) > self.max_size:
+            return self._matcher(Digest.of(value))
+        text = _param_repr(value)
+        if len(text) > self.max_size:
+            return self._matcher(Digest.of(value))
+        return text
+
+    def _matcher(self, matcher):
+        self.imports.add((type(matcher).__module__, type(matcher).__name__))
+        return repr(matcher)
+
+
+def _size(value):
+    # the calls to a mock are recorded, so its size is never asked for
+    if isinstance(value, _MOCK_TYPES) or \
+            not hasattr(type(value), '__len__'):
+        return None
+    try:
+        return len(value)
+    except Exception:
+        return None
+
+
+def _param_repr(value):
+    """
+    Returns:
+        str: the repr of a parameter, with the default reprs, like
+        `<module.Class object at 0x7f...>`, turned into valid python names,
+        so the generated asserts are at least valid code.
+    """
+    cls = type(value)
+    if cls.__repr__ is object.__repr__:
+        module = getattr(cls, '__module__', None)
+        if isinstance(module, str) and module != 'builtins':
+            # the repr object.__repr__ would return, without scanning it
+            return _NON_NAME_CHARACTERS.sub(
+                '_', f"<{module}.{cls.__qualname__} object at "
+                f"{hex(id(value))}>")
+    text = repr(value)
+    if _DEFAULT_REPR_MARKER not in text:
+        return text
+    return _DEFAULT_REPR.sub(
+        lambda default_repr: _NON_NAME_CHARACTERS.sub('_', default_repr.group(
+        )), text)
@@ -0,0 +1,171 @@
+import bisect
+import inspect
+import json
+import os
+import tempfile
+from typing import Callable, Iterable, List, Optional
+
+from mock_autogen.cache import FileLock
+from mock_autogen.utils import resolve_dotted_path
+
+# the path of the index which generation runs inside tests are recorded to
+IMPACT_INDEX_VARIABLE = 'MOCK_AUTOGEN_IMPACT_INDEX'
+
+
+class ImpactIndex:
+    """
+    A persistent reverse index from dependencies to the functions which use
+    them, and from the functions to the tests which generate their mocks.
+
+    It answers which tests are affected by a change: a test is affected by a
+    change of the module of the tested function, of a module which one of
+    its dependencies is defined in, or of a module along the path of a
+    dependency, like `package.module.requests` for
+    `package.module.requests.get`.
+
+    The index is a JSON file, updated under an exclusive file lock, so
+    parallel test workers can record to the same index.
+
+    Args:
+        path: the path of the index file, created on the first record
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+
+    def record(self, function: str, dependencies: Iterable[tuple], test: str):
+        """
+        Records that a test generates the mocks of a function.
+
+        Args:
+            function: the name of the function, like 'module:qualname'
+            dependencies: the dependencies of the function, as listed by
+                `mock_autogen.analysis.list_dependencies`
+            test: the node id of the test, like 'tests/test_a.py::test_b'
+        """
+        keys = {function.split(':', 1)[0]}
+        for dependency in dependencies:
+            path = '.'.join(filter(None, dependency))
+            keys.add(path)
+            keys.update(_modules_of(path))
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with FileLock(self.path + '.lock'):
+            index = self._read()
+            for key in keys:
+                functions = index['dependencies'].setdefault(key, [])
+                if function not in functions:
+                    functions.append(function)
+                    functions.sort()
+            tests = index['tests'].setdefault(function, [])
+            if test not in tests:
+                tests.append(test)
+                tests.sort()
+            self._write(index)
+
+    def affected_tests(self, changed_modules: Iterable[str]) -> List[str]:
+        """
+        Args:
+            changed_modules: the names of the changed modules, a package
+                includes all of its modules
+
+        Returns:
+            the node ids of the affected tests, sorted.
+        """
+        index = self._read()
+        keys = sorted(index['dependencies'])
+        functions = set()
+        for module in changed_modules:
+            start = bisect.bisect_left(keys, module)
+            for key in keys[start:]:
+                if not key.startswith(module):
+                    break
+                if len(key) == len(module) or key[len(module)] == '.':
+                    functions.update(index['dependencies'][key])
+        return sorted({
+            test
+            for function in functions
+            for test in index['tests'].get(function, ())
+        })
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='utf-8') as index_file:
+                return json.load(index_file)
+        except (OSError, ValueError):  # missing or corrupted
+            return {'dependencies': {}, 'tests': {}}
+
+    def _write(self, index):
+        descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(
+            self.path),
+                                                 suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as index_file:
+                json.dump(index, index_file, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+
+def record_generation(mocked: Callable, dependencies: Iterable[tuple]):
+    """
+    Records the generation of the mocks of a function to the index in the
+    `MOCK_AUTOGEN_IMPACT_INDEX` environment variable, with the test which is
+    currently running, by `PYTEST_CURRENT_TEST`. Does nothing if either is
+    not set.
+    """
+    path = os.environ.get(IMPACT_INDEX_VARIABLE)
+    test = _current_test()
+    if not path or not test:
+        return
+    function = inspect.getmodule(mocked).__name__ + ':' + \
+        mocked.__qualname__
+    ImpactIndex(path).record(function, dependencies, test)
+
+
+def affected_tests(changed_modules: Iterable[str],
+                   path: Optional[str] = None) -> List[str]:
+    """
+    Args:
+        changed_modules: the names of the changed modules, a package
+            includes all of its modules
+        path: the path of the index, defaults to the
+            `MOCK_AUTOGEN_IMPACT_INDEX` environment variable
+
+    Returns:
+        the node ids of the tests affected by the changes, sorted.
+    """
+    path = path or os.environ.get(IMPACT_INDEX_VARIABLE)
+    if not path:
+        raise ValueError(f"No impact index, set {IMPACT_INDEX_VARIABLE}")
+    return ImpactIndex(path).affected_tests(changed_modules)
+
+
+def _current_test():
+    # like 'tests/test_a.py::test_b (call)'
+    current = os.environ.get('PYTEST_CURRENT_TEST')
+    return current.rsplit(' ', 1)[0] if current else None
+
+
+def _modules_of(path):
+    """
+    Returns:
+        set: the names of the modules along a dotted path, and of the module
+        the object it points to is defined in. Like 'os' and 'posix' for
+        'package.module.os.remove'.
+    """
+    parts = path.split('.')
+    modules = set()
+    obj = None
+    for end in range(1, len(parts) + 1):
+        try:
+            obj = resolve_dotted_path('.'.join(parts[:end]))
+        except (ImportError, AttributeError):
+            return modules
+        if inspect.ismodule(obj):
+            modules.add(obj.__name__)
+    module = getattr(obj, '__module__', None)
+    if isinstance(module, str):
+        modules.add(module)
+    return modules
@@ -0,0 +1,257 @@
+import ast
+import hashlib
+import inspect
+import json
+import os
+import subprocess
+import tempfile
+import types
+from typing import Callable, Iterable, Iterator, List, Optional, Set, Tuple
+
+from mock_autogen.generator import generate_mocks, MockingFramework
+from mock_autogen.sources import module_cache
+from mock_autogen.utils import bare_instance, remove_quietly, \
+    source_fingerprint, suppress_output
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def iter_module_functions(
+        module: types.ModuleType) -> Iterator[Tuple[str, Callable]]:
+    """
+    Lists the functions and the methods which are defined in a module, the way
+    `generate_mocks` expects them: instance methods are bound, so their first
+    parameter is mapped to their class.
+
+    Args:
+        module: the module to list
+
+    Returns:
+        tuples of the qualified name and the function or method, sorted by
+        the qualified name.
+    """
+    functions = []
+    for name, value in vars(module).items():
+        if inspect.isfunction(value) and value.__module__ == module.__name__:
+            functions.append((value.__qualname__, value))
+        elif inspect.isclass(value) and value.__module__ == module.__name__ \
+                and value.__qualname__ == name:
+            functions.extend(_class_methods(value))
+    return iter(sorted(functions, key=lambda function: function[0]))
+
+
+def _class_methods(cls):
+    instance = bare_instance(cls)
+    for name, value in vars(cls).items():
+        if isinstance(value, staticmethod):
+            yield value.__func__.__qualname__, value.__func__
+        elif isinstance(value, classmethod):
+            yield value.__func__.__qualname__, getattr(cls, name)
+        elif inspect.isfunction(value):
+            yield value.__qualname__, types.MethodType(value, instance)
+
+
+def function_fingerprint(function: Callable, engine: str = 'ast') -> str:
+    """
+    Returns:
+        str: the hash of the normalized tree of the function, which doesn't
+        change with its formatting, comments or position in the file. The tree
+        of a method includes the annotations and the `__init__` of its class
+        and of its bases, which type its attributes. Without the source code,
+        the hash of the code object is used.
+    """
+    from mock_autogen import __version__
+    found = module_cache.function_node(function)
+    if found is None:
+        parts = [source_fingerprint(function)]
+    else:
+        parts = [ast.dump(found[1])]
+        owner = getattr(function, '__self__', None)
+        if owner is not None and not inspect.isclass(owner):
+            # the attribute types are merged from the bases, without `object`
+            for cls in type(owner).__mro__[:-1]:
+                parts.extend(_class_typing_dumps(cls))
+    content = json.dumps([__version__, engine, parts])
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def _class_typing_dumps(cls):
+    module = inspect.getmodule(cls)
+    parsed = module_cache.parse(
+        getattr(module, '__file__', None) or '', vars(module))
+    node = parsed.class_node(cls.__qualname__) if parsed else None
+    if node is None:
+        return []
+    return [
+        ast.dump(statement) for statement in node.body
+        if isinstance(statement, ast.AnnAssign) or (isinstance(
+            statement, ast.FunctionDef) and statement.name == '__init__')
+    ]
+
+
+def changed_files(base: str, directory: str = '.') -> Set[str]:
+    """
+    Args:
+        base: the git revision to compare the working tree to
+        directory: a directory inside the git repository
+
+    Returns:
+        the absolute paths of the files which changed since the revision.
+
+    Raises:
+        subprocess.CalledProcessError: if git fails, like for an unknown
+            revision
+    """
+    top_level = _git(directory, 'rev-parse', '--show-toplevel').strip()
+    names = _git(directory, 'diff', '--name-only', base, '--').splitlines()
+    return {
+        os.path.normcase(os.path.realpath(os.path.join(top_level, name)))
+        for name in names if name
+    }
+
+
+def _git(directory, *args):
+    return subprocess.run(('git', ) + args,
+                          cwd=directory,
+                          stdout=subprocess.PIPE,
+                          check=True,
+                          universal_newlines=True).stdout
+
+
+def regenerate(modules: Iterable[types.ModuleType],
+               output_directory: str,
+               base: Optional[str] = None,
+               engine: str = 'ast',
+               **generate_options) -> List[str]:
+    """
+    Generates the mocks of every function and method of the modules into an
+    artifact per function, and regenerates only the functions which changed
+    since the previous run.
+
+    A manifest in the output directory keeps the fingerprint of every
+    function, see `function_fingerprint`, and the hash of the options of the
+    run. A function is generated again only if its fingerprint changed or its
+    artifact is missing, and every function is if the engine or the options
+    changed. The options which can't be stored as JSON, like callables, are
+    compared by their names only. Functions which were removed have their
+    artifacts removed. The manifest and the artifacts are written only when
+    their content changes, and are deterministic, so unchanged results stay
+    byte identical.
+
+    Args:
+        modules: the modules to generate the mocks of
+        output_directory: the directory of the manifest and the artifacts
+        base: a git revision, if provided only the modules whose files
+            changed since it, or which were never generated, are checked.
+            The git repository is the one of the current directory
+        engine: the analysis engine, see
+            `mock_autogen.analysis.list_dependencies`
+        generate_options: more arguments to `generate_mocks`
+
+    Returns:
+        the names of the regenerated functions, as 'module:qualified name'.
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    manifest = _read_manifest(output_directory)
+    options = _options_hash(generate_options)
+    # the artifacts of other options are all stale
+    entries = manifest['functions'] if manifest.get('engine') == engine \
+        and manifest.get('options') == options else {}
+    changed = changed_files(base) if base else None
+
+    regenerated = []
+    for module in modules:
+        generated = {
+            key
+            for key, entry in entries.items()
+            if entry['module'] == module.__name__
+        }
+        if changed is not None and generated and \
+                _module_path(module) not in changed:
+            continue
+
+        for qualname, function in iter_module_functions(module):
+            key = module.__name__ + ':' + qualname
+            generated.discard(key)
+            fingerprint = function_fingerprint(function, engine)
+            artifact = module.__name__ + '.' + qualname + '.py'
+            entry = entries.get(key)
+            if entry and entry['fingerprint'] == fingerprint and \
+                    os.path.exists(os.path.join(output_directory, artifact)):
+                continue
+            with suppress_output():
+                code = generate_mocks(MockingFramework.PYTEST_MOCK,
+                                      function,
+                                      engine=engine,
+                                      **generate_options)
+            _write_if_changed(os.path.join(output_directory, artifact), code)
+            entries[key] = {
+                'module': module.__name__,
+                'artifact': artifact,
+                'fingerprint': fingerprint
+            }
+            regenerated.append(key)
+
+        for key in generated:  # removed since the previous run
+            remove_quietly(
+                os.path.join(output_directory,
+                             entries.pop(key)['artifact']))
+
+    _write_if_changed(
+        os.path.join(output_directory, MANIFEST_NAME),
+        json.dumps({
+            'engine': engine,
+            'options': options,
+            'functions': entries
+        },
+                   indent=2,
+                   sort_keys=True) + '\n')
+    return regenerated
+
+
+def _options_hash(generate_options):
+    # the values which aren't JSON, like the callables of `sample_call`, have
+    # a new repr in every run, only their names are hashed
+    values, names = {}, []
+    for name, value in generate_options.items():
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            names.append(name)
+        else:
+            values[name] = value
+    content = json.dumps([values, sorted(names)], sort_keys=True)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def _module_path(module):
+    return os.path.normcase(
+        os.path.realpath(getattr(module, '__file__', None) or ''))
+
+
+def _read_manifest(output_directory):
+    try:
+        with open(os.path.join(output_directory, MANIFEST_NAME),
+                  encoding='utf-8') as manifest:
+            return json.load(manifest)
+    except (OSError, ValueError):  # missing or corrupted
+        return {'functions': {}}
+
+
+def _write_if_changed(path, content):
+    try:
+        with open(path, encoding='utf-8', newline='') as existing:
+            if existing.read() == content:
+                return
+    except OSError:
+        pass
+    descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                             suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8',
+                       newline='') as output:
+            output.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
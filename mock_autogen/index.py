@@ -0,0 +1,274 @@
+import array
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import types
+from typing import Iterable, List, Mapping, Tuple
+
+from mock_autogen.analysis import list_dependencies
+from mock_autogen.incremental import iter_module_functions
+
+_MAGIC = b'MAIDX\x00\x00\x01'
+
+# magic, number of strings, functions, dependencies and postings
+_HEADER = struct.Struct('<8s4I')
+
+# every record is (string id, first posting, end of postings)
+_RECORD_SIZE = 3
+
+
+def export_index(modules: Iterable[types.ModuleType],
+                 path: str,
+                 engine: str = 'ast'):
+    """
+    Analyzes every function and method of the modules, see
+    `mock_autogen.incremental.iter_module_functions`, and writes their
+    dependencies to an index file, see `write_index`.
+
+    Args:
+        modules: the modules to analyze
+        path: the path of the index file
+        engine: the analysis engine, see
+            `mock_autogen.analysis.list_dependencies`
+    """
+    dependencies = {}
+    for module in modules:
+        for qualname, function in iter_module_functions(module):
+            dependencies[module.__name__ + ':' + qualname] = \
+                list_dependencies(function, engine).dependencies
+    write_index(path, dependencies)
+
+
+def write_index(path: str, dependencies: Mapping[str, Iterable[tuple]]):
+    """
+    Writes the dependencies of functions to a compact binary index file,
+    which can be queried with `DependencyIndex` without importing or
+    analyzing anything.
+
+    The file has a fixed header, then little endian 32 bit arrays: the
+    offsets of the strings, the function records, the dependency records and
+    the postings, and finally the UTF-8 strings. The strings are sorted, so
+    the records, which are sorted by their string, are searched in place.
+    The content depends only on the dependencies, so the same results always
+    produce the same file.
+
+    Args:
+        path: the path of the index file, replaced atomically
+        dependencies: the names of the functions, like 'module:qualname',
+            mapped to their dependencies, as listed by
+            `mock_autogen.analysis.list_dependencies`
+    """
+    by_function = {
+        function:
+        sorted({'.'.join(filter(None, dependency))
+                for dependency in found})
+        for function, found in dependencies.items()
+    }
+    by_dependency = {}
+    for function, found in by_function.items():
+        for dependency in found:
+            by_dependency.setdefault(dependency, []).append(function)
+
+    strings = sorted(set(by_function) | set(by_dependency),
+                     key=lambda string: string.encode('utf-8'))
+    string_ids = {string: index for index, string in enumerate(strings)}
+    encoded = [string.encode('utf-8') for string in strings]
+
+    offsets = array.array('I', [0])
+    for string in encoded:
+        offsets.append(offsets[-1] + len(string))
+    postings = array.array('I')
+    function_records = _records(by_function, string_ids, postings)
+    dependency_records = _records(by_dependency, string_ids, postings)
+
+    header = _HEADER.pack(_MAGIC, len(strings), len(by_function),
+                          len(by_dependency), len(postings))
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as index_file:
+            index_file.write(header)
+            for values in (offsets, function_records, dependency_records,
+                           postings):
+                if sys.byteorder != 'little':
+                    values.byteswap()
+                index_file.write(values.tobytes())
+            index_file.write(b''.join(encoded))
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _records(postings_by_string, string_ids, postings):
+    records = array.array('I')
+    for string in sorted(postings_by_string, key=string_ids.get):
+        records.extend((string_ids[string], len(postings)))
+        postings.extend(
+            sorted(string_ids[posting]
+                   for posting in postings_by_string[string]))
+        records.append(len(postings))
+    return records
+
+
+class DependencyIndex:
+    """
+    A read only view of an index file written by `write_index`.
+
+    The file is memory mapped, so opening it costs the same no matter its
+    size, and only the pages which a query touches are read. Lookups are
+    binary searches over the sorted records, in place.
+
+    Can be used as a context manager, which closes the file.
+
+    Args:
+        path: the path of the index file
+
+    Raises:
+        ValueError: if the file is not an index file
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as index_file:
+            size = os.fstat(index_file.fileno()).st_size
+            self._map = mmap.mmap(index_file.fileno(),
+                                  size,
+                                  access=mmap.ACCESS_READ) if size else b''
+        if len(self._map) < _HEADER.size or \
+                self._map[:len(_MAGIC)] != _MAGIC:
+            self.close()
+            raise ValueError(f"Not a dependency index file: {path}")
+        _, string_count, function_count, dependency_count, posting_count = \
+            _HEADER.unpack_from(self._map)
+
+        view = memoryview(self._map)
+        start = _HEADER.size
+        counts = [
+            string_count + 1, function_count * _RECORD_SIZE,
+            dependency_count * _RECORD_SIZE, posting_count
+        ]
+        arrays = []
+        for count in counts:
+            arrays.append(_uint32_array(view[start:start + 4 * count]))
+            start += 4 * count
+        self._offsets, self._functions, self._dependencies, \
+            self._postings = arrays
+        self._strings = view[start:]
+
+    def dependencies(self, function: str) -> List[Tuple[str, str]]:
+        """
+        Args:
+            function: the name of the function, like 'module:qualname'
+
+        Returns:
+            the dependencies of the function, as tuples of path to object and
+            object name, sorted by their dotted paths. Empty if the function
+            is not in the index.
+        """
+        record = self._find(self._functions, function.encode('utf-8'))
+        if record is None:
+            return []
+        return [
+            tuple(dependency.rsplit('.', 1))
+            for dependency in self._posted(self._functions, record)
+        ]
+
+    def functions(self, dependency_prefix: str) -> List[str]:
+        """
+        Args:
+            dependency_prefix: a dotted path, which matches the dependencies
+                which are it or start with its whole segments, like
+                'module.os' matches 'module.os.remove' but not
+                'module.osx'
+
+        Returns:
+            the names of the functions which depend on the matching
+            dependencies, sorted.
+        """
+        prefix = dependency_prefix.encode('utf-8')
+        records = self._dependencies
+        functions = set()
+        record = self._lower_bound(records, prefix)
+        while record < len(records) // _RECORD_SIZE:
+            string = self._string(records[record * _RECORD_SIZE])
+            if not string.startswith(prefix):
+                break
+            if len(string) == len(prefix) or string[len(prefix)] == ord('.'):
+                functions.update(self._posted(records, record))
+            record += 1
+        return sorted(functions)
+
+    def function_names(self) -> List[str]:
+        """
+        Returns:
+            the names of all the functions in the index, sorted.
+        """
+        return [
+            self._string(self._functions[record]).decode('utf-8')
+            for record in range(0, len(self._functions), _RECORD_SIZE)
+        ]
+
+    def __len__(self):
+        return len(self._functions) // _RECORD_SIZE
+
+    def __contains__(self, function):
+        return self._find(self._functions,
+                          function.encode('utf-8')) is not None
+
+    def close(self):
+        """
+        Releases the mapping of the file.
+        """
+        for name in ('_offsets', '_functions', '_dependencies', '_postings',
+                     '_strings'):
+            value = self.__dict__.pop(name, None)
+            if isinstance(value, memoryview):
+                value.release()
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _string(self, string_id):
+        return bytes(
+            self._strings[self._offsets[string_id]:self._offsets[string_id +
+                                                                 1]])
+
+    def _posted(self, records, record):
+        start = records[record * _RECORD_SIZE + 1]
+        end = records[record * _RECORD_SIZE + 2]
+        return [
+            self._string(string_id).decode('utf-8')
+            for string_id in self._postings[start:end]
+        ]
+
+    def _lower_bound(self, records, key):
+        low, high = 0, len(records) // _RECORD_SIZE
+        while low < high:
+            middle = (low + high) // 2
+            if self._string(records[middle * _RECORD_SIZE]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _find(self, records, key):
+        record = self._lower_bound(records, key)
+        if record < len(records) // _RECORD_SIZE and \
+                self._string(records[record * _RECORD_SIZE]) == key:
+            return record
+        return None
+
+
+def _uint32_array(view):
+    if sys.byteorder == 'little':
+        return view.cast('I')
+    values = array.array('I', bytes(view))  # pragma: no cover - big endian
+    values.byteswap()  # pragma: no cover - big endian
+    return values  # pragma: no cover - big endian
@@ -0,0 +1,342 @@
+import hashlib
+import re
+import struct
+import sys
+import threading
+import weakref
+from typing import Callable, Optional
+
+_LENGTH = struct.Struct('<Q')
+
+
+class Digest:
+    """
+    Matches the values whose type has the same name, whose length is the
+    same, and whose canonical bytes have the same SHA-256 digest, see
+    `canonical_bytes`.
+
+    `generate_asserts` renders an argument as a digest instead of its repr
+    once the repr is too large, so the generated asserts stay small and
+    still verify the exact value.
+
+    Args:
+        type_name: the name of the type of the matched values, like 'bytes'
+        length: the length of the matched values, None for values without a
+            length
+        sha256: the hex digest of the canonical bytes of the matched values
+    """
+
+    def __init__(self, type_name: str, length, sha256: str):
+        self.type_name = type_name
+        self.length = length
+        self.sha256 = sha256
+
+    @classmethod
+    def of(cls, value) -> 'Digest':
+        """
+        Returns:
+            Digest: the digest which matches the value.
+        """
+        return cls(
+            type(value).__name__, _length(value),
+            hashlib.sha256(canonical_bytes(value)).hexdigest())
+
+    def __eq__(self, other):
+        if isinstance(other, Digest):
+            return (self.type_name, self.length, self.sha256) == \
+                (other.type_name, other.length, other.sha256)
+        if type(other).__name__ != self.type_name or \
+                _length(other) != self.length:
+            return False  # without hashing the value
+        return hashlib.sha256(
+            canonical_bytes(other)).hexdigest() == self.sha256
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.type_name, self.length, self.sha256))
+
+    def __repr__(self):
+        return f"Digest({self.type_name!r}, {self.length!r}, " \
+               f"{self.sha256!r})"
+
+
+class ArrayDigest:
+    """
+    Matches the NumPy arrays of the same shape and dtype, whose data has the
+    same SHA-256 digest. The data is hashed as a whole, never compared
+    element by element, and an array on either side of `==` defers to the
+    matcher instead of comparing element wise.
+
+    Args:
+        shape: the shape of the matched arrays
+        dtype: the dtype of the matched arrays, as its `str`, like '<f8'
+        sha256: the hex digest of the data of the matched arrays
+    """
+
+    __array_ufunc__ = None  # arrays return NotImplemented for `array == self`
+    __pandas_priority__ = 5000  # so do pandas objects, since pandas 2.1
+
+    def __init__(self, shape: tuple, dtype: str, sha256: str):
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.sha256 = sha256
+
+    @classmethod
+    def of(cls, array) -> 'ArrayDigest':
+        """
+        Returns:
+            ArrayDigest: the digest which matches the array.
+        """
+        return cls(array.shape, array.dtype.str, _array_sha256(array))
+
+    def __eq__(self, other):
+        if isinstance(other, ArrayDigest):
+            return (self.shape, self.dtype, self.sha256) == \
+                (other.shape, other.dtype, other.sha256)
+        if not _is_instance(other, 'numpy', 'ndarray') or \
+                other.shape != self.shape or other.dtype.str != self.dtype:
+            return False
+        return _array_sha256(other) == self.sha256
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.shape, self.dtype, self.sha256))
+
+    def __repr__(self):
+        return f"ArrayDigest({self.shape!r}, {self.dtype!r}, " \
+               f"{self.sha256!r})"
+
+
+class FrameDigest:
+    """
+    Matches the pandas DataFrames or Series of the same shape, whose columns,
+    dtypes, index and values have the same SHA-256 digest. The rows are
+    hashed with `pandas.util.hash_pandas_object`, vectorized, and a
+    pandas object on either side of `==` defers to the matcher, since pandas
+    2.1. Before pandas 2.1 the objects compare element wise with anything,
+    so `generate_asserts` renders them by their repr instead.
+
+    Args:
+        type_name: 'DataFrame' or 'Series'
+        shape: the shape of the matched objects
+        sha256: the hex digest of the matched objects
+    """
+
+    __array_ufunc__ = None
+    __pandas_priority__ = 5000  # higher than of any pandas object
+
+    def __init__(self, type_name: str, shape: tuple, sha256: str):
+        self.type_name = type_name
+        self.shape = tuple(shape)
+        self.sha256 = sha256
+
+    @classmethod
+    def of(cls, frame) -> 'FrameDigest':
+        """
+        Returns:
+            FrameDigest: the digest which matches the DataFrame or Series.
+        """
+        return cls(_frame_type_name(frame), frame.shape, _frame_sha256(frame))
+
+    def __eq__(self, other):
+        if isinstance(other, FrameDigest):
+            return (self.type_name, self.shape, self.sha256) == \
+                (other.type_name, other.shape, other.sha256)
+        if _frame_type_name(other) != self.type_name or \
+                other.shape != self.shape:
+            return False
+        return _frame_sha256(other) == self.sha256
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.type_name, self.shape, self.sha256))
+
+    def __repr__(self):
+        return f"FrameDigest({self.type_name!r}, {self.shape!r}, " \
+               f"{self.sha256!r})"
+
+
+def _array_sha256(array):
+    if array.dtype.hasobject:  # the data is made of pointers
+        data = canonical_bytes(array.tolist())
+    else:
+        import numpy
+        data = numpy.ascontiguousarray(array).tobytes()
+    return hashlib.sha256(data).hexdigest()
+
+
+def _frame_matcher(frame):
+    import pandas
+    version = tuple(
+        int(part) for part in re.findall(r'\d+', pandas.__version__)[:2])
+    return FrameDigest.of(frame) if version >= (2, 1) else None
+
+
+def _frame_type_name(value):
+    # the module of the classes changed in pandas 3, and the value can't be
+    # a pandas object unless pandas was imported
+    pandas = sys.modules.get('pandas')
+    if pandas is None:
+        return None
+    if isinstance(value, getattr(pandas, 'DataFrame', ())):
+        return 'DataFrame'
+    if isinstance(value, getattr(pandas, 'Series', ())):
+        return 'Series'
+    return None
+
+
+def _frame_sha256(frame):
+    from pandas.util import hash_pandas_object
+    if _frame_type_name(frame) == 'DataFrame':
+        columns, dtypes = list(frame.columns), list(frame.dtypes)
+    else:
+        columns, dtypes = [frame.name], [frame.dtype]
+    digest = hashlib.sha256(
+        canonical_bytes([
+            columns, [str(dtype) for dtype in dtypes],
+            list(frame.index.names)
+        ]))
+    try:
+        digest.update(
+            hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    except TypeError:  # unhashable values, like lists
+        digest.update(
+            canonical_bytes([list(frame.index),
+                             frame.to_numpy().tolist()]))
+    return digest.hexdigest()
+
+
+# keys are (module, qualified name) of types, values return their matchers
+_renderers = {
+    ('numpy', 'ndarray'): ArrayDigest.of,
+    ('pandas.core.frame', 'DataFrame'): _frame_matcher,
+    ('pandas.core.series', 'Series'): _frame_matcher,
+    ('pandas', 'DataFrame'): _frame_matcher,  # since pandas 3
+    ('pandas', 'Series'): _frame_matcher,
+}
+_renderers_lock = threading.Lock()
+# keys are types, values are the renderers found by their MRO
+_found_renderers = weakref.WeakKeyDictionary()
+
+
+def register_renderer(module: str, qualname: str, renderer: Callable):
+    """
+    Renders the arguments of a type, and of its subclasses, as a matcher in
+    the asserts generated by `generate_asserts`, instead of their repr.
+
+    The type is named instead of imported, so registering a renderer never
+    imports its library, and the renderer is only used once an argument of
+    the type shows up. The NumPy arrays and the pandas DataFrames and Series
+    are registered by default.
+
+    Args:
+        module: the module of the type, as in its `__module__`
+        qualname: the qualified name of the type
+        renderer: returns the matcher of an argument, whose repr is the code
+            which creates it, or None to render the argument by its repr. The
+            class of the matcher is imported from its module by the generated
+            code
+    """
+    with _renderers_lock:
+        _renderers[(module, qualname)] = renderer
+        _found_renderers.clear()
+
+
+def matcher_for(value) -> Optional[object]:
+    """
+    Returns:
+        the matcher which the registered renderer of the type of the value
+        returns, see `register_renderer`, or None if there is none.
+    """
+    cls = type(value)
+    try:
+        renderer = _found_renderers[cls]
+    except KeyError:
+        with _renderers_lock:
+            renderer = None
+            for base in cls.__mro__:
+                renderer = _renderers.get(
+                    (getattr(base, '__module__',
+                             None), getattr(base, '__qualname__', None)))
+                if renderer is not None:
+                    break
+            _found_renderers[cls] = renderer
+    return None if renderer is None else renderer(value)
+
+
+def _is_instance(value, module, qualname):
+    return any(
+        getattr(base, '__module__', None) == module
+        and getattr(base, '__qualname__', None) == qualname
+        for base in type(value).__mro__)
+
+
+def canonical_bytes(value) -> bytes:
+    """
+    Encodes a value to bytes which are the same for equal values of the same
+    types, no matter the process or the platform.
+
+    Strings are encoded as UTF-8 and bytes like objects are taken as they
+    are. Lists, tuples, dicts and sets are encoded item by item, the items of
+    dicts and sets sorted by their encoding, so their order doesn't matter.
+    Any other value is encoded by its repr. Every part is tagged with its
+    kind and prefixed with its length, so different values never share an
+    encoding.
+
+    Returns:
+        bytes: the canonical encoding of the value.
+    """
+    parts = []
+    _encode(value, parts, set())
+    return b''.join(parts)
+
+
+def _encode(value, parts, ancestors):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        _append(parts, b'b', bytes(value))
+    elif isinstance(value, str):
+        _append(parts, b's', value.encode('utf-8', 'surrogatepass'))
+    elif isinstance(value, (list, tuple, dict, set, frozenset)):
+        if id(value) in ancestors:  # a container which contains itself
+            _append(parts, b'c', b'')
+            return
+        ancestors.add(id(value))
+        if isinstance(value, dict):
+            items = sorted(
+                canonical_bytes(key) + _encoded(item, ancestors)
+                for key, item in value.items())
+            _append(parts, b'd', b''.join(items))
+        elif isinstance(value, (set, frozenset)):
+            items = sorted(_encoded(item, ancestors) for item in value)
+            _append(parts, b'e', b''.join(items))
+        else:
+            _append(parts, b'l' if isinstance(value, list) else b't',
+                    b''.join(_encoded(item, ancestors) for item in value))
+        ancestors.remove(id(value))
+    else:
+        _append(parts, b'r', repr(value).encode('utf-8', 'surrogatepass'))
+
+
+def _encoded(value, ancestors):
+    parts = []
+    _encode(value, parts, ancestors)
+    return b''.join(parts)
+
+
+def _append(parts, tag, data):
+    parts.append(tag)
+    parts.append(_LENGTH.pack(len(data)))
+    parts.append(data)
+
+
+def _length(value):
+    try:
+        return len(value)
+    except Exception:
+        return None
@@ -0,0 +1,130 @@
+import builtins
+import cProfile
+import inspect
+from collections import namedtuple
+from typing import Callable, Iterable, List, Optional
+
+from mock_autogen.utils import resolve_dotted_path
+
+DependencyCost = namedtuple('DependencyCost',
+                            'dependency, cumulative_time, calls')
+DependencyCost.__doc__ = """
+The measured cost of a dependency, during a profiled call:
+    * dependency: tuple of path to object and object name.
+    Like: ('tests.sample.code.tested_module.random', 'randint')
+    * cumulative_time: the seconds spent in the dependency, including its
+    own calls, or None if it couldn't be measured
+    * calls: the number of times it was called
+"""
+
+
+def profile_dependencies(dependencies: Iterable[tuple],
+                         profile_call: Callable) -> List[DependencyCost]:
+    """
+    Runs the code under test once under `cProfile`, and ranks its
+    dependencies by the cumulative time spent in them.
+
+    Note that the profiled call runs the real code, including its side
+    effects.
+
+    Args:
+        dependencies: tuples of path to object and object name, as listed by
+            `mock_autogen.analysis.list_dependencies`
+        profile_call: a callable without arguments, which calls the code
+            under test with sample arguments
+
+    Returns:
+        the cost of every dependency, the most expensive first. Dependencies
+        which can't be measured, like classes implemented in C, come last.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        profile_call()
+    finally:
+        profiler.disable()
+
+    # keys are code objects of python functions or the labels of builtins
+    entries = {entry.code: entry for entry in profiler.getstats()}
+
+    costs = []
+    for dependency in dependencies:
+        key = _profile_key('.'.join(filter(None, dependency)))
+        if key is None:
+            costs.append(DependencyCost(dependency, None, 0))
+        elif key in entries:
+            costs.append(
+                DependencyCost(dependency, entries[key].totaltime,
+                               entries[key].callcount))
+        else:
+            costs.append(DependencyCost(dependency, 0.0, 0))  # not called
+    costs.sort(key=lambda cost: -1
+               if cost.cumulative_time is None else cost.cumulative_time,
+               reverse=True)
+    return costs
+
+
+def select_dependencies(
+        costs: List[DependencyCost],
+        slowest: Optional[int] = None,
+        min_cumulative_time: Optional[float] = None) -> List[DependencyCost]:
+    """
+    Args:
+        costs: the ranked costs, as returned by `profile_dependencies`
+        slowest: keep only this number of the most expensive dependencies
+        min_cumulative_time: keep only dependencies which took at least this
+            number of seconds
+
+    Returns:
+        the costs of the dependencies worth mocking, the most expensive first.
+    """
+    if min_cumulative_time is not None:
+        costs = [
+            cost for cost in costs if cost.cumulative_time is not None
+            and cost.cumulative_time >= min_cumulative_time
+        ]
+    if slowest is not None:
+        costs = costs[:slowest]
+    return costs
+
+
+def format_cost(cost: DependencyCost) -> str:
+    """
+    Returns:
+        str: the cost as a comment line for the generated code.
+    """
+    if cost.cumulative_time is None:
+        return "# cumulative time: not measured\n"
+    return f"# cumulative time: {cost.cumulative_time * 1000:.3f}ms, " \
+           f"calls: {cost.calls}\n"
+
+
+def _profile_key(path):
+    """
+    Returns:
+        the key of the object in the stats of `cProfile`: the code object of
+        a python function, the label of a builtin, or None if the object
+        can't be found or measured.
+    """
+    try:
+        obj = resolve_dotted_path(path)
+    except ImportError:
+        return None
+    except AttributeError:
+        # builtins are listed as names of the module which uses them
+        obj = getattr(builtins, path.rsplit('.', 1)[-1], None)
+    if inspect.isclass(obj):
+        obj = vars(obj).get('__init__')  # what runs when it's instantiated
+    obj = getattr(obj, '__func__', obj)
+    if inspect.isfunction(obj):
+        return obj.__code__
+    if inspect.isbuiltin(obj):
+        module = getattr(obj, '__module__', None)
+        if module:
+            return f"<built-in method {module}.{obj.__name__}>"
+        self_type = type(obj.__self__).__name__
+        return f"<method '{obj.__name__}' of '{self_type}' objects>"
+    if inspect.ismethoddescriptor(obj) and hasattr(obj, '__objclass__'):
+        return f"<method '{obj.__name__}' of " \
+               f"'{obj.__objclass__.__name__}' objects>"
+    return None
@@ -0,0 +1,274 @@
+import builtins
+import inspect
+import sys
+import types
+from collections import OrderedDict
+from typing import Callable
+
+from mock_autogen.analysis import AnalysisResult
+from mock_autogen.ast_tree_travel import DependencyLister
+from mock_autogen.bytecode_travel import BytecodeDependencyLister
+
+# the sys.monitoring tools to try, the profiler id first since this is one
+_MONITORING_TOOL_IDS = (2, 3, 4)
+_MONITORING_TOOL_NAME = 'mock_autogen'
+
+# how deep to index the modules referenced by the mocked module, like
+# `os.path.join` for a module which imports `os`
+_MODULE_DEPTH = 2
+
+
+def discover_dependencies(mocked: Callable,
+                          sample_call: Callable) -> AnalysisResult:
+    """
+    Lists the external dependencies which a function or a method actually
+    calls, by running it.
+
+    Unlike the static analysis, this finds functions reached through
+    `getattr`, dispatch dictionaries and injected callables, and skips code in
+    branches which are not taken by the sample call.
+
+    The calls are recorded with `sys.monitoring` on Python 3.13+, only for
+    the code of the mocked function, so everything else runs at full speed.
+    Older versions use `sys.setprofile`, since on Python 3.12
+    `sys.monitoring` misses calls like `f(*args)`. Only the calls made
+    directly by the mocked function are recorded, and only for objects which
+    can be reached from its module, so they can be patched.
+
+    Note that the sample call runs the real code, including its side effects.
+    Also note that a function which is called through a container, like a
+    dispatch dictionary, is reported by the path it can be reached by, while
+    the container holds a reference to the original function. Patching the
+    container itself may be needed. `sys.setprofile` doesn't report creating
+    instances of classes implemented in C, like `str`.
+
+    Args:
+        mocked: a callable method or function
+        sample_call: a callable without arguments, which calls the mocked
+            function with sample arguments. Like
+            `lambda: function_under_test(1, "a")`
+
+    Returns:
+        the dependencies called during the sample call, in the order of their
+        first call, and warnings if the sample call failed
+    """
+    function = inspect.unwrap(getattr(mocked, '__func__', mocked))
+    module = inspect.getmodule(mocked)
+    index = _IdentityIndex(module.__name__, vars(module))
+    codes = _code_objects(function.__code__)
+    used_names = frozenset(name for code in codes
+                           for name in code.co_names + code.co_varnames)
+
+    callees = OrderedDict()  # every callee is kept once, in order of calls
+    warnings = []
+    try:
+        _record_calls(codes, sample_call, callees)
+    except Exception as e:
+        warnings.append(f"# the sample call raised: {type(e).__name__}: {e}")
+
+    # the modules imported inside the function are loaded by now
+    for imported in BytecodeDependencyLister(
+            mocked).execute().import_mappings.values():
+        if imported in sys.modules:
+            index.add_module(sys.modules[imported], imported)
+        else:
+            path, _, name = imported.rpartition('.')
+            if path in sys.modules:
+                index.add(getattr(sys.modules[path], name, None), path, name)
+
+    dependencies = OrderedDict()
+    for callee in callees.values():
+        qualified_name = index.lookup(callee, used_names)
+        if qualified_name is not None and qualified_name not in dependencies:
+            dependencies[qualified_name] = '.'.join(qualified_name)
+    return AnalysisResult(
+        tuple(DependencyLister._filter_root_mocks(dependencies)),
+        tuple(warnings))
+
+
+def _record_monitored(codes, sample_call, callees):
+    monitoring = sys.monitoring
+    for tool_id in _MONITORING_TOOL_IDS:
+        try:
+            monitoring.use_tool_id(tool_id, _MONITORING_TOOL_NAME)
+            break
+        except ValueError:
+            continue  # used by a debugger, a profiler or a coverage tool
+    else:
+        return _record_profiled(codes, sample_call, callees)
+
+    def on_call(code, instruction_offset, callable_object, arg0):
+        callees.setdefault(id(callable_object), callable_object)
+
+    try:
+        monitoring.register_callback(tool_id, monitoring.events.CALL, on_call)
+        # only the code of the mocked function generates events
+        for code in codes:
+            monitoring.set_local_events(tool_id, code, monitoring.events.CALL)
+        sample_call()
+    finally:
+        for code in codes:
+            monitoring.set_local_events(tool_id, code, 0)
+        monitoring.register_callback(tool_id, monitoring.events.CALL, None)
+        monitoring.free_tool_id(tool_id)
+
+
+def _record_profiled(codes, sample_call, callees):
+
+    def on_event(frame, event, arg):
+        if event == 'c_call':
+            # the frame is of the caller, the argument is the called function
+            if frame.f_code in codes:
+                callees.setdefault(id(arg), arg)
+        elif event == 'call':
+            # the frame is of the called function
+            caller = frame.f_back
+            if caller is not None and caller.f_code in codes:
+                callees.setdefault(id(frame.f_code), frame.f_code)
+
+    previous = sys.getprofile()
+    sys.setprofile(on_event)
+    try:
+        sample_call()
+    finally:
+        sys.setprofile(previous)
+
+
+# on Python 3.12 sys.monitoring doesn't report the calls made with
+# CALL_FUNCTION_EX, like `f(*args)` and `f(**kwargs)`
+_record_calls = _record_monitored if sys.version_info >= (3, 13) else \
+    _record_profiled
+
+
+def _code_objects(code):
+    """
+    Returns:
+        set: the code object and all of its nested code objects, of lambdas,
+        comprehensions and inner functions.
+    """
+    codes = set()
+    stack = [code]
+    while stack:
+        code = stack.pop()
+        codes.add(code)
+        stack.extend(constant for constant in code.co_consts
+                     if isinstance(constant, types.CodeType))
+    return codes
+
+
+class _IdentityIndex:
+    """
+    Maps the objects which can be reached from a module to the paths they are
+    reached by, by their identity. Functions are also mapped by their code
+    objects, which is what `sys.setprofile` reports.
+
+    The names of the module come first, then the attributes of the modules
+    and the classes it references, then the builtins. An object which can be
+    reached in many ways, like `os.remove` after `from os import remove`, is
+    looked up by the names the mocked code uses.
+
+    Args:
+        module_name: the name of the mocked module
+        namespace: the global names of the module
+    """
+
+    def __init__(self, module_name: str, namespace: dict):
+        self.module_name = module_name
+
+        # keys are ids of objects, values are the objects, so their ids
+        # aren't reused while the index lives, and lists of
+        # (path to object, name)
+        self._entries = {}
+
+        self._modules = []  # (module, path, depth) to index the members of
+        for name, value in namespace.items():
+            self.add(value, module_name, name)
+        self._index_modules()
+
+        for name, value in vars(builtins).items():
+            self._add(value, module_name, name)
+
+    def add(self, value, path, name):
+        """
+        Adds an object and, for modules and classes, its members.
+        """
+        self._add(value, path, name)
+        if inspect.ismodule(value):
+            self._modules.append((value, path + '.' + name, 1))
+        elif inspect.isclass(value):
+            self._add_members(value, path + '.' + name)
+
+    def add_module(self, module, path):
+        """
+        Adds the members of a module, like a module imported inside the
+        mocked function.
+        """
+        self._modules.append((module, path, 1))
+        self._index_modules()
+
+    def lookup(self, callee, used_names=frozenset()):
+        """
+        Args:
+            callee: the called object, or the code object which ran
+            used_names: the names used by the mocked code, to choose between
+                the paths of an object which can be reached in many ways
+
+        Returns:
+            tuple: the path to the called object and its name, or None if it
+            can't be reached from the module.
+        """
+        entry = self._entries.get(id(callee))
+        if entry is None:
+            entry = self._entries.get(id(getattr(callee, '__func__', None)))
+        if entry is None:
+            return None
+        paths = entry[1]
+        if len(paths) == 1:
+            return paths[0]
+        return max(paths,
+                   key=lambda path: len(self._segments(path) & used_names))
+
+    def _segments(self, qualified_name):
+        path, name = qualified_name
+        if path == self.module_name:
+            return {name}
+        if path.startswith(self.module_name + '.'):
+            path = path[len(self.module_name) + 1:]
+        return set(path.split('.')) | {name}
+
+    def _index_modules(self):
+        visited = {id(module) for module, _, _ in self._modules}
+        while self._modules:
+            module, path, depth = self._modules.pop(0)
+            for name, value in vars(module).items():
+                if name.startswith('__'):
+                    continue
+                self._add(value, path, name)
+                if inspect.ismodule(value) and depth < _MODULE_DEPTH and \
+                        id(value) not in visited:
+                    visited.add(id(value))
+                    self._modules.append((value, path + '.' + name, depth + 1))
+
+    def _add(self, value, path, name):
+        if not callable(value):
+            return
+        self._add_entry(value, (path, name))
+
+        # the code which runs when the object is called, for sys.setprofile
+        function = getattr(value, '__func__', value)
+        if inspect.isclass(value):
+            function = vars(value).get('__init__')
+        if inspect.isfunction(function):
+            self._add_entry(function.__code__, (path, name))
+
+    def _add_entry(self, value, qualified_name):
+        entry = self._entries.setdefault(id(value), (value, []))
+        if qualified_name not in entry[1]:
+            entry[1].append(qualified_name)
+
+    def _add_members(self, cls, path):
+        for name, value in vars(cls).items():
+            if isinstance(value, (staticmethod, classmethod)):
+                value = value.__func__
+            if inspect.isfunction(value) or inspect.isbuiltin(value):
+                self._add(value, path, name)
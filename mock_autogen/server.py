@@ -0,0 +1,316 @@
+import concurrent.futures
+import importlib
+import inspect
+import json
+import logging
+import sys
+import threading
+import types
+from typing import Callable, Optional, TextIO
+
+from mock_autogen.analysis import list_dependencies
+from mock_autogen.generator import generate_mocks, MockingFramework
+from mock_autogen.utils import bare_instance, file_version, \
+    get_unique_item, suppress_output
+
+logger = logging.getLogger(__name__)
+
+# the error codes of JSON-RPC 2.0, and the request cancelled code of LSP
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+REQUEST_CANCELLED = -32800
+
+CANCEL_METHOD = '$/cancelRequest'
+
+# the params of the generate_mocks method, other than the target, the
+# callables of `sample_call` and `profile_call` can't be sent as JSON
+_GENERATE_OPTIONS = frozenset(inspect.signature(generate_mocks).parameters) - {
+    'framework', 'mocked', 'sample_call', 'profile_call'
+}
+
+
+class JsonRpcError(Exception):
+    """
+    An error which is sent as the response to a request.
+
+    Args:
+        code: the JSON-RPC error code
+        message: the error message
+    """
+
+    def __init__(self, code: int, message: str):
+        self.code = code
+        super().__init__(message)
+
+
+class Server:
+    """
+    A JSON-RPC 2.0 server over a pair of streams, one message per line, for
+    editor integrations which keep a single process running.
+
+    The imported modules, the parsed module files and the analysis results
+    stay in memory between the requests. A module whose file changed is
+    reloaded before it is used again.
+
+    The methods take a `target`, like 'package.module:Class.method', and
+    return:
+        * generate_mocks: {'code': the code generated by `generate_mocks`},
+          the other params are passed to `generate_mocks`, other than its
+          callables
+        * mock_plan: {'mocks': [{'path', 'name', 'mock_name'}], 'warnings'},
+          the mocks `generate_mocks` would create and the names which
+          `generate_asserts` would be called with
+        * list_dependencies: {'dependencies': [[path, name]], 'warnings'}
+
+    Both `mock_plan` and `list_dependencies` take an optional `engine`. A
+    missing or non-string target, or an unexpected param, is answered with
+    the `INVALID_PARAMS` error.
+
+    Requests run on worker threads, with `suppress_output`. A request can be
+    cancelled with the `$/cancelRequest` notification, and is cancelled when
+    a newer request of the same method and target arrives. A cancelled
+    request is answered with the `REQUEST_CANCELLED` error, once it was
+    skipped or its work finished.
+
+    Args:
+        input_stream: the stream of the requests
+        output_stream: the stream of the responses
+        workers: the number of requests which run at the same time
+    """
+
+    def __init__(self,
+                 input_stream: TextIO,
+                 output_stream: TextIO,
+                 workers: int = 2):
+        self.input_stream = input_stream
+        self.output_stream = output_stream
+        self.methods = {
+            'generate_mocks': self.generate_mocks,
+            'mock_plan': self.mock_plan,
+            'list_dependencies': self.list_dependencies,
+        }
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(workers)
+        self._lock = threading.Lock()  # guards everything below
+        self._cancelled = set()  # ids of the cancelled pending requests
+        self._latest = {}  # keys are (method, target), values are ids
+        self._versions = {}  # keys are module names, values are versions
+
+    def serve(self):
+        """
+        Handles the requests until the input stream ends, then waits for the
+        running requests.
+        """
+        try:
+            for line in self.input_stream:
+                if line.strip():
+                    self.handle(line)
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def handle(self, line: str):
+        """
+        Handles a single message, the response is written once its request
+        finishes.
+        """
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            self._respond(None, error=JsonRpcError(PARSE_ERROR, str(e)))
+            return
+        if not isinstance(message, dict):
+            self._respond(None,
+                          error=JsonRpcError(INVALID_REQUEST,
+                                             "Invalid request"))
+            return
+        request_id = message.get('id')
+        method = message.get('method')
+        params = message.get('params', {})
+        if message.get('jsonrpc') != '2.0' or not isinstance(method, str) or \
+                not isinstance(params, dict):
+            self._respond(request_id,
+                          error=JsonRpcError(INVALID_REQUEST,
+                                             "Invalid request"))
+            return
+
+        if method == CANCEL_METHOD:
+            self.cancel(params.get('id'))
+            return
+        if method not in self.methods:
+            if request_id is not None:
+                self._respond(request_id,
+                              error=JsonRpcError(
+                                  METHOD_NOT_FOUND,
+                                  f"Method not found: {method}"))
+            return
+
+        if not isinstance(params.get('target'), str):
+            if request_id is not None:
+                self._respond(request_id,
+                              error=JsonRpcError(INVALID_PARAMS,
+                                                 "Expected a 'target' string"))
+            return
+        key = (method, params['target'])
+        with self._lock:
+            if request_id is not None:
+                superseded = self._latest.get(key)
+                if superseded is not None:
+                    self._cancelled.add(superseded)
+                self._latest[key] = request_id
+        self._executor.submit(self._run, request_id, key, params)
+
+    def cancel(self, request_id):
+        """
+        Cancels a pending request, it is answered with the
+        `REQUEST_CANCELLED` error.
+        """
+        with self._lock:
+            if request_id in self._latest.values():
+                self._cancelled.add(request_id)
+
+    def generate_mocks(self, target, **options):
+        unknown = set(options) - _GENERATE_OPTIONS
+        if unknown:
+            raise JsonRpcError(
+                INVALID_PARAMS,
+                f"Unexpected params: {', '.join(sorted(unknown))}")
+        with suppress_output():
+            return {
+                'code':
+                generate_mocks(MockingFramework.PYTEST_MOCK,
+                               self.resolve(target), **options)
+            }
+
+    def mock_plan(self, target, engine='ast'):
+        analysis = list_dependencies(self.resolve(target), engine)
+        names = set()
+        mocks = []
+        for path, name in analysis.dependencies:
+            mocks.append({
+                'path': path,
+                'name': name,
+                'mock_name': 'mock_' + get_unique_item(names, name)
+            })
+        return {'mocks': mocks, 'warnings': list(analysis.warnings)}
+
+    def list_dependencies(self, target, engine='ast'):
+        analysis = list_dependencies(self.resolve(target), engine)
+        return {
+            'dependencies':
+            [list(dependency) for dependency in analysis.dependencies],
+            'warnings':
+            list(analysis.warnings)
+        }
+
+    def resolve(self, target: str) -> Callable:
+        """
+        Args:
+            target: the module and the qualified name of a function or a
+                method, like 'package.module:Class.method'
+
+        Returns:
+            the function or the method, instance methods are bound.
+
+        Raises:
+            JsonRpcError: if the target can't be found
+        """
+        module_name, _, qualname = target.partition(':')
+        if not qualname:
+            raise JsonRpcError(INVALID_PARAMS,
+                               f"Expected 'module:name', got: {target}")
+        try:
+            module = self._import(module_name)
+            owner, found = None, module
+            for name in qualname.split('.'):
+                owner, found = found, getattr(found, name)
+        except (ImportError, AttributeError) as e:
+            raise JsonRpcError(INVALID_PARAMS,
+                               f"Could not find {target}: {e}") from e
+        if isinstance(owner, type) and isinstance(found, types.FunctionType) \
+                and not isinstance(vars(owner).get(found.__name__),
+                                   staticmethod):
+            found = types.MethodType(found, bare_instance(owner))
+        return found
+
+    def _import(self, module_name):
+        module = importlib.import_module(module_name)
+        version = file_version(module)
+        with self._lock:
+            previous = self._versions.setdefault(module_name, version)
+            self._versions[module_name] = version
+        if previous != version:
+            module = importlib.reload(module)
+        return module
+
+    def _run(self, request_id, key, params):
+        if self._is_cancelled(request_id):
+            self._respond(request_id,
+                          error=JsonRpcError(REQUEST_CANCELLED,
+                                             "Request cancelled"))
+            return
+        method = self.methods[key[0]]
+        result = error = None
+        try:
+            try:
+                inspect.signature(method).bind(**params)
+            except TypeError as e:
+                raise JsonRpcError(INVALID_PARAMS, str(e)) from e
+            result = method(**params)
+        except JsonRpcError as e:
+            error = e
+        except Exception as e:
+            logger.warning("request %s failed", request_id, exc_info=True)
+            error = JsonRpcError(INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+
+        if self._finish(request_id, key):
+            error = JsonRpcError(REQUEST_CANCELLED, "Request cancelled")
+        self._respond(request_id, result, error)
+
+    def _is_cancelled(self, request_id):
+        with self._lock:
+            return request_id in self._cancelled
+
+    def _finish(self, request_id, key):
+        """
+        Returns:
+            bool: whether the request was cancelled.
+        """
+        with self._lock:
+            if self._latest.get(key) == request_id:
+                del self._latest[key]
+            if request_id in self._cancelled:
+                self._cancelled.remove(request_id)
+                return True
+            return False
+
+    def _respond(self,
+                 request_id,
+                 result=None,
+                 error: Optional[JsonRpcError] = None):
+        if request_id is None and (error is None or error.code
+                                   not in (PARSE_ERROR, INVALID_REQUEST)):
+            return  # notifications are never answered
+        response = {'jsonrpc': '2.0', 'id': request_id}
+        if error is None:
+            response['result'] = result
+        else:
+            response['error'] = {'code': error.code, 'message': str(error)}
+        line = json.dumps(response) + '\n'
+        with self._lock:
+            self.output_stream.write(line)
+            self.output_stream.flush()
+
+
+def main():
+    logging.basicConfig(stream=sys.stderr)
+    # stdout is the channel of the responses, nothing else may be printed
+    output_stream = sys.stdout
+    sys.stdout = sys.stderr
+    Server(sys.stdin, output_stream).serve()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+import ast
+import importlib.util
+import inspect
+import os
+import threading
+import tokenize
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+
+class ParsedModule:
+    """
+    The source code of a module file, parsed once.
+
+    Args:
+        source: the source code of the module
+        tree: the parsed ast tree of the source code
+    """
+
+    def __init__(self, source: str, tree: ast.Module):
+        self.source = source
+        self.tree = tree
+
+        # keys are (qualified name, first line), values are the function nodes
+        # the first line includes the decorators, like `co_firstlineno` does
+        # keys of classes are qualified names, the first definition is kept
+        self.functions, self.classes = _index_definitions(tree)
+
+    def function_node(self, qualname: str, first_line: int):
+        """
+        Returns:
+            ast.FunctionDef or ast.AsyncFunctionDef: the node of the function
+            or method, or None if there is no such function.
+        """
+        return self.functions.get((qualname, first_line))
+
+    def class_node(self, qualname: str):
+        """
+        Returns:
+            ast.ClassDef: the node of the class, or None if there is no such
+            class.
+        """
+        return self.classes.get(qualname)
+
+
+class ModuleCache:
+    """
+    A thread safe LRU cache of parsed module files.
+
+    Analyzing many functions of the same module reads and parses the file only
+    once, every function gets its subtree from the module tree. An entry is
+    invalidated when the modification time or the size of its file changes.
+
+    Modules which are not plain files, like modules in zip archives or modules
+    of custom loaders, are read with `module.__loader__.get_source`. Their
+    entries are invalidated when the archive changes, or when the loader
+    reports new `path_stats`. Entries of other loaders are kept until they are
+    invalidated with `invalidate`.
+
+    Args:
+        maxsize: the maximal number of parsed modules to keep
+    """
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+
+        # keys are file names, or (file name, module name) for sources which
+        # are read by a loader, values are (version, ParsedModule)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def parse(self,
+              filename: str,
+              module_globals: Optional[dict] = None) -> Optional[ParsedModule]:
+        """
+        Args:
+            filename: the file name of the module, like `co_filename`
+            module_globals: the global names of the module, to read the source
+                with its `__loader__` if there is no such file, like
+                `linecache` does
+
+        Returns:
+            the parsed module file, or None if it can't be read or parsed.
+        """
+        version = _source_version(filename, module_globals)
+        if version is None:
+            return None
+        # loaders may give the same synthetic file name, like '<string>', to
+        # many modules
+        key = filename if version[0] == 'file' else \
+            (filename, (module_globals or {}).get('__name__'))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        # parse outside of the lock, other files can be parsed meanwhile
+        try:
+            source = _read_source(filename, module_globals, version)
+            if source is None:
+                return None
+            parsed = ParsedModule(source, ast.parse(source, filename))
+        except (ImportError, OSError, SyntaxError, ValueError):
+            return None
+
+        with self._lock:
+            self._entries[key] = (version, parsed)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return parsed
+
+    def function_node(self, func: Callable) -> Optional[Tuple[str, ast.AST]]:
+        """
+        Finds the node of a function or a method in its parsed module file.
+
+        Args:
+            func: the function or method
+
+        Returns:
+            tuple: the source code of the module and the node of the function,
+            or None if the function can't be found, like for lambdas or for
+            code which is not in a file.
+        """
+        func = inspect.unwrap(getattr(func, '__func__', func))
+        code = getattr(func, '__code__', None)
+        if code is None:
+            return None
+        parsed = self.parse(code.co_filename, func.__globals__)
+        if parsed is None:
+            return None
+        node = parsed.function_node(func.__qualname__, code.co_firstlineno)
+        if node is None:
+            return None
+        return parsed.source, node
+
+    def invalidate(self, filename: str):
+        """
+        Removes the parsed module of a file, like after its loader was given
+        new code.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if key == filename or \
+                        (isinstance(key, tuple) and key[0] == filename):
+                    del self._entries[key]
+
+    def clear(self):
+        """
+        Removes all the parsed modules.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _source_version(filename, module_globals):
+    """
+    Returns:
+        tuple: the version of the source, which changes with it, or None if
+        there is no file and no loader to read the source with.
+    """
+    try:
+        stat = os.stat(filename)
+        return 'file', stat.st_mtime_ns, stat.st_size
+    except (OSError, ValueError):
+        pass
+
+    loader = (module_globals or {}).get('__loader__')
+    if not hasattr(loader, 'get_source'):
+        return None
+    archive = getattr(loader, 'archive', None)  # zipimport.zipimporter
+    if isinstance(archive, str):
+        try:
+            stat = os.stat(archive)
+            return 'archive', stat.st_mtime_ns, stat.st_size
+        except (OSError, ValueError):
+            return None
+    try:
+        # the modification time and the size, see importlib.abc.SourceLoader
+        stats = loader.path_stats(filename)
+        return 'loader', stats['mtime'], stats.get('size')
+    except (AttributeError, ImportError, KeyError, OSError, TypeError):
+        return 'loader',  # kept until invalidated
+
+
+def _read_source(filename, module_globals, version):
+    if version[0] == 'file':
+        with tokenize.open(filename) as module_file:
+            return module_file.read()
+    loader = module_globals['__loader__']
+    if hasattr(loader, 'get_data'):
+        try:
+            # decoded by the encoding declaration, like a file, which
+            # `zipimporter.get_source` ignores
+            return importlib.util.decode_source(loader.get_data(filename))
+        except OSError:
+            pass  # the file name isn't a path of the loader
+    return loader.get_source(module_globals.get('__name__'))
+
+
+def _index_definitions(tree):
+    """
+    Indexes the functions and methods of a module by their qualified name and
+    first line, and the classes by their qualified name, the same way Python
+    names them in `__qualname__`.
+
+    Uses an explicit stack, so deeply nested code doesn't hit the recursion
+    limit.
+    """
+    functions = {}
+    classes = {}
+    stack = [(tree, "")]
+    while stack:
+        node, prefix = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            qualname = prefix + node.name
+            first_line = min(
+                [node.lineno] +
+                [decorator.lineno for decorator in node.decorator_list])
+            functions[(qualname, first_line)] = node
+            prefix = qualname + ".<locals>."
+        elif isinstance(node, ast.ClassDef):
+            classes.setdefault(prefix + node.name, node)
+            prefix = prefix + node.name + "."
+        # reversed, so the first definition is visited first
+        stack.extend((child, prefix)
+                     for child in reversed(list(ast.iter_child_nodes(node))))
+    return functions, classes
+
+
+# the parsed modules of the analyzed functions, shared by all the analyses
+module_cache = ModuleCache()
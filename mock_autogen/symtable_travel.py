@@ -0,0 +1,289 @@
+import ast
+import functools
+import inspect
+import symtable
+
+from mock_autogen.ast_tree_travel import DependencyLister, safe_travels, \
+    _stringify_node_path, CustomTypeError
+
+# the nodes which open a new scope, and their name in the symbol table
+_SCOPE_NAMES = {
+    ast.Lambda: 'lambda',
+    ast.ListComp: 'listcomp',
+    ast.SetComp: 'setcomp',
+    ast.DictComp: 'dictcomp',
+    ast.GeneratorExp: 'genexpr',
+}
+
+
+class SymbolTableDependencyLister(DependencyLister):
+    """
+    A `DependencyLister` which uses the `symtable` module to classify every
+    name as local, global or free, instead of tracking the assignments,
+    loops, comprehensions, lambdas and `with` statements by itself.
+
+    The symbol table is built by the compiler in a single pass, so it knows
+    about every binding construct, including walrus, `match` captures and
+    `global` declarations. Only global names, names imported inside the
+    function and free names which are not bound inside the function are
+    resolved to dependencies.
+
+    Args:
+        mocked: a callable method or function
+    """
+
+    # the scope rules come from the symbol table
+    visit_Assign = None
+    visit_withitem = None
+    visit_For = None
+    visit_comprehension = None
+    visit_Lambda = None
+
+    def __init__(self, mocked):
+        super().__init__(mocked)
+
+        # keys are ids of ast.Name nodes, values are the symbol tables of the
+        # scopes they are in
+        self.name_scopes = {}
+
+        # keys are ids of symbol tables, values are their parent tables
+        self.parent_tables = {}
+
+        # the id of the symbol table of the mocked function
+        self.function_table_id = None
+
+    def execute(self):
+        """
+        Classifies the names of the source code and collects any dependencies
+        to mock.
+        """
+        # the source of code which is not in a module file, like a lambda, is
+        # parsed alone, into a module
+        self.tree = _mocked_node(self.tree, self.mocked)
+        if self.tree is None:
+            return self._execute_ast_engine()
+        parent_table = self._find_parent_table(
+            _module_symbol_table(self.source_code))
+        if parent_table is None:
+            self.warnings.append(f"# could not find the symbol table of: "
+                                 f"{_scope_name(self.tree)}")
+        else:
+            self._map_name_scopes(parent_table)
+        return super().execute()
+
+    def _execute_ast_engine(self):
+        self.warnings.append(
+            f"# could not find the definition of: "
+            f"{getattr(self.mocked, '__qualname__', self.mocked)}, "
+            f"using the ast engine")
+        ast_lister = DependencyLister(self.mocked).execute()
+        self.warnings.extend(ast_lister.warnings)
+        self.dependencies_found = ast_lister.dependencies_found
+        self.source_code = None
+        return self
+
+    @safe_travels("point self to the class")
+    def visit_FunctionDef(self, node):
+        arguments = node.args.posonlyargs + node.args.args \
+            if hasattr(node.args, 'posonlyargs') else node.args.args
+        # support 'self', 'cls' by pointing it to the Class
+        if node is self.tree and arguments and inspect.ismethod(self.mocked):
+            class_name = self.mocked.__qualname__.split('.', 1)[0]
+            self.self_variable = arguments[0].arg
+            self.import_mappings[self.self_variable] = \
+                self.outer_module_name + '.' + class_name
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    @safe_travels("skip variable annotation", call_generic_visit=False)
+    def visit_AnnAssign(self, node):
+        """
+        Annotations of local variables are never evaluated, only the target
+        and the value are visited.
+        """
+        self.visit(node.target)
+        if node.value:
+            self.visit(node.value)
+
+    @safe_travels("convert a function call into a mock")
+    def visit_Call(self, node):
+        try:
+            path = _stringify_node_path(node.func)
+        except CustomTypeError as complex_node_err:
+            # the inner call would be visited on its own, see
+            # DependencyLister.visit_Call
+            if not isinstance(complex_node_err.node, ast.Call):
+                raise complex_node_err
+            return
+        if self._is_external(_root_name(node.func)):
+            self._add_potential_dependency(path)
+
+    @safe_travels("convert a name call into a mock")
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load) and self._is_external(node):
+            self._add_potential_dependency(node.id)
+
+    def _is_external(self, name_node):
+        table = self.name_scopes.get(id(name_node))
+        if table is None:
+            return False
+        symbol = table.lookup(name_node.id)
+        if symbol.is_global() or symbol.is_imported():
+            return True
+        if symbol.is_free():
+            return not self._bound_inside(name_node.id, table)
+        # `self` and `cls` of methods point to the class
+        return name_node.id in self.import_mappings and \
+               table.get_id() == self.function_table_id
+
+    def _bound_inside(self, name, table):
+        """
+        Returns:
+            whether the free name is bound by a scope between the table and
+            the mocked function, including the function itself. Names
+            imported inside the function are not considered bound, they are
+            dependencies.
+        """
+        while table.get_id() != self.function_table_id:
+            table = self.parent_tables[table.get_id()]
+            try:
+                symbol = table.lookup(name)
+            except KeyError:
+                continue
+            if symbol.is_local():
+                return not symbol.is_imported()
+        return False
+
+    def _find_parent_table(self, module_table):
+        """
+        Returns:
+            the symbol table of the scope in which the mocked function is
+            defined, or None if it can't be found.
+        """
+        tables = [module_table]
+        while tables:
+            table = tables.pop()
+            for child in table.get_children():
+                if child.get_type() == 'function' and \
+                        child.get_name().strip('<>') == \
+                        _scope_name(self.tree) and \
+                        child.get_lineno() == self.tree.lineno:
+                    return table
+                tables.append(child)
+        return None
+
+    def _map_name_scopes(self, parent_table):
+        """
+        Goes over the tree and maps every name to the symbol table of its
+        scope. The parts of a scope node which are evaluated in the enclosing
+        scope, like decorators and default values, are mapped to it.
+        """
+        stack = [(self.tree, parent_table)]
+        while stack:
+            node, table = stack.pop()
+            if isinstance(node, ast.Name):
+                self.name_scopes[id(node)] = table
+                continue
+
+            inner_table = self._child_table(node, table)
+            if inner_table is None:
+                stack.extend(
+                    (child, table) for child in ast.iter_child_nodes(node))
+                continue
+            if node is self.tree:
+                self.function_table_id = inner_table.get_id()
+            self.parent_tables[inner_table.get_id()] = table
+
+            stack.extend(_scoped_children(node, table, inner_table))
+
+    def _child_table(self, node, table):
+        """
+        Returns:
+            the symbol table of the scope the node opens, or None if it
+            doesn't open one. Comprehensions which were inlined into their
+            enclosing scope don't have a table either.
+        """
+        name = _scope_name(node)
+        if name is None:
+            return None
+        for child in table.get_children():
+            # scopes of the same kind on the same line are matched in order
+            if child.get_name().strip('<>') == name and \
+                    child.get_lineno() == node.lineno and \
+                    child.get_id() not in self.parent_tables:
+                return child
+        return None
+
+
+def _scope_name(node):
+    """
+    Returns:
+        str: the name of the symbol table of the scope the node opens, or None
+        if it doesn't open one.
+    """
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return node.name
+    return _SCOPE_NAMES.get(type(node))
+
+
+def _mocked_node(tree, mocked):
+    """
+    Returns:
+        the node of the mocked function or lambda, which is the tree itself
+        unless it's a module, or None if the module doesn't define it.
+    """
+    if not isinstance(tree, ast.Module):
+        return tree
+    name = getattr(mocked, '__name__', None)
+    for node in ast.walk(tree):  # breadth first, the outermost comes first
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and \
+                node.name == name:
+            return node
+        if isinstance(node, ast.Lambda) and name == '<lambda>':
+            return node
+    return None
+
+
+def _scoped_children(node, table, inner_table):
+    """
+    Yields the direct children of a scope node with the symbol table of the
+    scope they are evaluated in. Decorators, default values, annotations of
+    arguments, class bases and the first iterable of a comprehension are
+    evaluated in the enclosing scope, everything else in the inner scope.
+    """
+    if type(node) in _SCOPE_NAMES and not isinstance(node, ast.Lambda):
+        first, *others = node.generators
+        yield first.iter, table
+        yield first.target, inner_table
+        for condition in first.ifs:
+            yield condition, inner_table
+        for generator in others:
+            yield generator, inner_table
+        for field in ('elt', 'key', 'value'):
+            if hasattr(node, field):
+                yield getattr(node, field), inner_table
+        return
+
+    if isinstance(node, ast.ClassDef):
+        outer = node.decorator_list + node.bases + node.keywords
+    else:
+        # the arguments node holds the default values and the annotations,
+        # the argument names themselves are not ast.Name nodes
+        outer = [node.args] + getattr(node, 'decorator_list', []) + \
+                ([node.returns] if getattr(node, 'returns', None) else [])
+    for child in ast.iter_child_nodes(node):
+        if any(child is outer_child for outer_child in outer):
+            yield child, table
+        else:
+            yield child, inner_table
+
+
+@functools.lru_cache(maxsize=32)
+def _module_symbol_table(source_code):
+    return symtable.symtable(source_code, '<mocked>', 'exec')
+
+
+def _root_name(node):
+    while not isinstance(node, ast.Name):
+        node = node.value
+    return node
@@ -1,17 +1,61 @@
 import ast
+import contextlib
 import functools
+import hashlib
+import importlib
+import inspect
 import logging
+import marshal
+import os
 import sys
+import textwrap
+import threading
 
 import pyperclip
 
 logger = logging.getLogger(__name__)
 
+# serializes the console and clipboard side effects, so results generated by
+# concurrent threads are never interleaved
+_output_lock = threading.Lock()
+
+# per thread flag, allows worker threads to generate code without side effects
+_output_state = threading.local()
+
+
+@contextlib.contextmanager
+def suppress_output():
+    """
+    Disables the console and clipboard side effects of the decorated
+    functions, for calls made by the current thread inside the context.
+
+    This is useful when generating code from a thread pool or a long running
+    service, where printing and copying every result is both slow and
+    meaningless. Other threads are not affected.
+
+    Example:
+        with suppress_output():
+            code = mock_autogen.generate_uut_mocks(my_function)
+    """
+    previous = getattr(_output_state, 'suppressed', False)
+    _output_state.suppressed = True
+    try:
+        yield
+    finally:
+        _output_state.suppressed = previous
+
+
+def _is_output_suppressed() -> bool:
+    return getattr(_output_state, 'suppressed', False)
+
 
 def copy_result_to_clipboard(func):
     """
     Copies the result of the decorated function to the clipboard.
 
+    The copy is skipped while `suppress_output` is active in the calling
+    thread.
+
     Args:
         func (callable): the original function
 
@@ -22,8 +66,11 @@ def copy_result_to_clipboard(func):
     @functools.wraps(func)
     def to_clipboard(*args, **kwargs):
         result = func(*args, **kwargs)
+        if _is_output_suppressed():
+            return result
         try:
-            pyperclip.copy(result)
+            with _output_lock:
+                pyperclip.copy(result)
         except Exception:
             logger.warning("Could not copy func results to clipboard",
                            exc_info=True)
@@ -36,6 +83,9 @@ def print_result(func):
     """
     Prints the result of the decorated function to the console.
 
+    The print is skipped while `suppress_output` is active in the calling
+    thread.
+
     Args:
         func (callable): the original function
 
@@ -46,7 +96,9 @@ def print_result(func):
     @functools.wraps(func)
     def to_console(*args, **kwargs):
         result = func(*args, **kwargs)
-        print(str(result))
+        if not _is_output_suppressed():
+            with _output_lock:
+                print(str(result))
         return result
 
     return to_console
@@ -73,3 +125,91 @@ def get_unique_item(items: set, item: str) -> str:
         compound_item = item + f'_{sequence}'
     items.add(compound_item)
     return compound_item
+
+
+def resolve_dotted_path(path: str):
+    """
+    Finds the object a dotted path points to, like the ones in the generated
+    patches. The longest prefix of the path which is a module is imported,
+    the rest are attributes.
+
+    Args:
+        path: the dotted path, like 'tests.sample.code.tested_module.os.path'
+
+    Returns:
+        The object the path points to.
+
+    Raises:
+        ImportError: if no prefix of the path is a module
+        AttributeError: if an attribute is missing
+    """
+    parts = path.split('.')
+    for end in range(len(parts), 0, -1):
+        module_name = '.'.join(parts[:end])
+        module = sys.modules.get(module_name)
+        if module is None:
+            try:
+                module = importlib.import_module(module_name)
+            except ImportError:
+                continue
+        return functools.reduce(getattr, parts[end:], module)
+    raise ImportError(f"No module found in path: {path}")
+
+
+def source_fingerprint(function) -> str:
+    """
+    Args:
+        function: a function or a method
+
+    Returns:
+        The source code of the function, or the hash of its code object if
+        the source is not available, like for `.pyc` only packages.
+    """
+    try:
+        return textwrap.dedent(inspect.getsource(function))
+    except (OSError, TypeError):
+        code = inspect.unwrap(getattr(function, '__func__', function)).__code__
+        return hashlib.sha256(marshal.dumps(code)).hexdigest()
+
+
+def bare_instance(cls):
+    """
+    Args:
+        cls: the class to create an instance of
+
+    Returns:
+        An instance of the class which was never initialized, or the class
+        itself if it has its own way of creating instances.
+    """
+    if cls.__new__ is not object.__new__:
+        return cls
+    try:
+        return object.__new__(cls)
+    except TypeError:
+        return cls
+
+
+def file_version(module):
+    """
+    Args:
+        module: a module
+
+    Returns:
+        The modification time and the size of the file of the module, or None
+        if it has no file.
+    """
+    try:
+        stat = os.stat(module.__file__)
+    except (AttributeError, OSError, TypeError):
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def remove_quietly(path: str):
+    """
+    Removes a file, if it exists and can be removed.
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
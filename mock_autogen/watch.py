@@ -0,0 +1,138 @@
+import argparse
+import importlib
+import logging
+import os
+import sys
+import time
+import types
+from typing import Iterable, List, Optional
+
+from mock_autogen.analysis import engines
+from mock_autogen.incremental import regenerate
+from mock_autogen.utils import file_version
+
+logger = logging.getLogger(__name__)
+
+
+class Watcher:
+    """
+    Keeps the mocks of modules up to date while their files are edited.
+
+    The parsed modules and the analysis results stay in memory between the
+    polls, see `mock_autogen.sources.module_cache` and
+    `mock_autogen.analysis.dependency_cache`. A poll only compares the
+    modification times and the sizes of the module files, a changed module is
+    reloaded and only its functions whose source changed are regenerated, see
+    `mock_autogen.incremental.regenerate`.
+
+    Args:
+        modules: the modules to watch
+        output_directory: the directory of the generated artifacts
+        generate_options: more arguments to `regenerate`, like `engine`
+    """
+
+    def __init__(self, modules: Iterable[types.ModuleType],
+                 output_directory: str, **generate_options):
+        self.modules = list(modules)
+        self.output_directory = output_directory
+        self.generate_options = generate_options
+
+        # keys are module names, values are (mtime, size) of their files
+        self._versions = {
+            module.__name__: file_version(module)
+            for module in self.modules
+        }
+
+    def start(self) -> List[str]:
+        """
+        Generates the mocks of all the modules, which didn't change since the
+        previous run.
+
+        Returns:
+            the names of the regenerated functions.
+        """
+        return regenerate(self.modules, self.output_directory,
+                          **self.generate_options)
+
+    def poll(self) -> List[str]:
+        """
+        Regenerates the mocks of the modules whose files changed since the
+        previous poll.
+
+        Returns:
+            the names of the regenerated functions.
+        """
+        changed = []
+        for index, module in enumerate(self.modules):
+            version = file_version(module)
+            if version == self._versions[module.__name__]:
+                continue
+            self._versions[module.__name__] = version
+            try:
+                module = self.modules[index] = importlib.reload(module)
+            except Exception:
+                # keep the previous version until the file is fixed
+                logger.warning("could not reload %s",
+                               module.__name__,
+                               exc_info=True)
+                continue
+            changed.append(module)
+        if not changed:
+            return []
+        return regenerate(changed, self.output_directory,
+                          **self.generate_options)
+
+    def run(self, interval: float = 0.5, polls: Optional[int] = None):
+        """
+        Polls the module files until interrupted.
+
+        Args:
+            interval: the seconds to wait between the polls
+            polls: the number of polls, unlimited by default
+        """
+        for name in self.start():
+            logger.info("generated %s", name)
+        while polls is None or polls > 0:
+            time.sleep(interval)
+            for name in self.poll():
+                logger.info("regenerated %s", name)
+            if polls is not None:
+                polls -= 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m mock_autogen.watch',
+        description="Regenerates the mocks of the functions of the modules "
+        "whenever their source changes.")
+    parser.add_argument('modules',
+                        nargs='+',
+                        help="the names of the modules to watch")
+    parser.add_argument('-o',
+                        '--output',
+                        default='generated_mocks',
+                        help="the directory of the generated mocks")
+    parser.add_argument('--engine',
+                        default='ast',
+                        choices=sorted(engines),
+                        help="the analysis engine")
+    parser.add_argument('--interval',
+                        type=float,
+                        default=0.5,
+                        help="the seconds between the checks of the files")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())  # like `python -m` does
+    watcher = Watcher([importlib.import_module(name) for name in args.modules],
+                      args.output,
+                      engine=args.engine)
+    try:
+        watcher.run(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,19 @@
 import pathlib
+import re
 from setuptools import setup, find_packages
 
 HERE = pathlib.Path(__file__).parent
 README = (HERE / "README.md").read_text()
 INSTALL_REQUIRES = (HERE / "requirements.txt").read_text().splitlines()
 TESTS_REQUIRE = (HERE / "test-requirements.txt").read_text().splitlines()[1:]
+# read without importing the package, whose requirements may be missing
+VERSION = re.search(r'^__version__ = "(.*)"$',
+                    (HERE / "mock_autogen" / "__init__.py").read_text(),
+                    re.MULTILINE).group(1)
 
 # This call to setup() does all the work
 setup(name="mock-generator",
-      version="2.4.0",
+      version=VERSION,
       description="Generate python mocks and assertions quickly",
       long_description=README,
       long_description_content_type="text/markdown",
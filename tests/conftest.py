@@ -1,3 +1,9 @@
+import importlib
+import os
+import sys
+import textwrap
+import types
+
 import pytest
 import mock_autogen
 
@@ -5,3 +11,39 @@ import mock_autogen
 @pytest.fixture
 def mg():
     return mock_autogen
+
+
+@pytest.fixture
+def load_module(tmp_path, monkeypatch):
+    """
+    Loads modules from sources written to `tmp_path`, or without a source
+    file, like a `.pyc` only package. Every version written is newer than the
+    previous one, even if the size and the clock don't change, and without
+    `imported` the module is only written, for code which reloads it.
+    """
+    monkeypatch.syspath_prepend(str(tmp_path))
+    loaded = []
+
+    def load(source, name=None, source_file=True, imported=True):
+        name = name or f'loaded_{len(loaded)}'
+        source = textwrap.dedent(source)
+        loaded.append(name)
+        if not source_file:
+            module = types.ModuleType(name)
+            module.__package__ = name.rpartition('.')[0]
+            sys.modules[name] = module
+            exec(compile(source, f'/nonexistent/{name}.py', 'exec'),
+                 module.__dict__)
+            return module
+        path = tmp_path / f'{name}.py'
+        path.write_text(source)
+        os.utime(str(path), (len(loaded), len(loaded)))
+        importlib.invalidate_caches()
+        if not imported:
+            return None
+        sys.modules.pop(name, None)
+        return importlib.import_module(name)
+
+    yield load
+    for name in loaded:
+        sys.modules.pop(name, None)
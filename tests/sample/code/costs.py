@@ -0,0 +1,21 @@
+import os
+import time
+
+
+def slow_io(seconds):
+    time.sleep(seconds)
+
+
+def cheap_helper(value):
+    return value * 2
+
+
+def process(value):
+    slow_io(0.05)
+    return cheap_helper(value) + len(os.sep)
+
+
+def serializer(value):
+    import json
+    cheap_helper(value)
+    return json
@@ -0,0 +1,18 @@
+import json
+import os
+
+HANDLERS = {'json': json.loads, 'exists': os.path.exists}
+
+
+def dispatch(kind, value):
+    return HANDLERS[kind](value)
+
+
+def dynamic(name, *args):
+    return getattr(os.path, name)(*args)
+
+
+def branches(flag, path):
+    if flag:
+        return os.path.exists(path)
+    return os.path.isdir(path)
@@ -0,0 +1,52 @@
+import json
+import logging
+import zipfile
+from typing import Optional
+
+
+class Client(object):
+
+    def get(self, key):
+        return key
+
+    def put(self, key, value):
+        return key, value
+
+
+class Repository(object):
+    cache: Optional[Client] = None
+
+    def __init__(self, client: Client, name, path="archive.zip"):
+        self.client = client
+        self.archive = zipfile.ZipFile(path, 'a')
+        self.logger = logging.getLogger(name)
+        self.name = name
+        self.encoder: "json.JSONEncoder" = json.JSONEncoder()
+        self.retries = None
+        if name:
+            self.retries = 3
+        else:
+            self.retries = "3"
+
+    def load(self, key):
+        cached = self.cache.get(key)
+        if cached is None:
+            self.logger.info("loading %s from %s", key, self.name.upper())
+            cached = self.client.get(key)
+            self.client.put(key, self.encoder.encode(cached))
+        return self.archive.read(cached), self.retries.bit_length()
+
+    @classmethod
+    def create(cls, client):
+        return cls(client.get("name"))
+
+
+class CachedRepository(Repository):
+
+    def __init__(self, client: Client, name, cache: Client):
+        super().__init__(client, name)
+        self.cache = cache
+        self.client = json.JSONDecoder()
+
+    def refresh(self, key):
+        return self.client.decode(self.cache.get(key))
@@ -0,0 +1,117 @@
+import pytest
+
+import mock_autogen.analysis
+from mock_autogen.analysis import list_dependencies, dependency_cache, \
+    AnalysisResult
+from tests.sample.code.instance_attributes import Repository, \
+    CachedRepository
+from tests.sample.code.tested_module import os_remove_wrap, FirstClass, \
+    base_64_whole_modules
+
+
+@pytest.fixture(autouse=True)
+def clear_dependency_cache():
+    dependency_cache.clear()
+    yield
+    dependency_cache.clear()
+
+
+def test_list_dependencies():
+    result = list_dependencies(os_remove_wrap)
+
+    assert AnalysisResult((('tests.sample.code.tested_module.os', 'remove'), ),
+                          ()) == result
+
+
+def test_list_dependencies_memoized(mocker):
+    spy_lister = mocker.spy(mock_autogen.analysis, '_analyze')
+
+    first = list_dependencies(base_64_whole_modules)
+    second = list_dependencies(base_64_whole_modules)
+
+    assert first is second
+    assert first.warnings  # the sample has unsupported syntax
+    assert 1 == spy_lister.call_count
+    assert (1, 1) == dependency_cache.cache_info()[:2]
+
+
+def test_list_dependencies_without_cache(mocker):
+    spy_lister = mocker.spy(mock_autogen.analysis, '_analyze')
+
+    first = list_dependencies(os_remove_wrap, use_cache=False)
+    second = list_dependencies(os_remove_wrap, use_cache=False)
+
+    assert first == second
+    assert 2 == spy_lister.call_count
+    assert 0 == len(dependency_cache)
+
+
+def test_list_dependencies_method_and_function_cached_separately():
+    method_result = list_dependencies(FirstClass(1).using_not_implemented)
+    function_result = list_dependencies(FirstClass.using_not_implemented)
+
+    assert ('tests.sample.code.tested_module.FirstClass',
+            'not_implemented') in method_result.dependencies
+    assert ('tests.sample.code.tested_module.FirstClass',
+            'not_implemented') not in function_result.dependencies
+    assert 2 == len(dependency_cache)
+
+
+def test_list_dependencies_inherited_method_cached_per_class():
+    base_result = list_dependencies(Repository.__new__(Repository).load)
+    subclass_result = list_dependencies(
+        CachedRepository.__new__(CachedRepository).load)
+
+    module = 'tests.sample.code.instance_attributes'
+    assert (module + '.Client', 'put') in base_result.dependencies
+    assert (module + '.json.JSONDecoder', 'put') not in \
+        base_result.dependencies
+    assert (module + '.json.JSONDecoder', 'put') in \
+        subclass_result.dependencies
+    assert (module + '.Client', 'put') not in subclass_result.dependencies
+    assert 2 == len(dependency_cache)
+
+
+def test_list_dependencies_disk_cache(mocker, tmp_path):
+    spy_lister = mocker.spy(mock_autogen.analysis, '_analyze')
+    mocker.patch('mock_autogen.analysis.disk_cache', new=None)
+    mock_autogen.analysis.enable_disk_cache(str(tmp_path))
+
+    first = list_dependencies(base_64_whole_modules)
+    dependency_cache.clear()  # a new process has an empty memory cache
+    second = list_dependencies(base_64_whole_modules)
+
+    assert first == second
+    assert 1 == spy_lister.call_count
+    assert 1 == len(list(tmp_path.glob('*.json')))
+
+    mock_autogen.analysis.disable_disk_cache()
+    dependency_cache.clear()
+    list_dependencies(base_64_whole_modules)
+    assert 2 == spy_lister.call_count
+
+
+def test_list_dependencies_disk_cache_keyed_by_options(mocker, tmp_path):
+    mocker.patch('mock_autogen.analysis.disk_cache', new=None)
+    mock_autogen.analysis.enable_disk_cache(str(tmp_path))
+
+    list_dependencies(FirstClass(1).using_not_implemented)
+    list_dependencies(FirstClass.using_not_implemented)
+
+    assert 2 == len(list(tmp_path.glob('*.json')))
+
+
+def test_list_dependencies_memoized_per_engine(mocker):
+    spy_lister = mocker.spy(mock_autogen.analysis, '_analyze')
+
+    by_ast = list_dependencies(base_64_whole_modules, engine='ast')
+    by_symtable = list_dependencies(base_64_whole_modules, engine='symtable')
+
+    assert by_ast == by_symtable
+    assert by_ast is not by_symtable
+    assert 2 == spy_lister.call_count
+
+
+def test_list_dependencies_unknown_engine():
+    with pytest.raises(ValueError, match="Unknown engine 'magic'"):
+        list_dependencies(os_remove_wrap, engine='magic')
@@ -1,7 +1,12 @@
+import ast
 import sys
+from collections import OrderedDict
 from unittest.mock import sentinel
 
-from mock_autogen.ast_tree_travel import safe_travels, DependencyLister
+import pytest
+
+from mock_autogen.ast_tree_travel import safe_travels, DependencyLister, \
+    _stringify_node_path, CustomTypeError
 from tests.sample.code.assignments import split_list, multiple_assignments, \
     annotated_assignments
 from tests.sample.code.comprehensions_and_loops import get_square_root_loop, \
@@ -39,17 +44,13 @@ def test_safe_travels_on_func_failure(mocker):
     mock_dump = mocker.MagicMock(name='dump')
     mock_dump.return_value = "code_dump"
     mocker.patch('mock_autogen.ast_tree_travel.ast.dump', new=mock_dump)
-    mock_get_source_segment = mocker.MagicMock(name='get_source_segment')
-    mock_get_source_segment.return_value = "code_actual"
-    if sys.version_info >= (3, 8):
-        mocker.patch('mock_autogen.ast_tree_travel.ast.get_source_segment',
-                     new=mock_get_source_segment)
     mock_warning = mocker.MagicMock(name='warning')
     mocker.patch('mock_autogen.ast_tree_travel.logger.warning',
                  new=mock_warning)
     self = mocker.MagicMock(name='self')
     self.warnings = []
     self.source_code = "my = python.code"
+    self.traced_failures = set()
 
     # act
     node_visit_func(self, sentinel.node)
@@ -57,23 +58,17 @@ def test_safe_travels_on_func_failure(mocker):
     # assert
     self.generic_visit.assert_called_once_with(sentinel.node)
 
-    mock_dump.assert_called_once_with(sentinel.node)
-
-    if sys.version_info >= (3, 8):
-        mock_get_source_segment.assert_called_once_with(
-            'my = python.code', sentinel.node)
-        warning = '# could not a dummy method that might fail on node:\n' \
-                  '#  code_actual\n' \
-                  "#  '_SentinelObject' object has no attribute " \
-                  "'made_up_function'"
-    else:
-        mock_get_source_segment.assert_not_called()
-        warning = '# could not a dummy method that might fail on node:\n' \
-                  '#  code_dump\n' \
-                  "#  '_SentinelObject' object has no attribute " \
-                  "'made_up_function'"
+    mock_dump.assert_not_called()  # rendered only when needed
+    warning = '# could not a dummy method that might fail on node:\n' \
+              '#  code_dump\n' \
+              "#  '_SentinelObject' object has no attribute " \
+              "'made_up_function'"
     mock_warning.assert_called_once_with(warning, exc_info=True)
     assert warning in self.warnings
+    assert warning == str(self.warnings[0])
+    mock_dump.assert_called_once_with(sentinel.node)
+    assert {("a dummy method that might fail", AttributeError)
+            } == self.traced_failures
 
 
 def test_safe_travels_stop_there_on_func_success(mocker):
@@ -91,17 +86,13 @@ def test_safe_travels_stop_there_on_func_failure(mocker):
     mock_dump = mocker.MagicMock(name='dump')
     mock_dump.return_value = "code_dump"
     mocker.patch('mock_autogen.ast_tree_travel.ast.dump', new=mock_dump)
-    mock_get_source_segment = mocker.MagicMock(name='get_source_segment')
-    mock_get_source_segment.return_value = "code_actual"
-    if sys.version_info >= (3, 8):
-        mocker.patch('mock_autogen.ast_tree_travel.ast.get_source_segment',
-                     new=mock_get_source_segment)
     mock_warning = mocker.MagicMock(name='warning')
     mocker.patch('mock_autogen.ast_tree_travel.logger.warning',
                  new=mock_warning)
     self = mocker.MagicMock(name='self')
     self.warnings = []
     self.source_code = "my = python.code"
+    self.traced_failures = set()
 
     # act
     node_visit_func_stop_there(self, sentinel.node)
@@ -109,28 +100,202 @@ def test_safe_travels_stop_there_on_func_failure(mocker):
     # assert
     self.generic_visit.assert_not_called()
 
+    mock_dump.assert_not_called()  # rendered only when needed
+    warning = "# could not a dummy method that might fail, " \
+              "but won't proceed afterwards on node:\n" \
+              '#  code_dump\n' \
+              "#  '_SentinelObject' object has no attribute " \
+              "'made_up_function'"
+    mock_warning.assert_called_once_with(warning, exc_info=True)
+    assert warning in self.warnings
     mock_dump.assert_called_once_with(sentinel.node)
 
-    if sys.version_info >= (3, 8):
-        mock_get_source_segment.assert_called_once_with(
-            'my = python.code', sentinel.node)
-        warning = "# could not a dummy method that might fail, " \
-                  "but won't proceed afterwards on node:\n" \
-                  '#  code_actual\n' \
-                  "#  '_SentinelObject' object has no attribute " \
-                  "'made_up_function'"
-    else:
-        mock_get_source_segment.assert_not_called()
-        warning = "# could not a dummy method that might fail, " \
-                  "but won't proceed afterwards on node:\n" \
-                  '#  code_dump\n' \
-                  "#  '_SentinelObject' object has no attribute " \
-                  "'made_up_function'"
+
+@pytest.mark.skipif(sys.version_info < (3, 8),
+                    reason="nodes have end positions since 3.8")
+def test_safe_travels_failure_shows_source_segment(mocker):
+    mock_warning = mocker.patch('mock_autogen.ast_tree_travel.logger.warning')
+    self = mocker.MagicMock(name='self')
+    self.warnings = []
+    self.source_code = "x = 1\nfirst(\n  'ü')[0].second()\n"
+    node = ast.parse(self.source_code).body[1].value
+
+    node_visit_func(self, node)
+
+    warning = '# could not a dummy method that might fail on node:\n' \
+              "#  first(\n" \
+              "#    'ü')[0].second()\n" \
+              "#  'Call' object has no attribute 'made_up_function'"
+    assert [warning] == self.warnings
     mock_warning.assert_called_once_with(warning, exc_info=True)
-    assert warning in self.warnings
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8),
+                    reason="nodes have end positions since 3.8")
+def test_failure_in_method_shows_dedented_source_segment(load_module):
+    module = load_module("""
+        class Messages:
+            def encode(self, message):
+                return (message.upper() + "!"). \\
+                    encode('ascii')
+        """)
+
+    deps_lister = DependencyLister(module.Messages.encode).execute()
+
+    # like the segment of the method's source, dedented to the first column
+    assert 1 == len(deps_lister.warnings)
+    assert str(deps_lister.warnings[0]).startswith(
+        "# could not convert a function call into a mock on node:\n"
+        "#  (message.upper() + \"!\"). \\\n"
+        "#          encode('ascii')\n")
+
+
+def test_safe_travels_traces_first_failure_of_every_kind(mocker):
+    mock_warning = mocker.patch('mock_autogen.ast_tree_travel.logger.warning')
+    mock_debug = mocker.patch('mock_autogen.ast_tree_travel.logger.debug')
+    self = mocker.MagicMock(name='self')
+    self.warnings = []
+    self.source_code = None
+    self.traced_failures = set()
+
+    for _ in range(3):
+        node_visit_func(self, ast.Pass())
+    node_visit_func_stop_there(self, ast.Pass())
+
+    assert [{'exc_info': True}, {'exc_info': True}] == [
+        kwargs for _, kwargs in mock_warning.call_args_list]
+    assert [("%s", self.warnings[1]), ("%s", self.warnings[2])] == [
+        args for args, _ in mock_debug.call_args_list]
+    assert 4 == len(self.warnings)
+
+
+def test_safe_travels_keeps_dispatch_details():
+    assert "a dummy method that might fail" == node_visit_func.travel_action
+    assert node_visit_func.call_generic_visit
+    assert not node_visit_func_stop_there.call_generic_visit
+
+
+def test_stringify_node_path():
+    assert "a.b.c" == _stringify_node_path(
+        ast.parse("a.b.c", mode='eval').body)
+    assert "items" == _stringify_node_path(
+        ast.parse("first, *items = x").body[0].targets[0].elts[1])
+
+
+def test_stringify_node_path_complex_node():
+    node = ast.parse("a().b.c", mode='eval').body
+    try:
+        _stringify_node_path(node)
+        assert False, "should have failed"
+    except CustomTypeError as e:
+        assert isinstance(e.node, ast.Call)
+
+
+def test_stringify_node_path_long_chain():
+    chain = "a" + ".b" * 5000
+    node = ast.Name(id="a", ctx=ast.Load())
+    for _ in range(5000):
+        node = ast.Attribute(value=node, attr="b", ctx=ast.Load())
+
+    assert chain == _stringify_node_path(node)
 
 
 class TestDependencyLister:
+    def test_execute_deeply_nested_code(self):
+        depth = 1500  # deeper than the default recursion limit
+        deps_lister = DependencyLister(multiple_assignments)
+        deps_lister.tree = ast.parse(
+            "def f():\n"
+            "    total = " + " + ".join(["math.sqrt(1)"] * depth) + "\n"
+            "    return os" + ".path" * depth + ".join(total)\n")
+        deps_lister.source_code = None
+
+        deps_lister.execute()
+
+        assert not deps_lister.warnings
+        assert [('tests.sample.code.assignments.math', 'sqrt'),
+                ('tests.sample.code.assignments.os' + '.path' * depth,
+                 'join')] == list(deps_lister.dependencies_found)
+
+    def test_visit_from_handler_keeps_order(self):
+        class OrderLister(DependencyLister):
+            def visit_Assign(self, node):
+                self.visit(node.value)  # visited before the next statement
+
+            def visit_Return(self, node):
+                self.generic_visit(node)
+
+        deps_lister = OrderLister(multiple_assignments)
+        deps_lister.tree = ast.parse("def f():\n"
+                                     "    x = first()\n"
+                                     "    return second()\n")
+        deps_lister.execute()
+
+        assert [('tests.sample.code.assignments', 'first'),
+                ('tests.sample.code.assignments', 'second')] == list(
+                    deps_lister.dependencies_found)
+
+    def test_dispatch_table(self):
+        table = DependencyLister._dispatch_table
+
+        assert (DependencyLister.visit_Call.__wrapped__,
+                "convert a function call into a mock",
+                True) == table[ast.Call]
+        assert (DependencyLister.visit_AnnAssign.__wrapped__,
+                "ignore variable annotated assign", False) == table[ast.AnnAssign]
+        assert (None, None, False) == table[ast.Load]
+        assert ast.BinOp not in table
+
+    def test_dispatch_table_of_subclass(self):
+        class NamesLister(DependencyLister):
+            def visit_Name(self, node):
+                self._add_potential_dependency("name_" + node.id)
+
+        deps_lister = NamesLister(get_square_root_loop).execute()
+
+        assert (NamesLister.visit_Name, None, False) == \
+               NamesLister._dispatch_table[ast.Name]
+        assert [
+            ('tests.sample.code.comprehensions_and_loops', 'name_square'),
+            ('tests.sample.code.comprehensions_and_loops', 'name_x'),
+            ('tests.sample.code.comprehensions_and_loops', 'name_items'),
+            ('tests.sample.code.comprehensions_and_loops.math', 'sqrt'),
+            ('tests.sample.code.comprehensions_and_loops', 'name_math'),
+        ] == list(deps_lister.dependencies_found)
+
+    def test_execute_failure_becomes_warning(self):
+        deps_lister = DependencyLister(multiple_assignments)
+        deps_lister.tree = ast.parse("def f():\n    (a + b).c()\n")
+        deps_lister.source_code = None
+
+        deps_lister.execute()
+
+        assert 1 == len(deps_lister.warnings)
+        assert str(deps_lister.warnings[0]).startswith(
+            "# could not convert a function call into a mock on node:")
+        assert [('tests.sample.code.assignments', 'a'),
+                ('tests.sample.code.assignments', 'b')] == list(
+                    deps_lister.dependencies_found)
+
+    def test_execute_keeps_distinct_candidates_only(self):
+        deps_lister = DependencyLister(multiple_assignments)
+        deps_lister.tree = ast.parse("def f(local):\n" +
+                                     "    local.strip()\n" * 1000 +
+                                     "    os.path.join(local, os.sep)\n" * 1000)
+
+        deps_lister.execute()
+
+        assert {
+            'local.strip': ('local', 'strip'),
+            'local': ('local', ),
+            'os.path.join': ('os', 'path.join'),
+            'os': ('os', ),
+        } == deps_lister.potential_dependencies
+        assert [('tests.sample.code.assignments.os.path', 'join')
+                ] == list(deps_lister.dependencies_found)
+        assert deps_lister.tree is None
+        assert deps_lister.source_code is None
+
     def test_execute_for_loop_single_variable(self):
         expected_mocked_functions = [
             ('tests.sample.code.comprehensions_and_loops.math', 'sqrt')
@@ -286,3 +451,32 @@ class TestDependencyLister:
         assert not deps_lister.warnings
         assert expected_mocked_functions == list(
             deps_lister.dependencies_found)
+
+    def test_execute_root_is_a_whole_segment(self):
+        deps_lister = DependencyLister(multiple_assignments)
+        deps_lister.tree = ast.parse("def f():\n"
+                                     "    foo.bar()\n"
+                                     "    foo.barbaz()\n"
+                                     "    foo.baz.qux()\n")
+
+        deps_lister.execute()
+
+        assert [('tests.sample.code.assignments.foo', 'bar'),
+                ('tests.sample.code.assignments.foo', 'barbaz'),
+                ('tests.sample.code.assignments.foo.baz', 'qux')] == list(
+                    deps_lister.dependencies_found)
+
+
+def test_filter_root_mocks_keeps_order():
+    dependencies = OrderedDict([
+        (('m', 'os'), 'm.os'),
+        (('m.os', 'remove'), 'm.os.remove'),
+        (('m', 'osx'), 'm.osx'),
+        (('m.os.path', 'join'), 'm.os.path.join'),
+        (('m.os', 'path'), 'm.os.path'),
+        (('m', 'len'), 'm.len'),
+    ])
+
+    assert [('m.os', 'remove'), ('m', 'osx'), ('m.os.path', 'join'),
+            ('m', 'len')] == list(
+                DependencyLister._filter_root_mocks(dependencies))
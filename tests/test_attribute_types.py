@@ -0,0 +1,99 @@
+import pytest
+
+from mock_autogen.analysis import engines
+from mock_autogen.attribute_types import instance_attribute_types, \
+    method_attribute_types
+from tests.sample.code.instance_attributes import Repository, \
+    CachedRepository, Client
+from tests.sample.code.tested_module import FirstClass
+
+MODULE = 'tests.sample.code.instance_attributes'
+
+
+def test_instance_attribute_types():
+    assert {
+        'client': MODULE + '.Client',
+        'archive': MODULE + '.zipfile.ZipFile',
+        'cache': MODULE + '.Client',
+        'encoder': MODULE + '.json.JSONEncoder',
+    } == instance_attribute_types(Repository)
+
+
+def test_subclass_overrides_the_types_of_its_bases():
+    index = instance_attribute_types(CachedRepository)
+
+    assert MODULE + '.json.JSONDecoder' == index['client']
+    assert MODULE + '.zipfile.ZipFile' == index['archive']
+
+
+def test_untyped_and_conflicting_attributes_are_not_indexed(load_module):
+    module = load_module('''
+        import collections
+        import json
+        from typing import Union
+
+
+        class Service:
+            def __init__(self, first: Union[json.JSONEncoder, None], second,
+                         third: "json.JSONDecoder | None" = None):
+                self.first = first
+                self.second = second
+                self.third = third
+                self.fourth = json.JSONEncoder()
+                self.fourth = json.JSONDecoder()
+                self.counts = collections.Counter()
+                self.ordered = collections.OrderedDict()
+                self.loader = json.loads
+                self.fifth, self.sixth = json.JSONEncoder(), json.JSONEncoder()
+        ''')
+
+    # `OrderedDict` is implemented in C, its attributes can't be patched
+    assert {
+        'first': module.__name__ + '.json.JSONEncoder',
+        'third': module.__name__ + '.json.JSONDecoder',
+        'counts': module.__name__ + '.collections.Counter',
+    } == instance_attribute_types(module.Service)
+
+
+def test_method_attribute_types():
+    assert instance_attribute_types(Repository) == method_attribute_types(
+        Repository.__new__(Repository).load)
+    assert {} == method_attribute_types(Repository.create)
+    assert {} == method_attribute_types(Repository.load)
+    assert {} == method_attribute_types(FirstClass.increase_global_counter)
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_calls_on_attributes_patch_their_types(engine):
+    deps_lister = engines[engine](Repository.__new__(Repository).load)
+    deps_lister.execute()
+
+    assert [(MODULE + '.Client', 'get'),
+            (MODULE + '.Repository.logger', 'info'),
+            (MODULE + '.Repository.name', 'upper'),
+            (MODULE + '.Client', 'put'),
+            (MODULE + '.json.JSONEncoder', 'encode'),
+            (MODULE + '.zipfile.ZipFile', 'read'),
+            (MODULE + '.Repository.retries', 'bit_length')
+            ] == list(deps_lister.dependencies_found)
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_class_is_not_a_dependency_of_typed_attribute_calls(engine):
+    repository = CachedRepository.__new__(CachedRepository)
+    deps_lister = engines[engine](repository.refresh).execute()
+
+    assert [(MODULE + '.json.JSONDecoder', 'decode'),
+            (MODULE + '.Client', 'get')] == list(deps_lister.dependencies_found)
+
+
+def test_patching_the_type_patches_the_attribute(mocker):
+    repository = Repository.__new__(Repository)
+    repository.client = Client()
+    deps_lister = engines['ast'](repository.load).execute()
+    path, name = list(deps_lister.dependencies_found)[0]
+
+    mock_get = mocker.patch(path + '.' + name)
+
+    assert mock_get.return_value == repository.client.get("key")
+    mock_get.assert_called_once_with("key")
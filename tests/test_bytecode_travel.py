@@ -0,0 +1,162 @@
+import pytest
+
+import mock_autogen.analysis
+from mock_autogen.analysis import list_dependencies, dependency_cache
+from mock_autogen.ast_tree_travel import DependencyLister
+from mock_autogen.bytecode_travel import BytecodeDependencyLister
+from tests.sample.code.assignments import split_list, multiple_assignments, \
+    annotated_assignments
+from tests.sample.code.comprehensions_and_loops import get_square_root, \
+    get_square_root_loop, get_square_root_external_variable, \
+    summarize_environ_values, summarize_environ_values_loop
+from tests.sample.code.lambdas import simple_func_using_lambdas
+from tests.sample.code.tested_module import FirstClass, os_remove_wrap, \
+    base_64_whole_modules
+from tests.sample.code.with_statements import simple_context, \
+    outside_lock_context, inside_lock_context, \
+    multiple_contexts_different_methods
+
+
+@pytest.mark.parametrize('mocked', [
+    split_list, multiple_assignments, annotated_assignments, get_square_root,
+    get_square_root_loop, get_square_root_external_variable,
+    summarize_environ_values, summarize_environ_values_loop,
+    simple_func_using_lambdas, simple_context, outside_lock_context,
+    inside_lock_context, multiple_contexts_different_methods, os_remove_wrap,
+    base_64_whole_modules,
+    FirstClass(1).using_not_implemented
+])
+def test_same_dependencies_as_ast_engine(mocked):
+    expected = DependencyLister(mocked).execute()
+    deps_lister = BytecodeDependencyLister(mocked).execute()
+
+    assert not deps_lister.warnings
+    assert list(expected.dependencies_found) == list(
+        deps_lister.dependencies_found)
+
+
+def test_decorators_are_not_dependencies():
+    deps_lister = BytecodeDependencyLister(
+        FirstClass.increase_class_counter).execute()
+
+    assert [('tests.sample.code.tested_module', 'get_random_number'),
+            ('tests.sample.code.tested_module.FirstClass',
+             'increase_global_counter')
+            ] == list(deps_lister.dependencies_found)
+
+
+def test_without_source_code(load_module):
+    module = load_module('''
+        import os
+
+
+        def remove_all(paths, **kwargs):
+            for path in paths:
+                os.remove(path, **kwargs)
+            return [os.path.basename(path) for path in paths]
+        ''',
+                         source_file=False)
+
+    with pytest.raises(OSError):
+        DependencyLister(module.remove_all)
+    deps_lister = BytecodeDependencyLister(module.remove_all).execute()
+
+    assert [(module.__name__ + '.os', 'remove'),
+            (module.__name__ + '.os.path', 'basename')
+            ] == list(deps_lister.dependencies_found)
+
+
+def test_calls_with_star_and_keyword_arguments(load_module):
+    module = load_module('''
+        import json
+        import logging
+
+
+        def dump(items, *args):
+            logging.getLogger(__name__).info("dumping", *args)
+            return json.dumps(items, indent=2), json.JSONEncoder
+        ''',
+                         source_file=False)
+
+    deps_lister = BytecodeDependencyLister(module.dump).execute()
+
+    assert [(module.__name__ + '.logging', 'getLogger'),
+            (module.__name__, '__name__'), (module.__name__ + '.json', 'dumps')
+            ] == list(deps_lister.dependencies_found)
+
+
+def test_local_imports(load_module):
+    load_module('', name='package', source_file=False)
+    load_module('VALUE = 1', name='package.sibling', source_file=False)
+    module = load_module('''
+        def read(path):
+            import os.path
+            import xml.etree.ElementTree as ET
+            from json import loads as parse
+            from .sibling import VALUE
+            return parse(ET.parse(os.path.abspath(path)).getroot().text), VALUE
+        ''',
+                         name='package.reader',
+                         source_file=False)
+
+    deps_lister = BytecodeDependencyLister(module.read).execute()
+
+    assert not deps_lister.warnings
+    assert [('json', 'loads'), ('xml.etree.ElementTree', 'parse'),
+            ('os.path', 'abspath'), ('package.sibling', 'VALUE')
+            ] == list(deps_lister.dependencies_found)
+
+
+def test_nested_functions_and_closures(load_module):
+    module = load_module('''
+        import math
+
+
+        def outer(scale):
+            def inner(values):
+                return sorted(values, key=lambda v: math.floor(v * scale))
+            return inner
+        ''',
+                         source_file=False)
+
+    deps_lister = BytecodeDependencyLister(module.outer(2)).execute()
+
+    # the closure variable is in the module, like the ast engine assumes
+    assert [(module.__name__, 'sorted'), (module.__name__ + '.math', 'floor'),
+            (module.__name__, 'scale')] == list(deps_lister.dependencies_found)
+
+
+def test_unresolved_relative_import_is_a_warning(load_module):
+    module = load_module('''
+        def read():
+            from ..missing import VALUE
+            return VALUE
+        ''',
+                         source_file=False)
+
+    deps_lister = BytecodeDependencyLister(module.read).execute()
+
+    assert 1 == len(deps_lister.warnings)
+    assert deps_lister.warnings[0].startswith(
+        "# could not resolve relative import of: ..missing")
+
+
+def test_list_dependencies_with_disk_cache(mocker, tmp_path, load_module):
+    module = load_module('''
+        import os
+
+
+        def remove(path):
+            os.remove(path)
+        ''',
+                         source_file=False)
+    mocker.patch('mock_autogen.analysis.disk_cache', new=None)
+    mock_autogen.analysis.enable_disk_cache(str(tmp_path))
+    dependency_cache.clear()
+
+    result = list_dependencies(module.remove, engine='bytecode')
+    dependency_cache.clear()
+
+    assert ((module.__name__ + '.os', 'remove'), ) == result.dependencies
+    assert result == list_dependencies(module.remove, engine='bytecode')
+    assert 1 == len(list(tmp_path.glob('*.json')))
@@ -0,0 +1,152 @@
+import gc
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_autogen.cache import FunctionCache, CacheInfo, DiskCache
+from tests.sample.code.tested_module import add, FirstClass
+
+
+def _make_function():
+    def created_function():
+        return 1
+
+    return created_function
+
+
+class TestFunctionCache:
+    def test_get_missing(self):
+        cache = FunctionCache()
+
+        assert cache.get(add, ('options', )) is None
+        assert 'default' == cache.get(add, ('options', ), 'default')
+        assert CacheInfo(0, 2, 256, 0) == cache.cache_info()
+
+    def test_put_and_get(self):
+        cache = FunctionCache()
+        cache.put(add, ('options', ), 'value')
+
+        assert 'value' == cache.get(add, ('options', ))
+        assert cache.get(add, ('other options', )) is None
+        assert CacheInfo(1, 1, 256, 1) == cache.cache_info()
+
+    def test_bound_methods_use_the_function(self):
+        cache = FunctionCache()
+        cache.put(FirstClass(1).not_implemented, (), 'value')
+
+        assert 'value' == cache.get(FirstClass(2).not_implemented, ())
+        assert 'value' == cache.get(FirstClass.not_implemented, ())
+
+    def test_lru_eviction(self):
+        cache = FunctionCache(maxsize=2)
+        cache.put(add, (1, ), 'first')
+        cache.put(add, (2, ), 'second')
+        assert 'first' == cache.get(add, (1, ))  # now the most recent
+
+        cache.put(add, (3, ), 'third')
+
+        assert 2 == len(cache)
+        assert 'first' == cache.get(add, (1, ))
+        assert cache.get(add, (2, )) is None
+        assert 'third' == cache.get(add, (3, ))
+
+    def test_entries_are_released_with_the_function(self):
+        cache = FunctionCache()
+        created_function = _make_function()
+        cache.put(created_function, (), 'value')
+        assert 1 == len(cache)
+
+        del created_function
+        gc.collect()
+
+        assert 0 == len(cache)
+        assert {} == cache._keys_by_function
+
+    def test_replaced_code_is_a_miss(self):
+        cache = FunctionCache()
+        created_function = _make_function()
+        cache.put(created_function, (), 'value')
+
+        created_function.__code__ = add.__code__
+
+        assert cache.get(created_function, ()) is None
+
+    def test_clear(self):
+        cache = FunctionCache()
+        cache.put(add, (), 'value')
+        cache.get(add, ())
+
+        cache.clear()
+
+        assert CacheInfo(0, 0, 256, 0) == cache.cache_info()
+
+
+class TestDiskCache:
+    def test_put_and_get(self, tmp_path):
+        cache = DiskCache(str(tmp_path / 'cache'), version='1.0')
+        key = cache.key('source', ('options', ))
+
+        assert cache.get(key) is None
+        cache.put(key, {'dependencies': [['path', 'name']]})
+
+        assert {'dependencies': [['path', 'name']]} == cache.get(key)
+        assert {'dependencies': [['path', 'name']]} == DiskCache(
+            str(tmp_path / 'cache'), version='1.0').get(key)
+
+    def test_key_depends_on_parts_and_version(self, tmp_path):
+        cache = DiskCache(str(tmp_path), version='1.0')
+
+        assert cache.key('source', 1) == cache.key('source', 1)
+        assert cache.key('source', 1) != cache.key('source', 2)
+        assert cache.key('source', 1) != cache.key('other source', 1)
+        assert cache.key('source', 1) != DiskCache(str(tmp_path),
+                                                   version='2.0').key(
+                                                       'source', 1)
+
+    def test_default_version(self, tmp_path):
+        import mock_autogen
+        assert mock_autogen.__version__ == DiskCache(str(tmp_path)).version
+
+    def test_corrupted_entry_is_a_miss(self, tmp_path):
+        cache = DiskCache(str(tmp_path))
+        key = cache.key('source')
+        (tmp_path / (key + '.json')).write_text('{"not": "json')
+
+        assert 'default' == cache.get(key, 'default')
+
+    def test_lru_eviction(self, tmp_path):
+        cache = DiskCache(str(tmp_path), max_size=30)
+        cache.put('first', 'a' * 10)  # 12 bytes with the JSON quotes
+        cache.put('second', 'b' * 10)
+        os.utime(str(tmp_path / 'first.json'), ns=(1, 1))
+        os.utime(str(tmp_path / 'second.json'), ns=(2, 2))
+        cache.get('first')  # now the most recently used
+
+        cache.put('third', 'c' * 10)
+
+        assert 'a' * 10 == cache.get('first')
+        assert cache.get('second') is None
+        assert 'c' * 10 == cache.get('third')
+
+    def test_clear(self, tmp_path):
+        cache = DiskCache(str(tmp_path))
+        cache.put('first', 1)
+
+        cache.clear()
+
+        assert cache.get('first') is None
+        assert ['.lock'] == os.listdir(str(tmp_path))
+
+    def test_parallel_writers(self, tmp_path):
+        cache = DiskCache(str(tmp_path), max_size=2000)
+
+        def write(index):
+            other_cache = DiskCache(str(tmp_path), max_size=2000)
+            other_cache.put(f'key{index % 5}', [index] * 50)
+            return cache.get(f'key{index % 5}')
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(write, range(40)))
+
+        assert all(isinstance(result, list) for result in results)
+        assert not [name for name in os.listdir(str(tmp_path))
+                    if name.endswith('.tmp')]
@@ -1,10 +1,13 @@
 import re
 import sys
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
+import mock_autogen
 import mock_autogen.generator
+import mock_autogen.matchers
 import tests.sample.code.tested_module
 import tests.sample.code.second_module
 from tests.sample.code.comprehensions_and_loops import get_square_root, \
@@ -1243,6 +1246,23 @@ def test_generate_asserts_add_multiple_calls(mock_functions_only_collection):
     exec(generated)  # verify the validity of assertions
 
 
+def test_generate_asserts_interleaved_calls(mocker):
+    mock_obj = mocker.MagicMock()
+    mock_obj.read(1)
+    mock_obj.session.get('/a')
+    mock_obj.read(2)
+    mock_obj.session.get('/b')
+    mock_obj.close()
+
+    generated = mock_autogen.generator.generate_asserts(mock_obj)
+    assert 'from mock import call\n\n' \
+           "mock_obj.read.assert_has_calls(calls=[call(1),call(2),])\n" \
+           "mock_obj.session.get.assert_has_calls(" \
+           "calls=[call('/a'),call('/b'),])\n" \
+           "mock_obj.close.assert_called_once_with()\n" == generated
+    exec(generated)  # verify the validity of assertions
+
+
 def test_generate_asserts_spy_object(mocker):
     my_spy = mocker.spy(tests.sample.code.tested_module, "add")
 
@@ -1479,6 +1499,152 @@ def test_generate_asserts_invalid_object():
         mock_autogen.generator.generate_asserts('not a mock')
 
 
+def test__param_string_default_repr():
+    second = tests.sample.code.tested_module.SecondClass(42)
+    default_repr = re.sub('[^0-9a-zA-Z.]+', '_', object.__repr__(second))
+
+    assert "1, " + default_repr + ", key=" + default_repr == \
+           mock_autogen.generator._param_string((1, second), {'key': second})
+    assert "[" + default_repr + "]" == \
+           mock_autogen.generator._param_string(([second], ), {})
+
+
+def test__param_string_default_repr_not_merged_with_other_params():
+    second = tests.sample.code.tested_module.SecondClass(42)
+    default_repr = re.sub('[^0-9a-zA-Z.]+', '_', object.__repr__(second))
+
+    assert "'<b>', " + default_repr == \
+           mock_autogen.generator._param_string(('<b>', second), {})
+
+
+def test__param_string_custom_repr():
+    assert "'object at 0x1', a=[1, 2]" == \
+           mock_autogen.generator._param_string(('object at 0x1', ),
+                                                {'a': [1, 2]})
+
+
+def test_generate_asserts_renders_every_argument_once(mocker):
+    class Config:
+        renders = 0
+
+        def __repr__(self):
+            Config.renders += 1
+            return 'Config()'
+
+    config = Config()
+    mock_obj = mocker.MagicMock()
+    for index in range(3):
+        mock_obj.load(config, index=index)
+    mock_obj.save(config)
+
+    generated = mock_autogen.generator.generate_asserts(mock_obj)
+    assert 'from mock import call\n\n' \
+           "mock_obj.load.assert_has_calls(calls=[call(Config(), index=0)," \
+           "call(Config(), index=1),call(Config(), index=2),])\n" \
+           "mock_obj.save.assert_called_once_with(Config())\n" == generated
+    assert 1 == Config.renders
+
+
+def test__param_renderer_changed_size():
+    render = mock_autogen.generator._ParamRenderer()
+    values = [1, 2]
+
+    first = render(values)
+    assert first is render(values)
+    values.append(3)
+    assert '[1, 2, 3]' == render(values)
+
+
+def test__param_renderer_interned():
+    render = mock_autogen.generator._ParamRenderer()
+    assert render(['a' * 100]) is render(['a' * 100])
+
+
+def test__param_renderer_mock_size_not_asked(mocker):
+    mock_obj = mocker.MagicMock()
+    mock_autogen.generator._ParamRenderer()(mock_obj)
+    assert not mock_obj.__len__.called
+
+
+def test__param_renderer_max_size():
+    render = mock_autogen.generator._ParamRenderer(max_size=10)
+
+    assert "'short'" == render('short')
+    assert not render.imports
+    assert repr(mock_autogen.matchers.Digest.of('long' * 10)) == \
+           render('long' * 10)
+    assert {('mock_autogen.matchers', 'Digest')} == render.imports
+
+
+def test_generate_asserts_large_arguments(mocker):
+    mock_obj = mocker.MagicMock()
+    payload = bytes(range(256)) * 10
+    mock_obj.upload(payload, metadata={'name': 'x' * 100})
+    mock_obj.upload(b'small', metadata={})
+
+    generated = mock_autogen.generator.generate_asserts(mock_obj,
+                                                        max_repr_size=50)
+    assert re.match(
+        r"^from mock import call\n"
+        r"from mock_autogen.matchers import Digest\n\n"
+        r"mock_obj.upload.assert_has_calls\(calls=\["
+        r"call\(Digest\('bytes', 2560, '[0-9a-f]{64}'\), "
+        r"metadata=Digest\('dict', 1, '[0-9a-f]{64}'\)\),"
+        r"call\(b'small', metadata={}\),\]\)\n$", generated)
+    exec(generated)  # verify the validity of assertions
+
+
+def test_generate_asserts_numpy_arguments(mocker):
+    numpy = pytest.importorskip('numpy')
+    mock_obj = mocker.MagicMock()
+    mock_obj.fit(numpy.arange(10000, dtype='<f8').reshape(100, 100),
+                 labels=numpy.zeros(3, dtype='<i4'))
+
+    generated = mock_autogen.generator.generate_asserts(mock_obj)
+    assert re.match(
+        r"^from mock_autogen.matchers import ArrayDigest\n\n"
+        r"mock_obj.fit.assert_called_once_with\("
+        r"ArrayDigest\(\(100, 100\), '<f8', '[0-9a-f]{64}'\), "
+        r"labels=ArrayDigest\(\(3,\), '<i4', '[0-9a-f]{64}'\)\)\n$",
+        generated)
+    exec(generated)  # verify the validity of assertions
+
+
+def test_generate_asserts_pandas_arguments(mocker):
+    pandas = pytest.importorskip('pandas', minversion='2.1')
+    mock_obj = mocker.MagicMock()
+    mock_obj.save(pandas.DataFrame({'a': range(1000), 'b': ['x'] * 1000}))
+
+    generated = mock_autogen.generator.generate_asserts(mock_obj)
+    assert re.match(
+        r"^from mock_autogen.matchers import FrameDigest\n\n"
+        r"mock_obj.save.assert_called_once_with\("
+        r"FrameDigest\('DataFrame', \(1000, 2\), '[0-9a-f]{64}'\)\)\n$",
+        generated)
+    exec(generated)  # verify the validity of assertions
+
+
+def test_generate_asserts_unlimited_arguments(mocker):
+    mock_obj = mocker.MagicMock()
+    mock_obj.upload('x' * 5000)
+
+    generated = mock_autogen.generator.generate_asserts(mock_obj)
+    assert "mock_obj.upload.assert_called_once_with('" + 'x' * 5000 + \
+           "')\n" == generated
+
+
+def test_generate_asserts_below_max_repr_size_unchanged(mocker):
+    mock_obj = mocker.MagicMock()
+    mock_obj.upload('x' * 4000, metadata={'name': 'x' * 50})
+    mock_obj.upload(b'small')
+
+    generated = mock_autogen.generator.generate_asserts(
+        mock_obj, max_repr_size=mock_autogen.generator.MAX_REPR_SIZE)
+    assert mock_autogen.generator.generate_asserts(mock_obj) == generated
+    assert 'Digest' not in generated
+    exec(generated)  # verify the validity of assertions
+
+
 def test__single_call_to_generate_asserts():
     assert "mock_autogen.generate_asserts(mock_name, name='mock_name')\n" == \
            mock_autogen.generator._single_call_to_generate_asserts("mock_name", "mock_autogen")
@@ -1614,3 +1780,21 @@ mocker.patch('fourth.first_function', new=mock_first_function_3)
         prepare_asserts_calls, include_mock_autogen_import, mock_autogen_alias)
 
     assert expected == generated
+
+
+def test_generate_mocks_and_asserts_from_many_threads(mocker):
+    def generate(_):
+        mock_obj = mocker.MagicMock(name='obj')
+        mock_obj.method(1, key='value')
+        mock_obj.method(2)
+        with mock_autogen.suppress_output():
+            return mock_autogen.generate_uut_mocks_with_asserts(
+                tests.sample.code.tested_module.base_64_whole_modules), \
+                   mock_autogen.generator.generate_asserts(mock_obj,
+                                                           name='mock_obj')
+
+    expected = generate(0)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(generate, range(64)))
+
+    assert [expected] * 64 == results
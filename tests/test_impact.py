@@ -0,0 +1,87 @@
+import json
+import os
+
+import pytest
+
+import mock_autogen
+from mock_autogen.impact import ImpactIndex, affected_tests, \
+    IMPACT_INDEX_VARIABLE
+from tests.sample.code.tested_module import os_remove_wrap, \
+    get_random_number, process_and_zip, second_dir
+
+MODULE = 'tests.sample.code.tested_module'
+
+
+@pytest.fixture
+def index_path(tmp_path, monkeypatch):
+    path = str(tmp_path / 'impact' / 'index.json')
+    monkeypatch.setenv(IMPACT_INDEX_VARIABLE, path)
+    return path
+
+
+def test_record_and_query(tmp_path):
+    index = ImpactIndex(str(tmp_path / 'index.json'))
+    index.record('app:remove', [(MODULE + '.os', 'remove')],
+                 'tests/test_a.py::a')
+    index.record('app:remove', [(MODULE + '.os', 'remove')],
+                 'tests/test_b.py::b')
+    index.record('app:dump', [('json', 'dumps')], 'tests/test_b.py::c')
+    index.record('app.sub:walk', [('app.sub.os', 'walk')],
+                 'tests/test_b.py::d')
+
+    assert ['tests/test_a.py::a',
+            'tests/test_b.py::b'] == index.affected_tests(['os'])
+    assert ['tests/test_b.py::c'] == index.affected_tests(['json.encoder',
+                                                           'json'])
+    assert ['tests/test_b.py::d'] == index.affected_tests(['app.sub'])
+    assert ['tests/test_a.py::a', 'tests/test_b.py::b'
+            ] == index.affected_tests(['tests.sample.code'])
+    assert 4 == len(index.affected_tests(['app', 'tests', 'json']))
+    assert [] == index.affected_tests(['ap', 'app.sub.o', 'zipfile'])
+
+
+def test_record_is_idempotent(tmp_path):
+    index = ImpactIndex(str(tmp_path / 'index.json'))
+    index.record('app:remove', [('app.os', 'remove')], 'tests/test_a.py::a')
+    content = (tmp_path / 'index.json').read_text()
+
+    index.record('app:remove', [('app.os', 'remove')], 'tests/test_a.py::a')
+
+    assert content == (tmp_path / 'index.json').read_text()
+
+
+def test_generate_mocks_records_current_test(index_path):
+    mock_autogen.generate_uut_mocks(os_remove_wrap)
+    mock_autogen.generate_uut_mocks(process_and_zip)
+    mock_autogen.generate_uut_mocks(second_dir)
+
+    this_test = os.environ['PYTEST_CURRENT_TEST'].rsplit(' ', 1)[0]
+    assert [this_test] == affected_tests(['os'])
+    assert [this_test] == affected_tests(['zipfile'])
+    assert [this_test] == affected_tests(['tests.sample.code.second_module'])
+    assert [] == affected_tests(['random'])
+    with open(index_path) as index_file:
+        assert {
+            MODULE + ':os_remove_wrap': [this_test],
+            MODULE + ':process_and_zip': [this_test],
+            MODULE + ':second_dir': [this_test]
+        } == json.load(index_file)['tests']
+
+
+def test_nothing_recorded_without_variable(index_path, monkeypatch):
+    monkeypatch.delenv(IMPACT_INDEX_VARIABLE)
+
+    mock_autogen.generate_uut_mocks(get_random_number)
+
+    assert not os.path.exists(index_path)
+    with pytest.raises(ValueError):
+        affected_tests(['random'])
+
+
+def test_nothing_recorded_outside_tests(index_path, monkeypatch):
+    monkeypatch.delenv('PYTEST_CURRENT_TEST')
+
+    mock_autogen.generate_uut_mocks(get_random_number)
+
+    assert not os.path.exists(index_path)
+    assert [] == affected_tests(['random'])
@@ -0,0 +1,196 @@
+import os
+import subprocess
+import textwrap
+
+import mock_autogen.incremental
+from mock_autogen.incremental import iter_module_functions, \
+    function_fingerprint, regenerate, changed_files, MANIFEST_NAME
+from tests.sample.code import instance_attributes
+
+MODULE_SOURCE = textwrap.dedent('''
+    import os
+
+
+    def remove(path):
+        os.remove(path)
+
+
+    def join(path, name):
+        return os.path.join(path, name)
+
+
+    class Files:
+        def __init__(self, root):
+            self.root = root
+
+        def exists(self, name):
+            return os.path.exists(join(self.root, name))
+
+        @staticmethod
+        def separator():
+            return os.sep.upper()
+
+        @classmethod
+        def create(cls):
+            return cls(os.getcwd())
+    ''')
+
+
+def _read(directory):
+    return {
+        path.name: path.read_text()
+        for path in sorted(directory.iterdir())
+    }
+
+
+def test_iter_module_functions(load_module):
+    module = load_module(MODULE_SOURCE, 'incremental_sample')
+
+    functions = list(iter_module_functions(module))
+
+    assert [
+        'Files.__init__', 'Files.create', 'Files.exists', 'Files.separator',
+        'join', 'remove'
+    ] == [qualname for qualname, _ in functions]
+    functions = dict(functions)
+    assert isinstance(functions['Files.exists'].__self__, module.Files)
+    assert module.Files is functions['Files.create'].__self__
+    assert module.Files.separator is functions['Files.separator']
+
+
+def test_fingerprint_ignores_formatting(load_module):
+    module = load_module(MODULE_SOURCE, 'incremental_sample')
+    fingerprint = function_fingerprint(module.remove)
+
+    module = load_module(
+        MODULE_SOURCE.replace('def remove(path):',
+                              '# removes the file\n\n\ndef remove( path ):'),
+        'incremental_sample')
+    assert fingerprint == function_fingerprint(module.remove)
+    assert fingerprint != function_fingerprint(module.remove,
+                                               engine='bytecode')
+
+    module = load_module(MODULE_SOURCE.replace('os.remove', 'os.unlink'),
+                         'incremental_sample')
+    assert fingerprint != function_fingerprint(module.remove)
+
+
+def test_fingerprint_of_method_includes_init():
+    first = function_fingerprint(
+        instance_attributes.Repository.__new__(
+            instance_attributes.Repository).load)
+
+    assert first != function_fingerprint(instance_attributes.Repository.load)
+
+
+def test_fingerprint_of_method_includes_bases_init(load_module):
+    source = textwrap.dedent('''
+        import json
+
+
+        class Base:
+            def __init__(self):
+                self.client = json.JSONEncoder()
+
+
+        class Derived(Base):
+            def dump(self, value):
+                return self.client.encode(value)
+        ''')
+    module = load_module(source, 'incremental_sample')
+    fingerprint = function_fingerprint(
+        module.Derived.__new__(module.Derived).dump)
+
+    module = load_module(source.replace('JSONEncoder', 'JSONDecoder'),
+                         'incremental_sample')
+    assert fingerprint != function_fingerprint(
+        module.Derived.__new__(module.Derived).dump)
+
+
+def test_regenerate_only_changed_functions(load_module, tmp_path):
+    output = tmp_path / 'mocks'
+    module = load_module(MODULE_SOURCE, 'incremental_sample')
+
+    regenerated = regenerate([module], str(output))
+    assert 6 == len(regenerated)
+    first_run = _read(output)
+    assert "mocker.patch('incremental_sample.os.remove'," in \
+        first_run['incremental_sample.remove.py']
+
+    module = load_module(MODULE_SOURCE + '\n# just a comment\n',
+                         'incremental_sample')
+    assert [] == regenerate([module], str(output))
+    assert first_run == _read(output)
+
+    module = load_module(
+        MODULE_SOURCE.replace('os.remove', 'os.unlink').replace(
+            'def join(path, name):\n    return os.path.join(path, name)\n',
+            ''), 'incremental_sample')
+    assert ['incremental_sample:remove'] == regenerate([module], str(output))
+
+    second_run = _read(output)
+    assert 'incremental_sample.join.py' not in second_run
+    assert 'incremental_sample:join' not in second_run[MANIFEST_NAME]
+    assert "mocker.patch('incremental_sample.os.unlink'," in \
+        second_run['incremental_sample.remove.py']
+    assert first_run['incremental_sample.Files.exists.py'] == \
+        second_run['incremental_sample.Files.exists.py']
+
+
+def test_regenerate_missing_artifact(load_module, tmp_path):
+    output = tmp_path / 'mocks'
+    module = load_module(MODULE_SOURCE, 'incremental_sample')
+    regenerate([module], str(output))
+    os.remove(str(output / 'incremental_sample.join.py'))
+
+    assert ['incremental_sample:join'] == regenerate([module], str(output))
+
+
+def test_regenerate_with_other_options(load_module, tmp_path):
+    output = tmp_path / 'mocks'
+    module = load_module(MODULE_SOURCE, 'incremental_sample')
+    regenerate([module], str(output), prepare_asserts_calls=True)
+    assert 'generate_asserts(' in \
+        _read(output)['incremental_sample.remove.py']
+
+    assert 6 == len(
+        regenerate([module], str(output), prepare_asserts_calls=False))
+    assert 'generate_asserts(' not in \
+        _read(output)['incremental_sample.remove.py']
+    assert [] == regenerate([module], str(output),
+                            prepare_asserts_calls=False)
+
+
+def test_options_hash_of_callables():
+    options_hash = mock_autogen.incremental._options_hash
+
+    assert options_hash({'sample_call': lambda: 1}) == \
+        options_hash({'sample_call': lambda: 2})
+    assert options_hash({'sample_call': lambda: 1}) != options_hash({})
+    assert options_hash({'prepare_asserts_calls': True}) != \
+        options_hash({'prepare_asserts_calls': False})
+
+
+def test_regenerate_since_git_revision(load_module, tmp_path, monkeypatch):
+    monkeypatch.chdir(str(tmp_path))
+    for variable in ['GIT_DIR', 'GIT_WORK_TREE', 'GIT_INDEX_FILE']:
+        monkeypatch.delenv(variable, raising=False)
+    output = tmp_path / 'mocks'
+    module = load_module(MODULE_SOURCE, 'incremental_sample')
+    git = ['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com']
+    subprocess.run(git + ['init', '-q'], check=True)
+    subprocess.run(git + ['add', 'incremental_sample.py'], check=True)
+    subprocess.run(git + ['commit', '-q', '-m', 'sample'], check=True)
+
+    assert set() == changed_files('HEAD')
+    assert 6 == len(regenerate([module], str(output), base='HEAD'))
+
+    # unchanged since the revision, not even fingerprinted
+    module.remove = lambda path: None
+    assert [] == regenerate([module], str(output), base='HEAD')
+
+    module = load_module(MODULE_SOURCE.replace('os.remove', 'os.unlink'),
+                         'incremental_sample')
+    assert {str(tmp_path / 'incremental_sample.py')} == changed_files('HEAD')
+    assert ['incremental_sample:remove'
+            ] == regenerate([module], str(output), base='HEAD')
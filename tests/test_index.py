@@ -0,0 +1,89 @@
+import pytest
+
+from mock_autogen.analysis import list_dependencies
+from mock_autogen.index import DependencyIndex, write_index, export_index
+from tests.sample.code import tested_module
+
+MODULE = 'tests.sample.code.tested_module'
+
+DEPENDENCIES = {
+    'app:remove': [('app.os', 'remove'), ('app.os.path', 'exists')],
+    'app:Files.exists': [('app.os.path', 'exists'), ('app', 'join')],
+    'app:to_json': [('app.json', 'dumps')],
+    'app:osx': [('app.osx', 'version')],
+    'app:unicode_\xe9': [('app.os', 'remove')],
+    'app:pure': [],
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    write_index(str(tmp_path / 'deps.idx'), DEPENDENCIES)
+    with DependencyIndex(str(tmp_path / 'deps.idx')) as index:
+        yield index
+
+
+def test_dependencies(index):
+    # sorted by the dotted path
+    assert [('app.os.path', 'exists'),
+            ('app.os', 'remove')] == index.dependencies('app:remove')
+    assert [('app', 'join'),
+            ('app.os.path', 'exists')] == index.dependencies('app:Files.exists')
+    assert [] == index.dependencies('app:pure')
+    assert [] == index.dependencies('app:missing')
+
+
+def test_functions_by_dependency_prefix(index):
+    assert ['app:Files.exists',
+            'app:remove'] == index.functions('app.os.path.exists')
+    assert ['app:Files.exists', 'app:remove',
+            'app:unicode_\xe9'] == index.functions('app.os')
+    assert ['app:osx'] == index.functions('app.osx')
+    assert 5 == len(index.functions('app'))
+    assert [] == index.functions('app.o')
+    assert [] == index.functions('zzz')
+
+
+def test_function_names(index):
+    assert sorted(DEPENDENCIES) == index.function_names()
+    assert 6 == len(index)
+    assert 'app:pure' in index
+    assert 'app:missing' not in index
+
+
+def test_same_content_same_file(tmp_path):
+    write_index(str(tmp_path / 'first.idx'), DEPENDENCIES)
+    write_index(str(tmp_path / 'second.idx'),
+                dict(reversed(list(DEPENDENCIES.items()))))
+
+    assert (tmp_path / 'first.idx').read_bytes() == \
+        (tmp_path / 'second.idx').read_bytes()
+
+
+def test_empty_index(tmp_path):
+    write_index(str(tmp_path / 'empty.idx'), {})
+
+    with DependencyIndex(str(tmp_path / 'empty.idx')) as index:
+        assert 0 == len(index)
+        assert [] == index.functions('app')
+
+
+def test_not_an_index(tmp_path):
+    (tmp_path / 'empty').write_bytes(b'')
+    (tmp_path / 'text').write_text('not an index file at all')
+
+    for name in ['empty', 'text']:
+        with pytest.raises(ValueError):
+            DependencyIndex(str(tmp_path / name))
+
+
+def test_export_index(tmp_path):
+    export_index([tested_module], str(tmp_path / 'deps.idx'))
+
+    with DependencyIndex(str(tmp_path / 'deps.idx')) as index:
+        assert sorted(
+            list_dependencies(tested_module.os_remove_wrap).dependencies
+        ) == index.dependencies(MODULE + ':os_remove_wrap')
+        assert MODULE + ':FirstClass.using_not_implemented' in index
+        assert [MODULE + ':os_remove_wrap'
+                ] == index.functions(MODULE + '.os.remove')
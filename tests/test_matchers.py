@@ -0,0 +1,160 @@
+import hashlib
+
+import pytest
+
+import mock_autogen.generator
+import mock_autogen.matchers
+from mock_autogen.matchers import ArrayDigest, canonical_bytes, Digest, \
+    FrameDigest, matcher_for, register_renderer
+
+
+@pytest.mark.parametrize('value', [
+    b'\x00\xff' * 100,
+    bytearray(b'data'),
+    'unicode \xe9 \ud800',
+    [1, 'two', (3.0, None)],
+    {'b': [1, 2], 'a': {'nested': {1, 2, 3}}},
+    frozenset(['x', 'y']),
+    42,
+])
+def test_digest_matches_equal_value(value):
+    digest = Digest.of(value)
+    copy = eval(repr(value))
+
+    assert digest == copy
+    assert copy == digest
+    assert not digest != copy
+    assert eval(repr(digest)) == digest
+
+
+def test_digest_fields():
+    digest = Digest.of(b'abc')
+    assert 'bytes' == digest.type_name
+    assert 3 == digest.length
+    assert hashlib.sha256(canonical_bytes(b'abc')).hexdigest() == \
+           digest.sha256
+    assert Digest.of(42).length is None
+
+
+@pytest.mark.parametrize('value, other', [
+    (b'abc', b'abd'),
+    (b'abc', 'abc'),
+    (b'abc', bytearray(b'abc')),
+    ([1, 2], (1, 2)),
+    ([1, 2], [2, 1]),
+    ({'a': 1}, {'a': '1'}),
+    ([['a', 'b']], [['ab']]),
+])
+def test_digest_doesnt_match_other_value(value, other):
+    assert Digest.of(value) != other
+
+
+def test_canonical_bytes_order_independent():
+    assert canonical_bytes({'a': 1, 'b': 2}) == \
+           canonical_bytes({'b': 2, 'a': 1})
+    assert canonical_bytes({3, 'x', (1, 2)}) == \
+           canonical_bytes({(1, 2), 'x', 3})
+
+
+def test_canonical_bytes_recursive_container():
+    values = [1]
+    values.append(values)
+    assert canonical_bytes(values) == canonical_bytes(values)
+    assert Digest.of(values) == values
+
+
+class Point:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class Point3D(Point):
+    pass
+
+
+class PointMatcher:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def __eq__(self, other):
+        return (self.x, self.y) == (other.x, other.y)
+
+    def __repr__(self):
+        return f"PointMatcher({self.x!r}, {self.y!r})"
+
+
+@pytest.fixture
+def point_renderer():
+    register_renderer(__name__, 'Point',
+                      lambda point: PointMatcher(point.x, point.y))
+    yield
+    with mock_autogen.matchers._renderers_lock:
+        del mock_autogen.matchers._renderers[(__name__, 'Point')]
+        mock_autogen.matchers._found_renderers.clear()
+
+
+def test_matcher_for_registered_type(point_renderer):
+    assert PointMatcher(1, 2) == matcher_for(Point(1, 2))
+    assert PointMatcher(1, 2) == matcher_for(Point3D(1, 2))  # a subclass
+    assert matcher_for([Point(1, 2)]) is None
+
+
+def test_generate_asserts_registered_type(mocker, point_renderer):
+    mock_obj = mocker.MagicMock()
+    mock_obj.move(Point(1, 2))
+
+    generated = mock_autogen.generator.generate_asserts(mock_obj)
+    assert 'from tests.test_matchers import PointMatcher\n\n' \
+           'mock_obj.move.assert_called_once_with(PointMatcher(1, 2))\n' == \
+           generated
+    exec(generated)  # verify the validity of assertions
+
+
+def test_array_digest():
+    numpy = pytest.importorskip('numpy')
+    array = numpy.arange(12, dtype='<i8').reshape(3, 4)
+    digest = ArrayDigest.of(array)
+
+    assert digest == array.copy()
+    assert array.copy() == digest  # the array defers to the matcher
+    assert digest == numpy.asfortranarray(array)
+    assert digest != array.astype('<i4')
+    assert digest != array.reshape(4, 3)
+    assert digest != array[::-1]
+    assert digest != array.tolist()
+    assert eval(repr(digest)) == digest
+
+
+def test_array_digest_object_dtype():
+    numpy = pytest.importorskip('numpy')
+    array = numpy.array([{'a': 1}, 'b', None], dtype=object)
+
+    assert ArrayDigest.of(array) == numpy.array([{'a': 1}, 'b', None],
+                                                dtype=object)
+    assert ArrayDigest.of(array) != numpy.array([{'a': 2}, 'b', None],
+                                                dtype=object)
+
+
+def test_frame_digest():
+    pandas = pytest.importorskip('pandas', minversion='2.1')
+    frame = pandas.DataFrame({'a': [1, 2, 3], 'b': ['x', 'y', 'z']})
+    digest = FrameDigest.of(frame)
+
+    assert digest == frame.copy()
+    assert frame.copy() == digest  # the frame defers to the matcher
+    assert digest != frame.rename(columns={'b': 'c'})
+    assert digest != frame.astype({'a': 'float64'})
+    assert digest != frame.iloc[::-1]
+    assert digest != frame['a']
+    assert FrameDigest.of(frame['a']) == frame['a'].copy()
+    assert eval(repr(digest)) == digest
+
+
+def test_frame_rendered_by_repr_before_pandas_2_1(mocker):
+    pandas = pytest.importorskip('pandas')
+    mocker.patch.object(pandas, '__version__', '2.0.3')
+
+    assert matcher_for(pandas.DataFrame({'a': [1, 2]})) is None
+    assert matcher_for(pandas.Series([1, 2])) is None
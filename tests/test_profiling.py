@@ -0,0 +1,90 @@
+import re
+
+import mock_autogen
+from mock_autogen.profiling import profile_dependencies, \
+    select_dependencies, format_cost, DependencyCost
+from tests.sample.code import costs
+
+DEPENDENCIES = [('tests.sample.code.costs', 'cheap_helper'),
+                ('tests.sample.code.costs', 'os'),
+                ('tests.sample.code.costs', 'len'),
+                ('tests.sample.code.costs', 'slow_io'),
+                ('tests.sample.code.costs', 'missing')]
+
+
+def test_profile_dependencies():
+    ranked = profile_dependencies(DEPENDENCIES, lambda: costs.process(1))
+
+    assert ('tests.sample.code.costs', 'slow_io') == ranked[0].dependency
+    assert {('tests.sample.code.costs', 'cheap_helper'),
+            ('tests.sample.code.costs', 'len')
+            } == {cost.dependency for cost in ranked[1:3]}
+    assert [('tests.sample.code.costs', 'os'),
+            ('tests.sample.code.costs', 'missing')
+            ] == [cost.dependency for cost in ranked[3:]]
+    assert ranked[0].cumulative_time >= 0.05
+    assert 1 == ranked[0].calls
+    assert [None, None] == [cost.cumulative_time for cost in ranked[3:]]
+
+
+def test_profile_dependencies_not_called():
+    ranked = profile_dependencies([('tests.sample.code.costs', 'slow_io')],
+                                  lambda: costs.cheap_helper(1))
+
+    assert [DependencyCost(('tests.sample.code.costs', 'slow_io'), 0.0, 0)
+            ] == ranked
+
+
+def test_select_dependencies():
+    ranked = [DependencyCost(('m', 'slow'), 0.5, 1),
+              DependencyCost(('m', 'medium'), 0.01, 3),
+              DependencyCost(('m', 'fast'), 0.0001, 10),
+              DependencyCost(('m', 'unknown'), None, 0)]
+
+    assert ranked == select_dependencies(ranked)
+    assert ranked[:2] == select_dependencies(ranked, slowest=2)
+    assert ranked[:2] == select_dependencies(ranked, min_cumulative_time=0.01)
+    assert ranked[:1] == select_dependencies(ranked, slowest=1,
+                                             min_cumulative_time=0.01)
+
+
+def test_format_cost():
+    assert "# cumulative time: 12.346ms, calls: 3\n" == format_cost(
+        DependencyCost(('m', 'f'), 0.0123456, 3))
+    assert "# cumulative time: not measured\n" == format_cost(
+        DependencyCost(('m', 'f'), None, 0))
+
+
+def test_generate_mocks_slowest():
+    with mock_autogen.suppress_output():
+        generated = mock_autogen.generate_uut_mocks(
+            costs.process, profile_call=lambda: costs.process(1),
+            mock_slowest=1)
+
+    assert re.fullmatch(
+        r"# mocked dependencies\n"
+        r"# cumulative time: \d+\.\d{3}ms, calls: 1\n"
+        r"mock_slow_io = mocker.MagicMock\(name='slow_io'\)\n"
+        r"mocker.patch\('tests.sample.code.costs.slow_io', "
+        r"new=mock_slow_io\)\n", generated)
+
+
+def test_profile_dependencies_local_import():
+    ranked = profile_dependencies(
+        [(None, 'json'), ('tests.sample.code.costs', 'cheap_helper')],
+        lambda: costs.serializer(1))
+
+    assert [('tests.sample.code.costs', 'cheap_helper'), (None, 'json')
+            ] == [cost.dependency for cost in ranked]
+    assert 1 == ranked[0].calls
+    assert ranked[1].cumulative_time is None
+
+
+def test_generate_mocks_profiled_local_import():
+    with mock_autogen.suppress_output():
+        generated = mock_autogen.generate_uut_mocks(
+            costs.serializer, profile_call=lambda: costs.serializer(1))
+
+    assert "mock_cheap_helper = mocker.MagicMock(name='cheap_helper')\n" in \
+        generated
+    assert "mock_json = mocker.MagicMock(name='json')\n" in generated
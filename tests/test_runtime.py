@@ -0,0 +1,110 @@
+import sys
+
+import pytest
+
+import mock_autogen
+import mock_autogen.runtime
+from mock_autogen.runtime import discover_dependencies
+from tests.sample.code import dispatching
+from tests.sample.code.tested_module import FirstClass, os_remove_wrap, \
+    rm_alias, base_64_whole_modules
+
+RECORDERS = [mock_autogen.runtime._record_profiled]
+if sys.version_info >= (3, 13):
+    RECORDERS.append(mock_autogen.runtime._record_monitored)
+
+
+@pytest.fixture(params=RECORDERS, autouse=True)
+def recorder(request, mocker):
+    mocker.patch('mock_autogen.runtime._record_calls', new=request.param)
+
+
+def test_discover_dependencies():
+    result = discover_dependencies(base_64_whole_modules,
+                                   lambda: base_64_whole_modules("message"))
+
+    assert not result.warnings
+    expected = [('tests.sample.code.tested_module.random', 'randint'),
+                ('tests.sample.code.tested_module', 'get_random_number'),
+                ('tests.sample.code.tested_module.os.path', 'isfile'),
+                ('base64', 'b64encode'), ('base64', 'b64decode')]
+    # only sys.monitoring reports creating instances of C classes, like str
+    assert expected == [
+        dependency for dependency in result.dependencies
+        if dependency != ('tests.sample.code.tested_module', 'str')
+    ]
+
+
+def test_discover_dependencies_of_method():
+    instance = FirstClass(1)
+
+    result = discover_dependencies(instance.using_not_implemented,
+                                   instance.using_not_implemented)
+
+    assert ["# the sample call raised: NotImplementedError: "
+            ] == list(result.warnings)
+    assert ('tests.sample.code.tested_module.FirstClass',
+            'not_implemented') == result.dependencies[-1]
+
+
+def test_discover_dependencies_by_used_names(tmp_path):
+    missing = str(tmp_path / 'missing')
+
+    by_module = discover_dependencies(os_remove_wrap,
+                                      lambda: os_remove_wrap(missing))
+    by_alias = discover_dependencies(rm_alias, lambda: rm_alias(missing))
+
+    # the same function, patched where the code looks it up
+    assert (('tests.sample.code.tested_module.os',
+             'remove'), ) == by_module.dependencies
+    assert (('tests.sample.code.tested_module',
+             'os_remove'), ) == by_alias.dependencies
+
+
+def test_discover_dependencies_only_taken_branches(tmp_path):
+    result = discover_dependencies(
+        dispatching.branches,
+        lambda: dispatching.branches(False, str(tmp_path)))
+
+    assert (('tests.sample.code.dispatching.os.path',
+             'isdir'), ) == result.dependencies
+
+
+def test_discover_dependencies_through_getattr_and_dispatch(tmp_path):
+    dynamic = discover_dependencies(
+        dispatching.dynamic,
+        lambda: dispatching.dynamic('isfile', str(tmp_path)))
+    dispatched = discover_dependencies(
+        dispatching.dispatch, lambda: dispatching.dispatch('json', '[1]'))
+
+    assert (('tests.sample.code.dispatching', 'getattr'),
+            ('tests.sample.code.dispatching.os.path',
+             'isfile')) == dynamic.dependencies
+    assert (('tests.sample.code.dispatching.json',
+             'loads'), ) == dispatched.dependencies
+
+
+def test_discover_dependencies_restores_profiler():
+    def profiler(frame, event, arg):
+        pass
+
+    previous = sys.getprofile()
+    sys.setprofile(profiler)
+    try:
+        discover_dependencies(dispatching.dispatch,
+                              lambda: dispatching.dispatch('json', '[1]'))
+        assert profiler is sys.getprofile()
+    finally:
+        sys.setprofile(previous)
+
+
+def test_generate_mocks_with_sample_call(tmp_path):
+    with mock_autogen.suppress_output():
+        generated = mock_autogen.generate_uut_mocks(
+            dispatching.branches,
+            sample_call=lambda: dispatching.branches(True, str(tmp_path)))
+
+    assert "# mocked dependencies\n" \
+           "mock_exists = mocker.MagicMock(name='exists')\n" \
+           "mocker.patch('tests.sample.code.dispatching.os.path.exists', " \
+           "new=mock_exists)\n" == generated
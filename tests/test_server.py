@@ -0,0 +1,207 @@
+import io
+import json
+import threading
+
+import pytest
+
+from mock_autogen.server import Server, PARSE_ERROR, INVALID_REQUEST, \
+    METHOD_NOT_FOUND, INVALID_PARAMS, REQUEST_CANCELLED
+
+MODULE = 'tests.sample.code.tested_module'
+
+
+def _serve(*messages, server=None):
+    lines = [
+        message if isinstance(message, str) else json.dumps(message)
+        for message in messages
+    ]
+    output = io.StringIO()
+    server = server or Server(io.StringIO('\n'.join(lines) + '\n'), output)
+    server.serve()
+    return {
+        response['id']: response
+        for response in map(json.loads,
+                            server.output_stream.getvalue().splitlines())
+    }
+
+
+def _request(request_id, method, **params):
+    return {
+        'jsonrpc': '2.0',
+        'id': request_id,
+        'method': method,
+        'params': params
+    }
+
+
+def test_list_dependencies():
+    responses = _serve(
+        _request(1, 'list_dependencies', target=MODULE + ':os_remove_wrap'),
+        _request(2,
+                 'list_dependencies',
+                 target=MODULE + ':FirstClass.not_implemented',
+                 engine='bytecode'))
+
+    assert {
+        'dependencies': [[MODULE + '.os', 'remove']],
+        'warnings': []
+    } == responses[1]['result']
+    assert {
+        'dependencies': [[MODULE, 'NotImplementedError']],
+        'warnings': []
+    } == responses[2]['result']
+
+
+def test_mock_plan():
+    responses = _serve(
+        _request(1, 'mock_plan', target=MODULE + ':are_in_same_folder'))
+
+    assert [{
+        'path': MODULE + '.os.path',
+        'name': 'dirname',
+        'mock_name': 'mock_dirname'
+    }] == responses[1]['result']['mocks']
+
+
+def test_generate_mocks(capsys):
+    responses = _serve(
+        _request(7,
+                 'generate_mocks',
+                 target=MODULE + ':os_remove_wrap',
+                 prepare_asserts_calls=False))
+
+    assert {
+        'jsonrpc': '2.0',
+        'id': 7,
+        'result': {
+            'code':
+            "# mocked dependencies\n"
+            "mock_remove = mocker.MagicMock(name='remove')\n"
+            f"mocker.patch('{MODULE}.os.remove', new=mock_remove)\n"
+        }
+    } == responses[7]
+    assert "" == capsys.readouterr().out
+
+
+@pytest.mark.parametrize('message, code', [
+    ('{not json', PARSE_ERROR),
+    ('[1, 2]', INVALID_REQUEST),
+    ({
+        'id': None,
+        'method': 'mock_plan'
+    }, INVALID_REQUEST),
+])
+def test_invalid_messages(message, code):
+    responses = _serve(message)
+
+    assert code == responses[None]['error']['code']
+
+
+@pytest.mark.parametrize('request_, code', [
+    (_request(1, 'unknown'), METHOD_NOT_FOUND),
+    (_request(1, 'mock_plan', target='tests.sample.code.missing:f'),
+     INVALID_PARAMS),
+    (_request(1, 'mock_plan', target=MODULE + ':missing'), INVALID_PARAMS),
+    (_request(1, 'mock_plan', target=MODULE), INVALID_PARAMS),
+    (_request(1, 'mock_plan', target=MODULE + ':add', colour=1),
+     INVALID_PARAMS),
+    (_request(1, 'mock_plan', target=1), INVALID_PARAMS),
+    (_request(1, 'generate_mocks', target=[MODULE, 'add']), INVALID_PARAMS),
+    (_request(1, 'generate_mocks', target=MODULE + ':add', colour=1),
+     INVALID_PARAMS),
+    (_request(1, 'generate_mocks', target=MODULE + ':add',
+              sample_call='add(1, 2)'), INVALID_PARAMS),
+])
+def test_errors(request_, code):
+    responses = _serve(request_)
+
+    assert code == responses[1]['error']['code']
+
+
+def test_notifications_are_not_answered():
+    notification = _request(None, 'mock_plan', target=MODULE + ':add')
+    del notification['id']
+
+    assert {} == _serve(notification, {
+        'jsonrpc': '2.0',
+        'method': 'unknown'
+    })
+
+
+@pytest.fixture
+def blocking_server(mocker):
+    """
+    A server with a single worker, whose first request blocks until the
+    requests which follow it were read.
+    """
+    started = threading.Event()
+    release = threading.Event()
+    lines = []
+
+    class Input:
+
+        def __iter__(self):
+            for line in lines:
+                yield line
+                if not started.is_set():
+                    started.wait(5)
+            release.set()
+
+    server = Server(Input(), io.StringIO(), workers=1)
+    list_dependencies = server.methods['list_dependencies']
+
+    def blocking(target, engine='ast'):
+        started.set()
+        release.wait(5)
+        return list_dependencies(target, engine)
+
+    server.methods['list_dependencies'] = blocking
+    yield server, lines
+
+
+def test_cancel_request(blocking_server):
+    server, lines = blocking_server
+    lines.extend(
+        json.dumps(message) + '\n' for message in [
+            _request(1, 'list_dependencies', target=MODULE + ':add'),
+            _request(2, 'mock_plan', target=MODULE + ':add'),
+            _request(3, 'mock_plan', target=MODULE + ':os_remove_wrap'),
+            {
+                'jsonrpc': '2.0',
+                'method': '$/cancelRequest',
+                'params': {
+                    'id': 1
+                }
+            },
+            {
+                'jsonrpc': '2.0',
+                'method': '$/cancelRequest',
+                'params': {
+                    'id': 2
+                }
+            },
+        ])
+
+    responses = _serve(server=server)
+
+    assert REQUEST_CANCELLED == responses[1]['error']['code']
+    assert REQUEST_CANCELLED == responses[2]['error']['code']
+    assert 'result' in responses[3]
+
+
+def test_newer_request_supersedes(blocking_server):
+    server, lines = blocking_server
+    lines.extend(
+        json.dumps(message) + '\n' for message in [
+            _request(1, 'list_dependencies', target=MODULE + ':add'),
+            _request(2, 'mock_plan', target=MODULE + ':add'),
+            _request(3, 'mock_plan', target=MODULE + ':os_remove_wrap'),
+            _request(4, 'mock_plan', target=MODULE + ':add'),
+        ])
+
+    responses = _serve(server=server)
+
+    assert 'result' in responses[1]
+    assert REQUEST_CANCELLED == responses[2]['error']['code']
+    assert 'result' in responses[3]
+    assert 'result' in responses[4]
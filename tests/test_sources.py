@@ -0,0 +1,277 @@
+import ast
+import importlib
+import inspect
+import os
+import sys
+import textwrap
+import zipfile
+
+import pytest
+
+from mock_autogen.sources import ModuleCache, module_cache
+from mock_autogen.ast_tree_travel import DependencyLister
+from tests.sample.code.tested_module import FirstClass, add, \
+    get_random_number
+
+MODULE_SOURCE = textwrap.dedent('''
+    import functools
+
+
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return func(*args, **kwargs)
+        return wrapper
+
+
+    @decorate
+    def decorated():
+        return 1
+
+
+    def outer():
+        def inner():
+            return 2
+        return inner
+
+
+    class Outer:
+        class Inner:
+            async def method(self):
+                return 3
+
+
+    if True:
+        def redefined():
+            return 4
+    else:
+        def redefined():
+            return 5
+
+    square = lambda x: x * x
+    ''')
+
+
+def _load_module(path, source=MODULE_SOURCE):
+    path.write_text(source)
+    namespace = {}
+    exec(compile(source, str(path), 'exec'), namespace)
+    return namespace
+
+
+def test_parse_indexes_functions_by_qualname_and_first_line(tmp_path):
+    _load_module(tmp_path / 'module.py')
+    parsed = ModuleCache().parse(str(tmp_path / 'module.py'))
+
+    assert {
+        ('decorate', 5): 'decorate',
+        ('decorate.<locals>.wrapper', 6): 'wrapper',
+        ('decorated', 12): 'decorated',
+        ('outer', 17): 'outer',
+        ('outer.<locals>.inner', 18): 'inner',
+        ('Outer.Inner.method', 25): 'method',
+        ('redefined', 30): 'redefined',
+        ('redefined', 33): 'redefined',
+    } == {key: node.name for key, node in parsed.functions.items()}
+    assert {
+        'Outer': 23,
+        'Outer.Inner': 24
+    } == {key: node.lineno
+          for key, node in parsed.classes.items()}
+
+
+def test_function_node(tmp_path):
+    namespace = _load_module(tmp_path / 'module.py')
+    cache = ModuleCache()
+
+    source, node = cache.function_node(namespace['decorated'])
+    assert MODULE_SOURCE == source
+    assert 'decorated' == node.name
+
+    _, node = cache.function_node(namespace['outer']())
+    assert 'inner' == node.name
+
+    _, node = cache.function_node(namespace['redefined'])
+    assert 4 == ast.literal_eval(node.body[0].value)
+
+    assert cache.function_node(namespace['square']) is None
+    assert cache.function_node(len) is None
+
+
+def test_function_node_of_method():
+    source, node = ModuleCache().function_node(FirstClass(1).not_implemented)
+
+    assert 'not_implemented' == node.name
+    assert 'def not_implemented(self, param):' in source
+
+
+def test_parse_once_per_file(mocker):
+    spy_parse = mocker.spy(ModuleCache, 'parse')
+    cache = ModuleCache()
+
+    first = cache.function_node(add)
+    cache.function_node(get_random_number)
+
+    assert first[0] is cache.function_node(get_random_number)[0]
+    assert 1 == len(cache)
+    assert 3 == spy_parse.call_count
+
+
+def test_parse_invalidated_by_file_changes(tmp_path):
+    path = tmp_path / 'module.py'
+    path.write_text('def first():\n    pass\n')
+    cache = ModuleCache()
+    first = cache.parse(str(path))
+    assert first is cache.parse(str(path))
+
+    path.write_text('def second():\n    pass\n')
+    os.utime(str(path), ns=(1, 1))
+    second = cache.parse(str(path))
+
+    assert first is not second
+    assert [('second', 1)] == list(second.functions)
+
+
+def test_parse_missing_or_invalid_file(tmp_path):
+    (tmp_path / 'invalid.py').write_text('def invalid(:\n')
+    cache = ModuleCache()
+
+    assert cache.parse(str(tmp_path / 'missing.py')) is None
+    assert cache.parse(str(tmp_path / 'invalid.py')) is None
+    assert 0 == len(cache)
+
+
+def test_parse_lru_eviction(tmp_path):
+    cache = ModuleCache(maxsize=2)
+    for name in ['first', 'second', 'third']:
+        (tmp_path / (name + '.py')).write_text('')
+        cache.parse(str(tmp_path / (name + '.py')))
+
+    assert [str(tmp_path / 'second.py'),
+            str(tmp_path / 'third.py')] == list(cache._entries)
+
+
+def test_dependency_lister_uses_module_cache(mocker):
+    module_cache.clear()
+    spy_parse = mocker.spy(ast, 'parse')
+
+    DependencyLister(add).execute()
+    DependencyLister(get_random_number).execute()
+
+    assert 1 == spy_parse.call_count
+
+
+def test_dependency_lister_without_file(tmp_path, mocker):
+    namespace = _load_module(tmp_path / 'module.py')
+    os.remove(str(tmp_path / 'module.py'))
+    mock_getsource = mocker.MagicMock(name='getsource')
+    mock_getsource.return_value = "def outer():\n    return inner()\n"
+    mocker.patch('mock_autogen.ast_tree_travel.inspect.getsource',
+                 new=mock_getsource)
+    mock_getmodule = mocker.MagicMock(name='getmodule')
+    mock_getmodule.return_value.__name__ = 'module'
+    mocker.patch('mock_autogen.ast_tree_travel.inspect.getmodule',
+                 new=mock_getmodule)
+
+    deps_lister = DependencyLister(namespace['outer']).execute()
+
+    assert [('module', 'inner')] == list(deps_lister.dependencies_found)
+
+
+def test_parse_deeply_nested_code(tmp_path):
+    path = tmp_path / 'deep.py'
+    path.write_text("def deep():\n"
+                    "    return " + " + ".join(["1"] * 1500) + "\n")
+
+    parsed = ModuleCache().parse(str(path))
+
+    assert [('deep', 1)] == list(parsed.functions)
+
+
+@pytest.fixture
+def zip_package(tmp_path):
+    archive = tmp_path / 'deployed.zip'
+    with zipfile.ZipFile(str(archive), 'w') as zip_file:
+        zip_file.writestr('zipped/__init__.py', '')
+        zip_file.writestr(
+            'zipped/module.py', '# -*- coding: latin-1 -*-\n'
+            'import os\n\n\n'
+            'def first(path):\n'
+            '    return os.path.exists(path), "\xe9"\n\n\n'
+            'def second(path):\n'
+            '    return os.remove(path)\n'.encode('latin-1'))
+    sys.path.insert(0, str(archive))
+    yield importlib.import_module('zipped.module')
+    sys.path.remove(str(archive))
+    for name in ['zipped', 'zipped.module']:
+        del sys.modules[name]
+
+
+def test_function_node_in_zip_archive(zip_package):
+    cache = ModuleCache()
+
+    source, node = cache.function_node(zip_package.first)
+    assert 'first' == node.name
+    assert '"\xe9"' in source
+
+    second_source, node = cache.function_node(zip_package.second)
+    assert 'second' == node.name
+    assert source is second_source  # the archive was read once
+
+
+def test_dependency_lister_in_zip_archive(zip_package, mocker):
+    module_cache.clear()
+    spy_getsource = mocker.spy(inspect, 'getsource')
+
+    deps_lister = DependencyLister(zip_package.first).execute()
+
+    assert [('zipped.module.os.path', 'exists')
+            ] == list(deps_lister.dependencies_found)
+    assert not spy_getsource.called
+
+
+def test_parse_with_custom_loader(tmp_path):
+    sources = {'generated': 'def first():\n    pass\n'}
+
+    class Loader:
+
+        def get_source(self, name):
+            return sources[name]
+
+    module_globals = {'__name__': 'generated', '__loader__': Loader()}
+    cache = ModuleCache()
+    filename = str(tmp_path / 'generated.py')
+    first = cache.parse(filename, module_globals)
+    assert first is cache.parse(filename, module_globals)
+
+    sources['generated'] = 'def second():\n    pass\n'
+    assert first is cache.parse(filename, module_globals)
+    cache.invalidate(filename)
+
+    assert [('second', 1)] == list(cache.parse(filename,
+                                               module_globals).functions)
+    assert cache.parse(filename, {'__name__': 'generated'}) is None
+
+
+def test_parse_loaders_with_the_same_file_name():
+    class Loader:
+        def __init__(self, source):
+            self.source = source
+
+        def get_source(self, name):
+            return self.source
+
+    cache = ModuleCache()
+    first = cache.parse('<string>', {
+        '__name__': 'first',
+        '__loader__': Loader('def first():\n    pass\n')
+    })
+    second = cache.parse('<string>', {
+        '__name__': 'second',
+        '__loader__': Loader('def second():\n    pass\n')
+    })
+
+    assert [('first', 1)] == list(first.functions)
+    assert [('second', 1)] == list(second.functions)
+    cache.invalidate('<string>')
+    assert 0 == len(cache)
@@ -0,0 +1,178 @@
+import linecache
+import sys
+import textwrap
+import types
+
+import pytest
+
+from mock_autogen.ast_tree_travel import DependencyLister
+from mock_autogen.symtable_travel import SymbolTableDependencyLister
+from tests.sample.code.assignments import split_list, multiple_assignments, \
+    annotated_assignments
+from tests.sample.code.comprehensions_and_loops import get_square_root, \
+    get_square_root_loop, get_square_root_external_variable, \
+    summarize_environ_values, summarize_environ_values_loop
+from tests.sample.code.lambdas import simple_func_using_lambdas
+from tests.sample.code.tested_module import FirstClass, os_remove_wrap, \
+    base_64_whole_modules
+from tests.sample.code.with_statements import simple_context, \
+    outside_lock_context, inside_lock_context, \
+    multiple_contexts_different_methods
+
+
+@pytest.mark.parametrize('mocked', [
+    split_list, multiple_assignments, annotated_assignments, get_square_root,
+    get_square_root_loop, get_square_root_external_variable,
+    summarize_environ_values, summarize_environ_values_loop,
+    simple_func_using_lambdas, simple_context, outside_lock_context,
+    inside_lock_context, multiple_contexts_different_methods, os_remove_wrap,
+    base_64_whole_modules,
+    FirstClass(1).using_not_implemented, FirstClass.increase_class_counter
+])
+def test_same_dependencies_as_ast_engine(mocked):
+    expected = DependencyLister(mocked).execute()
+    deps_lister = SymbolTableDependencyLister(mocked).execute()
+
+    assert expected.warnings == deps_lister.warnings
+    assert list(expected.dependencies_found) == list(
+        deps_lister.dependencies_found)
+
+
+def test_global_declaration_and_closures(load_module):
+    module = load_module('''
+        import os
+
+        counter = 0
+
+
+        def outer(path):
+            helper = os.path.join
+            global counter
+
+            def inner(name):
+                counter = len(name)  # local to inner, not the global
+                return helper(path, name), counter
+
+            counter += 1
+            return inner(os.sep), counter
+        ''')
+
+    deps_lister = SymbolTableDependencyLister(module.outer).execute()
+
+    assert not deps_lister.warnings
+    # unlike the ast engine, the nested function isn't a dependency
+    assert [(module.__name__, 'os'), (module.__name__, 'len'),
+            (module.__name__, 'counter')
+            ] == list(deps_lister.dependencies_found)
+
+
+def test_local_import_and_nested_lambda(load_module):
+    module = load_module('''
+        def sort_files(directory):
+            import os
+            size = lambda path: os.stat(path).st_size
+            key = lambda name: size(os.path.join(directory, name))
+            return sorted(os.listdir(directory), key=key)
+        ''')
+
+    deps_lister = SymbolTableDependencyLister(module.sort_files).execute()
+
+    assert not deps_lister.warnings
+    assert [('os', 'stat'), ('os.path', 'join'), (module.__name__, 'sorted'),
+            ('os', 'listdir')] == list(deps_lister.dependencies_found)
+
+
+def test_lambda(load_module):
+    module = load_module('''
+        import os
+
+        exists = lambda path: os.path.exists(path) and len(path)
+        ''')
+
+    expected = DependencyLister(module.exists).execute()
+    deps_lister = SymbolTableDependencyLister(module.exists).execute()
+
+    assert not deps_lister.warnings
+    assert [(module.__name__ + '.os.path', 'exists'), (module.__name__, 'len')
+            ] == list(deps_lister.dependencies_found)
+    assert list(expected.dependencies_found) == list(
+        deps_lister.dependencies_found)
+
+
+def test_function_only_in_linecache():
+    source = textwrap.dedent('''
+        import os
+
+
+        def remove(path):
+            if os.path.exists(path):
+                os.remove(path)
+        ''')
+    filename = '<generated remove>'
+    linecache.cache[filename] = (len(source), None,
+                                 source.splitlines(True), filename)
+    module = types.ModuleType('generated_remove')
+    sys.modules[module.__name__] = module
+    exec(compile(source, filename, 'exec'), module.__dict__)
+    try:
+        deps_lister = SymbolTableDependencyLister(module.remove).execute()
+    finally:
+        del linecache.cache[filename]
+        del sys.modules[module.__name__]
+
+    assert not deps_lister.warnings
+    assert [('generated_remove.os.path', 'exists'),
+            ('generated_remove.os', 'remove')
+            ] == list(deps_lister.dependencies_found)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8), reason="requires walrus")
+def test_walrus_in_comprehension(load_module):
+    module = load_module('''
+        import math
+
+
+        def roots(items):
+            found = [root for x in items if (root := math.sqrt(x)) > 1]
+            return found, root
+        ''')
+
+    deps_lister = SymbolTableDependencyLister(module.roots).execute()
+
+    assert not deps_lister.warnings
+    assert [(module.__name__ + '.math', 'sqrt')
+            ] == list(deps_lister.dependencies_found)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 10), reason="requires match")
+def test_match_captures(load_module):
+    module = load_module('''
+        import json
+
+
+        def describe(message):
+            match json.loads(message):
+                case {"size": size}:
+                    return size.bit_length()
+                case [first, *rest]:
+                    return first.upper(), len(rest)
+        ''')
+
+    deps_lister = SymbolTableDependencyLister(module.describe).execute()
+
+    assert not deps_lister.warnings
+    assert [(module.__name__ + '.json', 'loads'),
+            (module.__name__, 'len')] == list(deps_lister.dependencies_found)
+
+
+def test_missing_symbol_table_is_a_warning(mocker):
+    mocker.patch(
+        'mock_autogen.symtable_travel.SymbolTableDependencyLister.'
+        '_find_parent_table',
+        return_value=None)
+
+    deps_lister = SymbolTableDependencyLister(os_remove_wrap).execute()
+
+    assert ["# could not find the symbol table of: os_remove_wrap"
+            ] == deps_lister.warnings
+    assert not list(deps_lister.dependencies_found)
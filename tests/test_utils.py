@@ -1,7 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pyperclip
+import pytest
 
 from mock_autogen.utils import print_result, copy_result_to_clipboard, \
-    get_unique_item
+    get_unique_item, suppress_output, resolve_dotted_path
 
 
 @copy_result_to_clipboard
@@ -72,3 +75,49 @@ def test_get_unique_item_exist_multiple():
     assert 'a_3' in items
     assert 'b' in items
     assert len(items) == 4
+
+
+def test_suppress_output(capsys, mocker):
+    mock_copy = mocker.MagicMock(name='copy')
+    mocker.patch('mock_autogen.utils.pyperclip.copy', new=mock_copy)
+
+    with suppress_output():
+        generated = my_simple_func("20")
+        with suppress_output():
+            pass
+        assert "2020" == my_simple_func("20")
+
+    assert "2020" == generated
+    assert "" == capsys.readouterr().out
+    mock_copy.assert_not_called()
+
+    my_simple_func("30")  # the side effects are back once outside
+    assert "3030" in capsys.readouterr().out
+    mock_copy.assert_called_once_with("3030")
+
+
+def test_suppress_output_is_per_thread(capsys):
+    with suppress_output():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(my_simple_func, "40").result()
+
+    assert "4040" in capsys.readouterr().out
+
+
+def test_resolve_dotted_path():
+    import os.path
+    import tests.sample.code.tested_module
+
+    assert os.path.join is resolve_dotted_path(
+        'tests.sample.code.tested_module.os.path.join')
+    assert tests.sample.code.tested_module.FirstClass.not_implemented is \
+        resolve_dotted_path(
+            'tests.sample.code.tested_module.FirstClass.not_implemented')
+    assert os.path is resolve_dotted_path('os.path')
+
+
+def test_resolve_dotted_path_missing():
+    with pytest.raises(AttributeError):
+        resolve_dotted_path('tests.sample.code.tested_module.missing')
+    with pytest.raises(ImportError):
+        resolve_dotted_path('missing_module_name.attribute')
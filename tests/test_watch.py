@@ -0,0 +1,73 @@
+import logging
+
+from mock_autogen.watch import Watcher, main
+
+SOURCE = '''
+import os
+
+
+def remove(path):
+    os.remove(path)
+
+
+def join(path, name):
+    return os.path.join(path, name)
+'''
+
+
+def test_poll_regenerates_changed_functions(load_module, tmp_path):
+    watcher = Watcher([load_module(SOURCE, 'watched_sample')],
+                      str(tmp_path / 'mocks'))
+
+    assert ['watched_sample:join',
+            'watched_sample:remove'] == sorted(watcher.start())
+    assert [] == watcher.poll()
+
+    load_module(SOURCE.replace('os.remove', 'os.unlink'),
+                'watched_sample',
+                imported=False)
+    assert ['watched_sample:remove'] == watcher.poll()
+    assert "os.unlink" in (tmp_path / 'mocks' /
+                           'watched_sample.remove.py').read_text()
+    assert [] == watcher.poll()
+
+
+def test_poll_keeps_module_until_fixed(load_module, tmp_path, caplog):
+    watcher = Watcher([load_module(SOURCE, 'watched_sample')],
+                      str(tmp_path / 'mocks'))
+    watcher.start()
+
+    load_module(SOURCE + '\ndef broken(:\n', 'watched_sample', imported=False)
+    with caplog.at_level(logging.WARNING):
+        assert [] == watcher.poll()
+    assert "could not reload watched_sample" in caplog.text
+
+    load_module(SOURCE.replace('os.path.join', 'os.path.abspath'),
+                'watched_sample',
+                imported=False)
+    assert ['watched_sample:join'] == watcher.poll()
+
+
+def test_run_polls(load_module, tmp_path, mocker):
+    mock_sleep = mocker.patch('mock_autogen.watch.time.sleep')
+    watcher = Watcher([load_module(SOURCE, 'watched_sample')],
+                      str(tmp_path / 'mocks'))
+    mock_poll = mocker.patch.object(watcher, 'poll', return_value=[])
+
+    watcher.run(interval=0.1, polls=3)
+
+    assert 3 == mock_poll.call_count
+    mock_sleep.assert_called_with(0.1)
+
+
+def test_main(load_module, tmp_path, mocker):
+    mock_run = mocker.patch('mock_autogen.watch.Watcher.run',
+                            side_effect=KeyboardInterrupt)
+    mock_init = mocker.spy(Watcher, '__init__')
+    load_module(SOURCE, 'watched_sample', imported=False)
+
+    main(['watched_sample', '-o',
+          str(tmp_path / 'mocks'), '--engine', 'bytecode'])
+
+    mock_run.assert_called_once_with(0.5)
+    assert {'engine': 'bytecode'} == mock_init.call_args[1]